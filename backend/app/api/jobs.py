@@ -1,18 +1,42 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+import time
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from backend.app.core.config import settings
+from backend.app.core.constants import TERMINAL_STATUSES
 from backend.app.core.dependencies import get_db
 from backend.app.services.database_service import DatabaseService
-from backend.app.services.queue_service import QueueService
+from backend.app.services.stream_queue_service import make_queue_service
 from backend.app.services.job_service import JobService
-from backend.app.redis.redis_session import get_redis_client
-from backend.app.schemas.job import JobSubmitResponse, JobSubmitRequest, StatusSchema, SolverResult
+from backend.app.services.run_cache import RunCache
+from backend.app.redis.redis_session import get_async_redis, get_redis_client
+from backend.app.services.run_events import RunEventHub
+from backend.app.schemas.job import (
+    MAX_BATCH_SIZE,
+    BatchStatusResponse,
+    JobSubmitBatchRequest,
+    JobSubmitBatchResponse,
+    JobSubmitRequest,
+    JobSubmitResponse,
+    SolverResult,
+    StatusSchema,
+)
 
 jobs_router = APIRouter(prefix="/jobs", tags=["async-jobs"])
 
+# one subscription per API process for /events and /wait, closed by the lifespan in main.py
+run_event_hub = RunEventHub(get_async_redis)
+SSE_HEARTBEAT_S = 15
+
 def get_job_service(db: DatabaseService = Depends(get_db)) -> JobService:
     """Dependency injection for JobService."""
     redis_client = get_redis_client()
-    queue_service = QueueService(redis_client)
-    return JobService(db, queue_service)
+    queue_service = make_queue_service(redis_client, settings.QUEUE_BACKEND)
+    cache = RunCache(redis_client, result_ttl_s=settings.RUN_CACHE_TTL_S) if settings.RUN_CACHE_TTL_S > 0 else None
+    return JobService(db, queue_service, cache)
 
 @jobs_router.post("/submit", response_model=JobSubmitResponse)
 def submit_job(
@@ -22,6 +46,28 @@ def submit_job(
     """Submit a formula for async solving."""
     return job_service.submit_job(request.formula, notation=request.notation, mode=request.mode)
 
+@jobs_router.post("/submit_batch", response_model=JobSubmitBatchResponse)
+def submit_batch(
+    request: JobSubmitBatchRequest,
+    job_service: JobService = Depends(get_job_service)
+):
+    """Submit up to MAX_BATCH_SIZE formulas for async solving at once."""
+    return job_service.submit_batch(request.jobs)
+
+@jobs_router.get("/status", response_model=BatchStatusResponse)
+def get_statuses(
+    ids: List[str] = Query(..., description="Run ids, comma separated (ids=1,2,3) or repeated (ids=1&ids=2)"),
+    job_service: JobService = Depends(get_job_service)
+):
+    """Get the statuses of many jobs in one request."""
+    try:
+        run_ids = [int(run_id) for value in ids for run_id in value.split(",") if run_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be integer run ids, e.g. ids=1,2,3")
+    if not run_ids or len(run_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Pass between 1 and {MAX_BATCH_SIZE} run ids.")
+    return job_service.get_run_statuses(run_ids)
+
 @jobs_router.get("/status/{run_id}", response_model=StatusSchema)
 def get_status(
     run_id: int,
@@ -37,4 +83,82 @@ def get_result(
 ):
     """Get result of a completed job."""
     return job_service.get_run_result(run_id)
-    
\ No newline at end of file
+
+async def read_status(job_service: JobService, run_id: int) -> str:
+    """Current status through the cache/DB, raises 404 for unknown runs."""
+    return (await run_in_threadpool(job_service.get_run_status, run_id)).status
+
+@jobs_router.get("/wait/{run_id}", response_model=StatusSchema)
+async def wait_for_run(
+    run_id: int,
+    timeout: float = Query(30, gt=0, le=settings.LONG_POLL_MAX_S),
+    job_service: JobService = Depends(get_job_service)
+):
+    """Long-poll: return as soon as the run is finished, or the current status after timeout seconds."""
+    # subscribe before reading the status, so that no transition falls in between
+    queue = await run_event_hub.subscribe(run_id)
+    try:
+        status = await read_status(job_service, run_id)
+        deadline = time.monotonic() + timeout
+        while status not in TERMINAL_STATUSES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                status = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if status is None:
+                # the subscription was lost
+                break
+        if status not in TERMINAL_STATUSES:
+            # an event may have been missed, the cache/DB has the last word
+            status = await read_status(job_service, run_id)
+    finally:
+        run_event_hub.unsubscribe(run_id, queue)
+    return StatusSchema(msg="Here is the status of your run.", run_id=run_id, status=status)
+
+@jobs_router.get("/events/{run_id}")
+async def run_events(
+    run_id: int,
+    job_service: JobService = Depends(get_job_service)
+):
+    """Server-Sent Events: a status event now and on every transition, the stream ends with the final status."""
+    queue = await run_event_hub.subscribe(run_id)
+    try:
+        status = await read_status(job_service, run_id)
+    except Exception:
+        run_event_hub.unsubscribe(run_id, queue)
+        raise
+    return StreamingResponse(
+        status_events(run_id, queue, status),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def status_events(run_id: int, queue: asyncio.Queue, status: str):
+    try:
+        deadline = time.monotonic() + settings.SSE_MAX_S
+        while True:
+            yield f"event: status\ndata: {json.dumps({'run_id': run_id, 'status': status})}\n\n"
+            if status in TERMINAL_STATUSES:
+                return
+            # wait for the next transition, with comments that keep proxies from closing the stream
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # EventSource reconnects and gets the current status
+                    return
+                try:
+                    next_status = await asyncio.wait_for(queue.get(), min(SSE_HEARTBEAT_S, remaining))
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if next_status is None:
+                    # the subscription was lost, the reconnect subscribes again
+                    return
+                if next_status != status:
+                    status = next_status
+                    break
+    finally:
+        run_event_hub.unsubscribe(run_id, queue)
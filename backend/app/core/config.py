@@ -21,9 +21,24 @@ class Settings(BaseSettings):
     REDIS_DB: int = 0
     REDIS_POOL_MAX_CONN: int = 15
     REDIS_PASSWORD: str | None = None
+    QUEUE_BACKEND: str = "list"  # "list" (BRPOPLPUSH) or "streams" (consumer group with reclaim, a single lane without WORKER_SMALL_LANE_SLOTS)
+    QUEUE_REAPER_INTERVAL_S: int = 30  # scans of q:processing for abandoned jobs (list backend), 0 disables
+    QUEUE_REAPER_GRACE_S: int = 60  # added to the timeout of a job before it counts as abandoned
+    RUN_CACHE_TTL_S: int = 3600  # Redis cache of run statuses and results for polls, 0 disables
+    LONG_POLL_MAX_S: int = 60  # longest timeout of /jobs/wait
+    SSE_MAX_S: int = 300  # /jobs/events streams end after this, EventSource reconnects
     
     SOLVER_PATH_SLOW: str = "./bin/satsolver"
     SOLVER_PATH_FAST: str = "./bin/satsolver_opt"
+    SOLVER_CDCL_PERCENT: int = 0  # share of async runs solved with --cdcl (0-100)
+    SOLVER_SERVER_POOL_SIZE: int = 2  # long-lived --server processes, 0 starts one process per run
+    WORKER_CONCURRENCY: int = 0  # jobs solved at the same time per worker, 0 uses the CPU count
+    WORKER_SMALL_LANE_SLOTS: int = 1  # worker slots that only take jobs of the small lane, list backend only
+    RESULT_BATCH_INTERVAL_MS: int = 0  # write-behind of results in batches, 0 commits every job on its own
+    RESULT_BATCH_MAX: int = 200  # results per batch commit
+    SOLVER_SERVER_MAX_REQUESTS: int = 1000  # requests before a server process is replaced
+    SOLVER_LIBRARY_PATH: str = "./bin/libsatsolver.so"  # in-process solver, skipped if not built
+    SOLVER_LIBRARY_CONFLICT_LIMIT: int = 10_000  # conflicts before falling back to a process, 0 disables
     DEFAULT_TIMEOUT_MS: int = 250_000
     MAX_TIMEOUT_MS: int = 300_000
     
@@ -11,6 +11,14 @@ class JobStatus:
 class SolverMode:
     CNF_SUDOKU = "CNF_SUDOKU"
     
+# statuses after which a run never changes again
+TERMINAL_STATUSES = frozenset({JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.TIMEOUT, JobStatus.CANCELLED})
+
+class QueueLane:
+    SMALL = "small"
+    LARGE = "large"
+    SUDOKU = "sudoku"
+
 class SolverExitCodes:
     SAT = 10
     UNSAT = 20
@@ -20,4 +28,5 @@ ALLOWED_OPERATORS = { '&&', "||", "<=>", "=>", "!"}
     
 MAX_RETRIES = 3 
 TIMEOUT_S_SUDOKU = 250
-TIMEOUT_S_SAT = 10
\ No newline at end of file
+TIMEOUT_S_SAT = 10
+SMALL_JOB_MAX_COST = 2_000 # estimated cost up to which a SAT job goes to the small lane
@@ -7,6 +7,54 @@ DO UPDATE SET
 RETURNING id;
 """
 GET_EXISTING_ID = "SELECT id FROM formulas WHERE hash = %s;"
+
+"""
+Single flight: concurrent submits of one formula must not both find no active run and both
+create one. LOCK_FORMULA takes a transaction level advisory lock keyed on the first 64 bits of
+the formula hash, so submits of the same formula run one after the other until commit, and the
+next statement (with a new snapshot) sees the run of the previous submit.
+LOCK_FORMULAS locks the hashes of a batch, callers pass them sorted so that batches cannot deadlock.
+"""
+LOCK_FORMULA = "SELECT pg_advisory_xact_lock(('x' || substr(%s, 1, 16))::bit(64)::bigint);"
+
+LOCK_FORMULAS = """
+SELECT pg_advisory_xact_lock(('x' || substr(hash, 1, 16))::bit(64)::bigint)
+FROM unnest(%s::text[]) AS hash;
+"""
+
+"""
+Submit of one formula in one statement, used by JobService.submit_job after LOCK_FORMULA:
+upsert the formula, look for its latest completed run, else an active run, and only if there
+is neither create a new run, which starts out QUEUED. Returns one row
+(formula_id, run_id, status, created), created is true for a new run.
+"""
+SUBMIT_RUN = """
+WITH formula AS (
+    INSERT INTO formulas (normalized_input, hash, notation)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (hash)
+    DO UPDATE SET
+        hash = EXCLUDED.hash
+    RETURNING id
+),
+existing AS (
+    SELECT runs.id, runs.status
+    FROM runs, formula
+    WHERE runs.formula_id = formula.id AND runs.status IN ('COMPLETED', 'CREATED', 'PROCESSING', 'QUEUED')
+    ORDER BY runs.status = 'COMPLETED' DESC, runs.finished_at DESC NULLS LAST
+    LIMIT 1
+),
+created AS (
+    INSERT INTO runs (formula_id, status, timeout_s, mode)
+    SELECT formula.id, %s, %s, %s
+    FROM formula
+    WHERE NOT EXISTS (SELECT 1 FROM existing)
+    RETURNING id, status
+)
+SELECT formula.id, existing.id, existing.status, false FROM formula, existing
+UNION ALL
+SELECT formula.id, created.id, created.status, true FROM formula, created;
+"""
 INSERT_INTO_RUNS = "INSERT INTO runs (formula_id,status,timeout_s,mode) VALUES (%s,%s,%s,%s) RETURNING id;"
 
 """
@@ -67,4 +115,56 @@ GET_RUN_STATUS_BY_ID = """
 SELECT runs.id, runs.status 
 FROM runs
 WHERE id = %s;
-"""
\ No newline at end of file
+"""
+"""
+Batched writes of completed runs, used by complete_runs in one transaction.
+INSERT_RESULTS takes the rows of all runs through execute_values, FINISH_RUNS sets one final
+status for a list of run ids, so a batch needs one statement per distinct status.
+"""
+INSERT_RESULTS = """
+INSERT INTO results (run_id, result, assignment, stdout, stderr, error_type, error_message, runtime_s)
+VALUES %s
+ON CONFLICT (run_id) DO NOTHING;
+"""
+
+FINISH_RUNS = """
+UPDATE runs
+SET status = %s,
+    finished_at = NOW()
+WHERE id = ANY(%s);
+"""
+
+"""
+Batched submission, used by JobService.submit_batch in one transaction after LOCK_FORMULAS.
+UPSERT_FORMULAS takes the distinct formulas of a batch through execute_values (a hash may only
+appear once per statement), GET_REUSABLE_RUNS picks per formula the latest completed run, else an
+active one, like SUBMIT_RUN does for one formula. New runs start out QUEUED, FINISH_RUNS fails
+them if the enqueue failed.
+"""
+UPSERT_FORMULAS = """
+INSERT INTO formulas (normalized_input, hash, notation)
+VALUES %s
+ON CONFLICT (hash)
+DO UPDATE SET
+    hash = EXCLUDED.hash
+RETURNING id, hash;
+"""
+
+GET_REUSABLE_RUNS = """
+SELECT DISTINCT ON (formula_id) formula_id, id, status
+FROM runs
+WHERE formula_id = ANY(%s) AND status IN ('COMPLETED', 'CREATED', 'PROCESSING', 'QUEUED')
+ORDER BY formula_id, status = 'COMPLETED' DESC, finished_at DESC NULLS LAST;
+"""
+
+INSERT_RUNS = """
+INSERT INTO runs (formula_id, status, timeout_s, mode)
+VALUES %s
+RETURNING id, formula_id;
+"""
+
+GET_RUN_STATUSES = """
+SELECT id, status
+FROM runs
+WHERE id = ANY(%s);
+"""
@@ -69,6 +69,7 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down application...")
     from backend.app.db.session import close_pool
     from backend.app.redis.redis_session import close_redis_pool
+    await jobs.run_event_hub.close()
     close_pool()
     close_redis_pool()
     logger.info("Connection pools closed")
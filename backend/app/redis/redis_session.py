@@ -1,5 +1,6 @@
 import logging 
 import redis
+import redis.asyncio
 from typing import Optional
 from redis import Redis
 from redis.connection import ConnectionPool
@@ -8,6 +9,7 @@ from backend.app.core.config import settings
 logger = logging.getLogger(__name__)
 
 rpool: Optional[ConnectionPool] = None
+arpool: Optional[redis.asyncio.ConnectionPool] = None
 def init_redis_pool() -> None:
     global rpool
     if rpool is None:
@@ -41,6 +43,22 @@ def get_redis() -> Redis:
 # Alias for compatibility with existing code
 get_redis_client = get_redis
 
+def get_async_redis() -> redis.asyncio.Redis:
+    """Async client for the event subscription of the API, without socket timeout as it waits for messages."""
+    global arpool
+    if arpool is None:
+        arpool = redis.asyncio.ConnectionPool(
+            host = settings.REDIS_HOST,
+            port = settings.REDIS_PORT,
+            db = settings.REDIS_DB,
+            password=getattr(settings, "REDIS_PASSWORD", None),
+            max_connections=settings.REDIS_POOL_MAX_CONN,
+            decode_responses = True,
+            socket_connect_timeout = 3,
+            health_check_interval = 30,
+        )
+    return redis.asyncio.Redis(connection_pool=arpool)
+
 def close_redis_pool() -> None:
     """Close Redis connection pool and cleanup connections."""
     if rpool is not None:
@@ -4,6 +4,7 @@ from pydantic import BaseModel, Field, field_validator
 
 MAX_FORMULA_LENGTH = 300_000
 MAX_TOKENS = 85_000
+MAX_BATCH_SIZE = 1000  # formulas per submit_batch and run ids per batch status request
 
 class SolveRequest(BaseModel):
     mode : str = Field(
@@ -74,11 +75,27 @@ class JobSubmitRequest(BaseModel):
     notation: str = Field(default="RPN", description="Notation format")
     mode: str = Field(default="RPN", description="Solver mode")
 
+class JobSubmitBatchRequest(BaseModel):
+    jobs: list[JobSubmitRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class JobSubmitBatchResponse(BaseModel):
+    msg: str
+    jobs: list[JobSubmitResponse]  # in the order of the request
+
 class StatusSchema(BaseModel):
     msg: str
     run_id: int
     status: str
 
+class RunStatus(BaseModel):
+    run_id: int
+    status: str
+
+class BatchStatusResponse(BaseModel):
+    msg: str
+    runs: list[RunStatus]
+    missing: list[int]  # requested run ids that do not exist
+
 class SolverResult(BaseModel): 
     msg: str
     status: str
@@ -1,7 +1,9 @@
 """Database service layer for handling all database operations."""
 import json
-from typing import Optional, Dict, Any, Callable
+from collections import defaultdict
+from typing import Optional, Dict, Any, Callable, List
 from psycopg2.extensions import connection
+from psycopg2.extras import execute_values
 from backend.app.db import queries
 from backend.app.core.constants import JobStatus
 
@@ -54,6 +56,94 @@ class DatabaseService:
         finally:
             self.release_conn(conn)
 
+    def submit_run(
+        self,
+        normalized_input: str,
+        hash_value: str,
+        notation: str,
+        mode: str,
+        timeout_s: int
+    ) -> Dict[str, Any]:
+        """
+        get_or_create_formula, get_completed_run, get_active_run and create_run in one
+        statement and one commit. A new run is created QUEUED, the caller enqueues it.
+        The advisory lock on the hash (sent in the same round trip) makes concurrent submits of
+        one formula wait for each other, so they all get the same run.
+        Returns formula_id, run_id, status and created (False if an existing run is returned).
+        """
+        conn = self.get_conn()
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        queries.LOCK_FORMULA + queries.SUBMIT_RUN,
+                        (hash_value, normalized_input, hash_value, notation, JobStatus.QUEUED, timeout_s, mode)
+                    )
+                    formula_id, run_id, status, created = cur.fetchone()
+                    return {
+                        "formula_id": formula_id,
+                        "run_id": run_id,
+                        "status": status,
+                        "created": created,
+                    }
+        finally:
+            self.release_conn(conn)
+
+    def submit_runs(self, jobs: List[tuple]) -> Dict[str, Dict[str, Any]]:
+        """
+        submit_run for a batch: jobs are (normalized_input, hash, notation, mode, timeout_s)
+        with distinct hashes. One transaction locks all hashes, upserts the formulas in one
+        multi-row statement, looks up their completed or active runs in one query and
+        inserts the missing runs (QUEUED) in one multi-row statement.
+        Returns hash -> formula_id, run_id, status and created like submit_run.
+        """
+        if not jobs:
+            return {}
+        # a fixed lock order, so that batches with common formulas cannot deadlock
+        jobs = sorted(jobs, key=lambda job: job[1])
+        conn = self.get_conn()
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute(queries.LOCK_FORMULAS, ([job[1] for job in jobs],))
+                    formulas = [(normalized_input, hash_value, notation) for normalized_input, hash_value, notation, _, _ in jobs]
+                    rows = execute_values(cur, queries.UPSERT_FORMULAS, formulas, page_size=len(formulas), fetch=True)
+                    formula_ids = {hash_value: formula_id for formula_id, hash_value in rows}
+                    cur.execute(queries.GET_REUSABLE_RUNS, (list(formula_ids.values()),))
+                    existing = {formula_id: (run_id, status) for formula_id, run_id, status in cur.fetchall()}
+                    new_runs = [
+                        (formula_ids[hash_value], JobStatus.QUEUED, timeout_s, mode)
+                        for _, hash_value, _, mode, timeout_s in jobs
+                        if formula_ids[hash_value] not in existing
+                    ]
+                    created = {}
+                    if new_runs:
+                        rows = execute_values(cur, queries.INSERT_RUNS, new_runs, page_size=len(new_runs), fetch=True)
+                        created = {formula_id: run_id for run_id, formula_id in rows}
+        finally:
+            self.release_conn(conn)
+
+        submitted = {}
+        for hash_value, formula_id in formula_ids.items():
+            if formula_id in existing:
+                run_id, status = existing[formula_id]
+                submitted[hash_value] = {"formula_id": formula_id, "run_id": run_id, "status": status, "created": False}
+            else:
+                submitted[hash_value] = {"formula_id": formula_id, "run_id": created[formula_id], "status": JobStatus.QUEUED, "created": True}
+        return submitted
+
+    def finish_runs(self, run_ids: List[int], status: str) -> None:
+        """Set one final status for many runs, e.g. FAILED for a batch that could not be enqueued."""
+        if not run_ids:
+            return
+        conn = self.get_conn()
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute(queries.FINISH_RUNS, (status, run_ids))
+        finally:
+            self.release_conn(conn)
+
     def update_run_status(self, run_id: int, status: str) -> None:
         """Update the status of a solver run."""
         conn = self.get_conn()
@@ -116,6 +206,19 @@ class DatabaseService:
         finally:
             self.release_conn(conn) 
                    
+    def get_run_statuses(self, run_ids: List[int]) -> Dict[int, str]:
+        """Statuses of many runs in one query, run_id -> status. Unknown run ids are left out."""
+        if not run_ids:
+            return {}
+        conn = self.get_conn()
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute(queries.GET_RUN_STATUSES, (run_ids,))
+                    return dict(cur.fetchall())
+        finally:
+            self.release_conn(conn)
+
     def insert_result(
         self,
         run_id: int,
@@ -148,6 +251,75 @@ class DatabaseService:
         finally:
             self.release_conn(conn)
 
+    def complete_run(
+        self,
+        run_id: int,
+        status: str,
+        result: str,
+        assignment: Optional[Dict],
+        stdout: str,
+        stderr: str,
+        error_type: Optional[str],
+        error_message: Optional[str],
+        runtime_s: int
+    ) -> None:
+        """Store the result and the final status of a run in one transaction."""
+        conn = self.get_conn()
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        queries.INSERT_RESULT,
+                        (
+                            run_id, 
+                            result, 
+                            json.dumps(assignment) if assignment else None, 
+                            stdout, 
+                            stderr, 
+                            error_type, 
+                            error_message, 
+                            runtime_s
+                        )
+                    )
+                    cur.execute(queries.UPDATE_RUN_STATUS, (status, status, status, run_id))
+        finally:
+            self.release_conn(conn)
+
+    def complete_runs(self, runs: List[Dict[str, Any]]) -> None:
+        """
+        Store the results and final statuses of many runs in one transaction.
+        Every run is a dict with the arguments of complete_run. The results are one
+        multi-row INSERT, the statuses one UPDATE per distinct final status.
+        """
+        if not runs:
+            return
+        rows = [
+            (
+                run["run_id"],
+                run["result"],
+                json.dumps(run["assignment"]) if run["assignment"] else None,
+                run["stdout"],
+                run["stderr"],
+                run["error_type"],
+                run["error_message"],
+                run["runtime_s"],
+            )
+            for run in runs
+        ]
+        by_status = defaultdict(list)
+        for run in runs:
+            by_status[run["status"]].append(run["run_id"])
+
+        conn = self.get_conn()
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    execute_values(cur, queries.INSERT_RESULTS, rows, page_size=len(rows))
+                    for status, run_ids in by_status.items():
+                        cur.execute(queries.FINISH_RUNS, (status, run_ids))
+        finally:
+            self.release_conn(conn)
+
     def get_result_by_run_id(self, run_id: int) -> Optional[Dict[str, Any]]:
         """Get solver result by run ID."""
         conn = self.get_conn()
@@ -1,12 +1,22 @@
 import redis
 import logging
+from typing import Dict, List, Optional
 from redis.exceptions import ConnectionError, TimeoutError, RedisError
 from fastapi import HTTPException
 from backend.app.services.database_service import DatabaseService
-from backend.app.services.queue_service import QueueService
-from backend.app.utils.formula import normalize_and_hash
-from backend.app.core.constants import JobStatus, TIMEOUT_S_SUDOKU, TIMEOUT_S_SAT, SolverMode
-from backend.app.schemas.job import JobSubmitResponse, StatusSchema, SolverResult
+from backend.app.services.queue_service import QueueService, lane_for
+from backend.app.services.run_cache import RunCache
+from backend.app.utils.formula import estimate_cost, normalize_and_hash
+from backend.app.core.constants import JobStatus, TERMINAL_STATUSES, TIMEOUT_S_SUDOKU, TIMEOUT_S_SAT, SolverMode
+from backend.app.schemas.job import (
+    BatchStatusResponse,
+    JobSubmitBatchResponse,
+    JobSubmitRequest,
+    JobSubmitResponse,
+    RunStatus,
+    SolverResult,
+    StatusSchema,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -16,20 +26,23 @@ class JobService:
     1. JobService initialization.
     2. Submitting a run and returning run_id.
     3. Get the status of a run if it exists in db.
-    4. Get the result of a completed run."""
+    4. Get the result of a completed run.
+    5. Batched submission and status reads, a handful of round trips per batch instead of per run.
+    Status and result reads go through the RunCache if one is given."""
     
-    def __init__(self, db_service: DatabaseService, queue_service: QueueService):
+    def __init__(self, db_service: DatabaseService, queue_service: QueueService, cache: Optional[RunCache] = None):
         """DI"""
         self.db = db_service
         self.queue = queue_service
+        self.cache = cache
     
     def submit_job(self, formula_raw: str, notation: str = 'RPN', timeout_s: int = 5, mode: str = 'RPN'):
         """
         DATABASE is source of truth.
         1.Validate formula
-        2.Deduplicate and check if it exists in Postgressql.
-        3.Create Job
-        4.Try enqueue, if fails then DB is FAILED, else QUEUED.
+        2.Deduplicate, reuse a completed or active run, else create a QUEUED run,
+          one statement and one round trip (DatabaseService.submit_run).
+        3.Try enqueue, if fails then DB is FAILED.
         Return: JobSubmitSchema
         """
         try:
@@ -41,57 +54,32 @@ class JobService:
             status_code=400,
             detail= "Re check your input as it may be wrong, error is: " + str(e)
             )
-        #Check if formula already exists, if it does not then you get a new formula_id, uses UPSERT.
-        formula_id = self.db.get_or_create_formula(normalized_rpn, normalized_hash, notation)
-        logger.debug(f"For formula_id{formula_id}, formula has been checked or created.")
-        
-        # First check for completed runs (cached results)
-        completed_job = self.db.get_completed_run(formula_id)
-        if completed_job:
-            existing_run_id, status = completed_job
-            logger.info(f"Cached result found for formula_id {formula_id}, run_id is {existing_run_id}")
-            return JobSubmitResponse(
-                msg = "Cached result found. Returning existing run_id.",
-                formula = normalized_rpn,
-                formula_id = formula_id,
-                run_id = existing_run_id,
-                status = status             
-            )
-        
-        # Then check if there are already pending/processing jobs against said formula
-        pending_job = self.db.get_active_run(formula_id)
-        if pending_job:
-            existing_run_id, status = pending_job
-            logger.info(f"Run pending against formula_id{formula_id}, run_id is {existing_run_id}")
-            logger.info(f"Returning run_id:{existing_run_id}")
+        run = self.db.submit_run(normalized_rpn, normalized_hash, notation, mode, self._timeout_for(mode))
+        formula_id = run["formula_id"]
+
+        if not run["created"]:
+            existing_run_id, status = run["run_id"], run["status"]
+            if status == JobStatus.COMPLETED:
+                logger.info(f"Cached result found for formula_id {formula_id}, run_id is {existing_run_id}")
+                msg = "Cached result found. Returning existing run_id."
+            else:
+                logger.info(f"Run pending against formula_id{formula_id}, run_id is {existing_run_id}")
+                msg = "A run already exists for said formula, run_id is returned."
             return JobSubmitResponse(
-                msg = "A run already exists for said formula, run_id is returned.",
+                msg = msg,
                 formula = normalized_rpn,
                 formula_id = formula_id,
                 run_id = existing_run_id,
-                status =  status             
+                status = status
             )
-        new_run_id = None
-        timeout_s = 5
-        if mode == SolverMode.CNF_SUDOKU:
-            new_run_id = self.db.create_run(formula_id, mode, TIMEOUT_S_SUDOKU)
-            timeout_s =  TIMEOUT_S_SUDOKU
-        else:
-            new_run_id = self.db.create_run(formula_id, mode, TIMEOUT_S_SAT)
-            timeout_s =  TIMEOUT_S_SAT
-        payload = {
-            "formula" : normalized_rpn,
-            "run_id": new_run_id,
-            "formula_id": formula_id,
-            "mode": mode,
-            "timeout_s": timeout_s
-        }
+
+        new_run_id = run["run_id"]
+        payload = self._payload(normalized_rpn, new_run_id, formula_id, mode)
         try:
             self.queue.enqueue(new_run_id, payload)
-            logger.info(f"Run with id{new_run_id} has been queued on Redis.")
-            #REDIS ENQUEUED LOGGER
         except redis.RedisError as exc:
             self.db.update_run_status(new_run_id, JobStatus.FAILED)
+            self._invalidate(new_run_id)
             logger.exception(
                 "Failed to enqueue run to Redis",
                 extra={"run_id": new_run_id, "formula_id": formula_id},
@@ -101,8 +89,7 @@ class JobService:
                 detail="Job queue temporarily unavailable"
             ) from exc
 
-        self.db.update_run_status(new_run_id, JobStatus.QUEUED)
-        logger.info(f"Run with id{new_run_id} has successfully queued on Redis, status change to QUEUED.")
+        logger.info(f"Run with id{new_run_id} has successfully queued on Redis.")
         return JobSubmitResponse(
                 msg = "Job submitted successfully",
                 formula = normalized_rpn,
@@ -111,10 +98,105 @@ class JobService:
                 status = JobStatus.QUEUED
             ) 
             
+    def submit_batch(self, jobs: List[JobSubmitRequest]) -> JobSubmitBatchResponse:
+        """
+        submit_job for many formulas with the same deduplication, with a fixed number of round trips per batch:
+        1.Validate and hash all formulas, a formula that appears twice is only stored once.
+        2.One transaction (DatabaseService.submit_runs) upserts the formulas, reuses their completed or
+          active runs as submit_job does and creates QUEUED runs for the others.
+        3.Enqueue the new runs in one Redis pipeline, if that fails they are FAILED in one update.
+        An invalid formula rejects the whole batch before anything is stored.
+        Return: JobSubmitBatchResponse with one entry per job, in request order
+        """
+        normalized = []
+        for index, job in enumerate(jobs):
+            try:
+                normalized.append(normalize_and_hash(job.formula, "RPN"))
+            except ValueError as e:
+                logger.error(f"Formula {index} of the batch needs to be checked.")
+                raise HTTPException(
+                status_code=400,
+                detail= f"Re check formula {index} of the batch as it may be wrong, error is: " + str(e)
+                )
+        # the first job of a formula decides notation and mode, like the first submit_job would
+        first_job: Dict[str, int] = {}
+        for index, (_, normalized_hash) in enumerate(normalized):
+            first_job.setdefault(normalized_hash, index)
+
+        submitted = self.db.submit_runs([
+            (normalized[index][0], normalized_hash, jobs[index].notation, jobs[index].mode, self._timeout_for(jobs[index].mode))
+            for normalized_hash, index in first_job.items()
+        ])
+        new_runs = []
+        for normalized_hash, index in first_job.items():
+            run = submitted[normalized_hash]
+            if run["created"]:
+                new_runs.append((run["run_id"], self._payload(normalized[index][0], run["run_id"], run["formula_id"], jobs[index].mode)))
+        if new_runs:
+            try:
+                self.queue.enqueue_many(new_runs)
+            except redis.RedisError as exc:
+                self.db.finish_runs([run_id for run_id, _ in new_runs], JobStatus.FAILED)
+                for run_id, _ in new_runs:
+                    self._invalidate(run_id)
+                logger.exception("Failed to enqueue a batch of %s runs to Redis", len(new_runs))
+                raise HTTPException(
+                    status_code=503,
+                    detail="Job queue temporarily unavailable"
+                ) from exc
+        logger.info(f"Batch of {len(jobs)} jobs: {len(new_runs)} runs queued, {len(jobs) - len(new_runs)} reused.")
+
+        responses = []
+        for index, (normalized_rpn, normalized_hash) in enumerate(normalized):
+            run = submitted[normalized_hash]
+            if run["created"] and first_job[normalized_hash] == index:
+                msg = "Job submitted successfully"
+            elif run["status"] == JobStatus.COMPLETED:
+                msg = "Cached result found. Returning existing run_id."
+            else:
+                msg = "A run already exists for said formula, run_id is returned."
+            responses.append(JobSubmitResponse(
+                msg = msg,
+                formula = normalized_rpn,
+                formula_id = run["formula_id"],
+                run_id = run["run_id"],
+                status = run["status"]
+            ))
+        return JobSubmitBatchResponse(msg=f"Batch of {len(jobs)} jobs submitted.", jobs=responses)
+
+    def _timeout_for(self, mode: str) -> int:
+        return TIMEOUT_S_SUDOKU if mode == SolverMode.CNF_SUDOKU else TIMEOUT_S_SAT
+
+    def _payload(self, normalized_rpn: str, run_id: int, formula_id: int, mode: str) -> dict:
+        # the lane keeps short runs from queueing behind long ones
+        cost = estimate_cost(normalized_rpn)
+        return {
+            "formula" : normalized_rpn,
+            "run_id": run_id,
+            "formula_id": formula_id,
+            "mode": mode,
+            "timeout_s": self._timeout_for(mode),
+            "cost": cost,
+            "lane": lane_for(mode, cost),
+        }
+
+    def _invalidate(self, run_id: int) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(run_id)
+
     def get_run_status(self, run_id: int):
+        status = self.cache.get_status(run_id) if self.cache is not None else None
+        if status is not None:
+            return StatusSchema(
+                msg="Here is the status of your run.",
+                run_id=run_id,
+                status=status
+            )
         run = self.db.get_status_by_run_id(run_id)
         if run:
             logger.info(f"Run with id {run_id} does exists.")
+            if self.cache is not None:
+                self.cache.set_status(run_id, run["status"])
             return StatusSchema(
                 msg="Here is the status of your run.",
                 run_id=run_id,
@@ -127,7 +209,32 @@ class JobService:
                 detail=f"Run ID {run_id} not found. Please check the run_id from your job submission."
             )
 
+    def get_run_statuses(self, run_ids: List[int]) -> BatchStatusResponse:
+        """Statuses of many runs: one MGET on the cache, one query for the misses."""
+        run_ids = list(dict.fromkeys(run_ids))
+        statuses = self.cache.get_statuses(run_ids) if self.cache is not None else {}
+        misses = [run_id for run_id in run_ids if run_id not in statuses]
+        if misses:
+            found = self.db.get_run_statuses(misses)
+            if self.cache is not None:
+                self.cache.set_statuses(found)
+            statuses.update(found)
+        return BatchStatusResponse(
+            msg="Here are the statuses of your runs.",
+            runs=[RunStatus(run_id=run_id, status=statuses[run_id]) for run_id in run_ids if run_id in statuses],
+            missing=[run_id for run_id in run_ids if run_id not in statuses],
+        )
+
     def get_run_result(self, run_id: int):
+        status, cached = self.cache.get_entry(run_id) if self.cache is not None else (None, None)
+        if cached is not None:
+            return SolverResult(msg="Here is the result for your run_id.", **cached)
+        if status is not None and status not in TERMINAL_STATUSES:
+            # polls of a run that is still queued or processing do not touch Postgres
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Run is not complete yet. Current status: {status}. Use 'status {run_id}' to check progress."
+            )
         run = self.db.get_run_by_id(run_id)
         if not run:
             logger.error(f"Run with id {run_id} does not exist. Cannot get_job_result.")
@@ -152,8 +259,7 @@ class JobService:
             )
             
         formula = self.db.get_formula_by_id(run["formula_id"])
-        return SolverResult(
-            msg="Here is the result for your run_id.",
+        entry = dict(
             status=run["status"],
             run_id=run_id,
             formula_id=run["formula_id"],
@@ -161,4 +267,7 @@ class JobService:
             result=result["result"],
             assignment=result["assignment"],
             runtime=result["runtime_s"]
-        )
\ No newline at end of file
+        )
+        if self.cache is not None:
+            self.cache.set_result(run_id, entry)
+        return SolverResult(msg="Here is the result for your run_id.", **entry)
\ No newline at end of file
@@ -1,11 +1,92 @@
 import json
+import threading
 import redis
-from backend.app.core.constants import JobStatus
+from backend.app.core.constants import JobStatus, QueueLane, SolverMode, SMALL_JOB_MAX_COST
 import time 
 import logging
+from typing import Iterable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Claims a job that is already in queue: Processing: reads the payload and bumps the metadata.
+# Invalid run_ids and run_ids without payload are removed from queue: Processing instead.
+_LOAD_JOB_LUA = """
+local function load_job(processing, run_id, now, payload_key, meta_key)
+    if tonumber(run_id) == nil then
+        redis.call('LREM', processing, 1, run_id)
+        return false
+    end
+    local payload = redis.call('GET', payload_key)
+    if not payload then
+        redis.call('LREM', processing, 1, run_id)
+        return false
+    end
+    redis.call('HSET', meta_key, 'last_claimed_at', now)
+    redis.call('HINCRBY', meta_key, 'attempts', 1)
+    return payload
+end
+"""
+
+# KEYS: queue: Processing, the pending list of every lane
+# ARGV: n, now, payload key pattern, meta key pattern, weight of every lane, credit of every lane
+# Picks lanes by smooth weighted round robin over the non-empty lanes: every non-empty lane earns
+# its weight, the lane with the most credit is served and pays the total, empty lanes lose their
+# credit so that an idle lane does not save up a burst.
+# The run_ids are only known once popped, so the script builds the payload and meta keys of the jobs
+# from the patterns and touches keys that are not declared in KEYS. That works on a single Redis,
+# not on Redis Cluster (the job keys hash to other slots than the queues) or with strict key checks.
+# Returns {run_id, payload, run_id, payload, ...}, the new credits and the dropped run_ids.
+CLAIM_SCRIPT = _LOAD_JOB_LUA + """
+local n = tonumber(ARGV[1])
+local lanes = #KEYS - 1
+local weight, credit = {}, {}
+for i = 1, lanes do
+    weight[i] = tonumber(ARGV[4 + i])
+    credit[i] = tonumber(ARGV[4 + lanes + i])
+end
+local jobs, dropped = {}, {}
+while #jobs < 2 * n do
+    local best, total = nil, 0
+    for i = 1, lanes do
+        if redis.call('LLEN', KEYS[i + 1]) > 0 then
+            credit[i] = credit[i] + weight[i]
+            total = total + weight[i]
+            if best == nil or credit[i] > credit[best] then
+                best = i
+            end
+        else
+            credit[i] = 0
+        end
+    end
+    if best == nil then
+        break
+    end
+    credit[best] = credit[best] - total
+    local run_id = redis.call('RPOPLPUSH', KEYS[best + 1], KEYS[1])
+    local payload = load_job(KEYS[1], run_id, ARGV[2], string.format(ARGV[3], run_id), string.format(ARGV[4], run_id))
+    if payload then
+        table.insert(jobs, run_id)
+        table.insert(jobs, payload)
+    else
+        table.insert(dropped, run_id)
+    end
+end
+return {jobs, credit, dropped}
+"""
+
+# KEYS: queue: Processing, payload key, meta key of the run_id, ARGV: run_id, now
+# Finishes the claim of a run_id that BRPOPLPUSH moved to queue: Processing, returns the payload.
+# The run_id is known before the call, so every key the script touches is declared.
+LOAD_SCRIPT = _LOAD_JOB_LUA + """
+return load_job(KEYS[1], ARGV[1], ARGV[2], KEYS[2], KEYS[3])
+"""
+
+def lane_for(mode: str, cost: int) -> str:
+    """Lane of a job: sudoku runs have their own lane, SAT runs are split by estimated cost."""
+    if mode == SolverMode.CNF_SUDOKU:
+        return QueueLane.SUDOKU
+    return QueueLane.SMALL if cost <= SMALL_JOB_MAX_COST else QueueLane.LARGE
+
 class QueueService:
     """Handle Redis queue operations.
         Queue has three parts: queue:Pending -> queue: Processing -> (On multiple failures, moved to dead queue) queue: Dead
@@ -14,6 +95,16 @@ class QueueService:
         BRPOPLPUSH, PO
         queue: Dead -> jobs which have already been tried for a maximum amount of times and still have no been completed, dealt with later."""
     
+    """queue: Pending is split into lanes by mode and estimated cost (payload "lane", set by JobService),
+        so that long sudoku runs do not block short SAT runs queued behind them.
+        claim() serves the non-empty lanes by smooth weighted round robin over LANE_WEIGHTS, so every
+        lane with jobs gets its share. The small lane keeps the q:pending key of the single queue."""
+    
+    """A claim is one Lua script (CLAIM_SCRIPT) instead of BRPOPLPUSH, GET and a pipeline, so a job is
+        never in queue: Processing without updated metadata and a claim costs one round trip.
+        CLAIM_SCRIPT reads and writes the job keys of the run_ids it pops without declaring them in KEYS,
+        so the queue needs a single Redis (or one shard), it does not work on Redis Cluster."""
+    
     """Job has three parts
         job:{run_id}:payload, the actual job which needs to be executed by the solver.
         job:{run_id}:status, current status of the job
@@ -26,19 +117,49 @@ class QueueService:
     PROCESSING_QUEUE = "q:processing" 
     DEAD_QUEUE ="q:dead"
     
+    LANE_QUEUES = {
+        QueueLane.SMALL: PENDING_QUEUE,
+        QueueLane.LARGE: "q:pending:large",
+        QueueLane.SUDOKU: "q:pending:sudoku",
+    }
+    LANE_WEIGHTS = {
+        QueueLane.SMALL: 4,
+        QueueLane.LARGE: 2,
+        QueueLane.SUDOKU: 1,
+    }
+    CLAIM_POLL_MAX_S = 0.2  # an idle claim over several lanes looks at the lanes it does not block on this often
+    
     JOB_PAYLOAD_KEY = "job:{run_id}:payload"
     JOB_META_KEY = "job:{run_id}:meta"
     JOB_STATUS_KEY = "job:{run_id}:status"    
     
-    def __init__(self, redis_client :redis.Redis, * , max_attempts = 3, job_ttl = 3600):
+    def __init__(self, redis_client :redis.Redis, * , max_attempts = 3, job_ttl = 3600, lane_weights: Optional[dict] = None):
         self.redis = redis_client
         self.max_attempts = max_attempts
         self.job_ttl = job_ttl
+        self.lane_weights = dict(lane_weights or self.LANE_WEIGHTS)
+        self._lane_credit = {lane: 0 for lane in self.lane_weights}
+        self._lane_lock = threading.Lock()
+        self._claim_script = self.redis.register_script(CLAIM_SCRIPT)
+        self._load_script = self.redis.register_script(LOAD_SCRIPT)
+    
+    def pending_queue(self, lane: Optional[str]) -> str:
+        """Key of the pending list of a lane, jobs without a known lane go to the small lane."""
+        return self.LANE_QUEUES.get(lane, self.PENDING_QUEUE)
     
     def enqueue(self, run_id:int, payload: dict) -> None:
         """Enqueue a new job """
+        self.enqueue_many([(run_id, payload)])
+
+    def enqueue_many(self, jobs: List[Tuple[int, dict]]) -> None:
+        """Enqueue (run_id, payload) jobs in one pipeline (one round trip) and one transaction."""
         now = int(time.time())
         pipe = self.redis.pipeline(transaction=True)
+        for run_id, payload in jobs:
+            self._add_job(pipe, run_id, payload, now)
+        pipe.execute()
+
+    def _add_job(self, pipe, run_id: int, payload: dict, now: int) -> None:
         pipe.set(
             self.JOB_PAYLOAD_KEY.format(run_id = run_id),
             json.dumps(payload),
@@ -50,6 +171,7 @@ class QueueService:
                 "attempts": 0,
                 "created_at":now,
                 "last_claimed_at": 0,
+                "lane": payload.get("lane", QueueLane.SMALL),
             }
         )
         pipe.set(
@@ -57,86 +179,110 @@ class QueueService:
             JobStatus.QUEUED,
             ex=self.job_ttl,
         )
-        pipe.rpush(self.PENDING_QUEUE, run_id)
-        pipe.execute()
+        pipe.rpush(self.pending_queue(payload.get("lane")), run_id)
     
-    def claim(self, timeout_s: int = 1):
+    def claim(self, timeout_s: int = 1, lanes: Optional[Iterable[str]] = None):
         """
-        Automatically move a job from pending -> processing using BRPOPLPUSH, 
-        you get run id as it is stored as <q:pending><run_id>
-        then you want the payload and metadata for said run.
+        Claim one job, see claim_many. Returns (run_id, payload) or None if no job arrived within timeout_s.
         """
+        jobs = self.claim_many(1, timeout_s=timeout_s, lanes=lanes)
+        return jobs[0] if jobs else None
+    
+    def claim_many(self, n: int, timeout_s: int = 1, lanes: Optional[Iterable[str]] = None) -> List[Tuple[int, dict]]:
+        """
+        Claim up to n jobs for a worker with n free slots.
+        One call of CLAIM_SCRIPT moves every run_id from pending -> processing, reads its payload and
+        bumps attempts/last_claimed_at, atomically and in a single round trip.
+        Lua cannot block, so when the lanes are empty the claim waits in BRPOPLPUSH on the lane with
+        the highest weight (the small lane unless lanes excludes it) and LOAD_SCRIPT claims the job it
+        returns: an idle worker picks up a new small job right away. With several lanes the wait is
+        cut after CLAIM_POLL_MAX_S to look at the other lanes again, so a job arriving in another
+        lane of an idle worker is picked up up to CLAIM_POLL_MAX_S late.
+        lanes limits the claim to some lanes, by default all lanes are served.
+        Returns a list of (run_id, payload), empty if no job arrived within timeout_s.
+        """
+        lanes = list(lanes or self.lane_weights)
+        wait_lane = max(lanes, key=lambda lane: self.lane_weights.get(lane, 1))
+        deadline = time.monotonic() + timeout_s
         try:
-            run_id_str = self.redis.brpoplpush(
-                self.PENDING_QUEUE,
-                self.PROCESSING_QUEUE,
-                timeout=timeout_s,  
-            )
-        except redis.RedisError:
-            logger.exception("Redis error during BRPOPLPUSH")
-            raise
-        
-        if run_id_str is None: #if there is nothing in the queue return None which allows to go continue.
-            return None 
-        try:
-            run_id = int(run_id_str)
-        except (TypeError, ValueError):
-            logger.error("Claimed non-integer run_id from redis: %r", run_id_str)
-            try:
-                self.redis.lrem(self.PROCESSING_QUEUE, 1, run_id_str)
-            except redis.RedisError:
-                logger.exception("Redis error while cleaning PROCESSING_QUEUE for bad run_id")
-            return None
-        
-        try:
-            payload_json = self.redis.get(self.JOB_PAYLOAD_KEY.format(run_id = run_id))
+            while True:
+                jobs = self._claim_ready(n, lanes)
+                if jobs:
+                    return jobs
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                if len(lanes) > 1:
+                    remaining = min(remaining, self.CLAIM_POLL_MAX_S)
+                run_id_str = self.redis.brpoplpush(
+                    self.pending_queue(wait_lane),
+                    self.PROCESSING_QUEUE,
+                    # Redis blocks forever on a timeout that rounds to 0 ms
+                    timeout=max(remaining, 0.01),
+                )
+                if run_id_str is None:
+                    if len(lanes) == 1:
+                        return []
+                    continue
+                payload_json = self._load_script(
+                    keys=[
+                        self.PROCESSING_QUEUE,
+                        self.JOB_PAYLOAD_KEY.format(run_id=run_id_str),
+                        self.JOB_META_KEY.format(run_id=run_id_str),
+                    ],
+                    args=[run_id_str, int(time.time())],
+                )
+                jobs = self._decode_jobs([(run_id_str, payload_json)])
+                if jobs:
+                    return jobs
         except redis.RedisError:
-            logger.exception("Redis error during GET payload for run_id = %s", run_id)
-            try:
-                self.redis.lrem(self.PROCESSING_QUEUE, 1, run_id_str)
-            except redis.RedisError:
-                logger.exception("Redis error while cleaning PROCESSING_QUEUE after GET failure")
+            logger.exception("Redis error during claim")
             raise
-        if payload_json is None:
-            logger.error(f"Payload does not exist, check payload for run_id: {run_id}.")
-            self.redis.lrem(self.PROCESSING_QUEUE, 1, run_id_str)
-            return None
-        
-        
-        try:
-            payload = json.loads(payload_json)
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing job JSON, JSON error: {e}")
+    
+    def _job_key_patterns(self) -> Tuple[str, str]:
+        """Payload and meta key as string.format patterns for CLAIM_SCRIPT, which builds the keys of the
+        run_ids it pops itself and so touches keys that are not declared (single Redis only, see CLAIM_SCRIPT)."""
+        return self.JOB_PAYLOAD_KEY.format(run_id="%s"), self.JOB_META_KEY.format(run_id="%s")
+    
+    def _claim_ready(self, n: int, lanes: list) -> List[Tuple[int, dict]]:
+        """Claim up to n jobs that are already queued, without blocking."""
+        with self._lane_lock:
+            credits = [self._lane_credit.get(lane, 0) for lane in lanes]
+        jobs, credits, dropped = self._claim_script(
+            keys=[self.PROCESSING_QUEUE, *(self.pending_queue(lane) for lane in lanes)],
+            args=[
+                n,
+                int(time.time()),
+                *self._job_key_patterns(),
+                *(self.lane_weights.get(lane, 1) for lane in lanes),
+                *credits,
+            ],
+        )
+        with self._lane_lock:
+            self._lane_credit.update(zip(lanes, credits))
+        for run_id_str in dropped:
+            logger.error(f"Payload does not exist or run_id is not an integer, dropped run_id: {run_id_str!r}.")
+        return self._decode_jobs(zip(jobs[::2], jobs[1::2]))
+    
+    def _decode_jobs(self, claimed) -> List[Tuple[int, dict]]:
+        """Parse the payloads returned by the scripts, jobs with invalid JSON are removed from processing."""
+        jobs = []
+        for run_id_str, payload_json in claimed:
+            if payload_json is None:
+                logger.error(f"Payload does not exist, check payload for run_id: {run_id_str}.")
+                continue
             try:
-                self.redis.lrem(self.PROCESSING_QUEUE, 1, run_id_str)
-            except redis.RedisError:
-                logger.exception("Redis error while cleaning PROCESSING_QUEUE for invalid payload")
-            return None
-        
-        now = int(time.time())
-
-        try:
-            pipe = self.redis.pipeline(transaction=True)
-            pipe.hset(
-                self.JOB_META_KEY.format(run_id=run_id),
-                mapping={
-                    "last_claimed_at": now,
-                },
-            )
-            pipe.hincrby(
-                self.JOB_META_KEY.format(run_id=run_id),
-                "attempts",
-                1,
-            )
-            pipe.execute()
-        except redis.RedisError:
-            # Metadata failure should not break job processing
-            logger.exception(
-                "Failed to update metadata for run_id=%s (non-fatal)",
-                run_id,
-            ) 
-
-        return run_id, payload
+                payload = json.loads(payload_json)
+            except json.JSONDecodeError as e:
+                logger.error(f"Error parsing job JSON, JSON error: {e}")
+                try:
+                    self.redis.lrem(self.PROCESSING_QUEUE, 1, run_id_str)
+                except redis.RedisError:
+                    logger.exception("Redis error while cleaning PROCESSING_QUEUE for invalid payload")
+                continue
+            jobs.append((int(run_id_str), payload))
+        return jobs
+    
     def ack(self, run_id: int) -> None:
         """
         Acknowledge successful job completion. Removes job from q, cleans up and DB status update handled by worker.
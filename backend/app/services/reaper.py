@@ -0,0 +1,196 @@
+import json
+import logging
+import threading
+import time
+from typing import Optional
+
+import redis
+
+from backend.app.core.constants import JobStatus, SolverMode, TIMEOUT_S_SAT, TIMEOUT_S_SUDOKU
+from backend.app.services.database_service import DatabaseService
+from backend.app.services.queue_service import QueueService
+from backend.app.services.run_cache import RunCache
+from backend.app.services.run_events import RunEvents
+
+logger = logging.getLogger(__name__)
+
+
+def fail_abandoned_run(
+    db: DatabaseService,
+    run_id: int,
+    reason: str,
+    *,
+    cache: Optional[RunCache] = None,
+    events: Optional[RunEvents] = None,
+) -> None:
+    """Give clients a result to read instead of polling a run that will never finish.
+    Used by the reaper of the list backend and as the dead-letter hook of the streams backend."""
+    # result and status in one transaction, a crash cannot leave a result under a PROCESSING run
+    db.complete_run(
+        run_id=run_id,
+        status=JobStatus.FAILED,
+        result="ERROR",
+        assignment=None,
+        stdout="",
+        stderr="",
+        error_type="ABANDONED",
+        error_message=reason,
+        runtime_s=0,
+    )
+    if cache is not None:
+        cache.invalidate(run_id)
+    if events is not None:
+        events.publish(run_id, JobStatus.FAILED)
+
+
+class QueueReaper:
+    """Visibility timeout for the list backend of QueueService.
+        A job stays in queue: Processing from claim until ack/fail, so the jobs of a worker that
+        crashed stay there forever. The reaper scans queue: Processing and treats a job as abandoned
+        once last_claimed_at is older than the timeout_s of the job plus grace_s.
+        Abandoned jobs are requeued to queue: Pending, or moved to queue: Dead once they have been
+        claimed max_attempts times, and the runs row is updated to match.
+        Several reapers may run at once (one per worker), LREM decides which one handles a job."""
+
+    def __init__(
+        self,
+        queue: QueueService,
+        db: DatabaseService,
+        *,
+        grace_s: int = 60,
+        interval_s: int = 30,
+        cache: Optional[RunCache] = None,
+        events: Optional[RunEvents] = None,
+    ):
+        self.queue = queue
+        self.redis = queue.redis
+        self.db = db
+        self.grace_s = grace_s
+        self.interval_s = interval_s
+        self.cache = cache
+        self.events = events
+        self._stop = threading.Event()
+
+    def run_forever(self) -> None:
+        """Reap every interval_s until stop() is called."""
+        logger.info("Queue reaper starting, interval %ss, grace %ss", self.interval_s, self.grace_s)
+        while not self._stop.is_set():
+            try:
+                self.reap_once()
+            except redis.RedisError:
+                logger.exception("Redis error during reap")
+            self._stop.wait(self.interval_s)
+        logger.info("Queue reaper stopped")
+
+    def start(self) -> threading.Thread:
+        """Run the reaper on a daemon thread, e.g. next to the slots of a worker."""
+        thread = threading.Thread(target=self.run_forever, name="queue-reaper", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def reap_once(self, now: Optional[int] = None) -> int:
+        """Scan queue: Processing once, returns the number of requeued or dead-lettered jobs."""
+        now = int(time.time()) if now is None else now
+        reaped = 0
+        for run_id_str in self.redis.lrange(self.queue.PROCESSING_QUEUE, 0, -1):
+            try:
+                if self._reap(run_id_str, now):
+                    reaped += 1
+            except redis.RedisError:
+                raise
+            except Exception:
+                # a DB error for one run must not stop the scan
+                logger.exception("Failed to reap run_id=%s", run_id_str)
+        return reaped
+
+    def _job_timeout_s(self, run_id_str: str) -> int:
+        payload_json = self.redis.get(self.queue.JOB_PAYLOAD_KEY.format(run_id=run_id_str))
+        if payload_json is not None:
+            try:
+                payload = json.loads(payload_json)
+                if payload.get("timeout_s"):
+                    return int(payload["timeout_s"])
+                return TIMEOUT_S_SUDOKU if payload.get("mode") == SolverMode.CNF_SUDOKU else TIMEOUT_S_SAT
+            except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+                pass
+        # unknown job, wait as long as for the longest one
+        return TIMEOUT_S_SUDOKU
+
+    def _reap(self, run_id_str: str, now: int) -> bool:
+        meta = self.redis.hgetall(self.queue.JOB_META_KEY.format(run_id=run_id_str))
+        last_claimed_at = int(meta.get("last_claimed_at", 0) or 0)
+        if last_claimed_at == 0:
+            # claim moves the job before it writes the metadata, check on the next scan
+            if meta:
+                pipe = self.redis.pipeline(transaction=True)
+                pipe.hset(self.queue.JOB_META_KEY.format(run_id=run_id_str), "last_claimed_at", now)
+                # an ack in between would leave this hash behind otherwise
+                pipe.expire(self.queue.JOB_META_KEY.format(run_id=run_id_str), self.queue.job_ttl)
+                pipe.execute()
+                return False
+            # the job keys are gone (expired), nothing can be retried
+            return self._drop(run_id_str)
+
+        if now - last_claimed_at <= self._job_timeout_s(run_id_str) + self.grace_s:
+            return False
+
+        # whoever removes the job from queue: Processing owns it, a late ack of the worker removes nothing
+        if self.redis.lrem(self.queue.PROCESSING_QUEUE, 1, run_id_str) == 0:
+            return False
+
+        attempts = int(meta.get("attempts", 0) or 0)
+        if attempts >= self.queue.max_attempts:
+            self._dead_letter(run_id_str, attempts, now)
+        else:
+            self._requeue(run_id_str, attempts, meta.get("lane"))
+        return True
+
+    def _requeue(self, run_id_str: str, attempts: int, lane: Optional[str]) -> None:
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(self.queue.JOB_STATUS_KEY.format(run_id=run_id_str), JobStatus.QUEUED, ex=self.queue.job_ttl)
+        pipe.rpush(self.queue.pending_queue(lane), run_id_str)
+        pipe.execute()
+        # QUEUED keeps the run visible to get_active_run, so resubmissions still attach to it
+        self.db.update_run_status(int(run_id_str), JobStatus.QUEUED)
+        self._status_changed(int(run_id_str), JobStatus.QUEUED)
+        logger.warning("Requeued abandoned run_id=%s after %s attempts", run_id_str, attempts)
+
+    def _dead_letter(self, run_id_str: str, attempts: int, now: int) -> None:
+        reason = f"Abandoned after {attempts} attempts"
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.rpush(self.queue.DEAD_QUEUE, run_id_str)
+        pipe.hset(
+            self.queue.JOB_META_KEY.format(run_id=run_id_str),
+            mapping={
+                "failed_at": now,
+                "last_error": reason,
+            },
+        )
+        pipe.set(self.queue.JOB_STATUS_KEY.format(run_id=run_id_str), JobStatus.FAILED, ex=self.queue.job_ttl)
+        pipe.execute()
+        self._fail_run(int(run_id_str), reason)
+        logger.warning("Moved run_id=%s to %s after %s attempts", run_id_str, self.queue.DEAD_QUEUE, attempts)
+
+    def _drop(self, run_id_str: str) -> bool:
+        if self.redis.lrem(self.queue.PROCESSING_QUEUE, 1, run_id_str) == 0:
+            return False
+        try:
+            run_id = int(run_id_str)
+        except (TypeError, ValueError):
+            logger.error("Dropped non-integer run_id from %s: %r", self.queue.PROCESSING_QUEUE, run_id_str)
+            return True
+        self._fail_run(run_id, "Job data expired while processing")
+        logger.warning("Dropped run_id=%s without job data", run_id)
+        return True
+
+    def _fail_run(self, run_id: int, reason: str) -> None:
+        fail_abandoned_run(self.db, run_id, reason, cache=self.cache, events=self.events)
+
+    def _status_changed(self, run_id: int, status: str) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(run_id)
+        if self.events is not None:
+            self.events.publish(run_id, status)
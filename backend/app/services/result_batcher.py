@@ -0,0 +1,113 @@
+import logging
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from backend.app.services.database_service import DatabaseService
+
+logger = logging.getLogger(__name__)
+
+
+class ResultBatcher:
+    """Write-behind for completed runs.
+        Worker slots hand their results to submit() and are free for the next job right away.
+        A background thread collects results for up to interval_s and stores them with
+        DatabaseService.complete_runs, one transaction and one commit for the whole batch.
+        on_commit of a run (the queue ack) only runs after its batch is committed, a crash before
+        the commit leaves the job in queue: Processing for the reaper instead of losing its result.
+        If a batch fails, its runs are retried one by one so that one bad row does not fail the others."""
+
+    def __init__(
+        self,
+        db: DatabaseService,
+        *,
+        interval_s: float = 0.05,
+        max_batch: int = 200,
+    ):
+        self.db = db
+        self.interval_s = interval_s
+        self.max_batch = max_batch
+        # (run, on_commit, on_error) in submit order
+        self._pending: List[Tuple[dict, Optional[Callable], Optional[Callable]]] = []
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="result-batcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Flush the results that are still pending and stop the thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(
+        self,
+        run_id: int,
+        status: str,
+        *,
+        on_commit: Optional[Callable[[], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        **result,
+    ) -> None:
+        """Queue the result of a run, result holds the remaining arguments of complete_run."""
+        run = dict(result, run_id=run_id, status=status)
+        with self._cond:
+            self._pending.append((run, on_commit, on_error))
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                # sleep until the first result, then collect more for one interval,
+                # a full batch or stop() cuts it short
+                self._cond.wait_for(lambda: self._stopping or self._pending)
+                self._cond.wait_for(lambda: self._stopping or len(self._pending) >= self.max_batch, self.interval_s)
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                done = self._stopping and not self._pending
+            if batch:
+                self._flush(batch)
+            if done:
+                return
+
+    def _flush(self, batch: list) -> None:
+        try:
+            self.db.complete_runs([run for run, _, _ in batch])
+        except Exception:
+            logger.exception("Batch of %s results failed, storing them one by one", len(batch))
+            for item in batch:
+                self._flush_one(*item)
+            return
+        logger.debug("Stored %s results in one batch", len(batch))
+        for run, on_commit, _ in batch:
+            self._notify(run, on_commit)
+
+    def _flush_one(self, run: dict, on_commit, on_error) -> None:
+        try:
+            self.db.complete_run(**run)
+        except Exception as e:
+            logger.exception("Failed to store the result of run_id=%s", run["run_id"])
+            if on_error is not None:
+                try:
+                    on_error(e)
+                except Exception:
+                    logger.exception("on_error failed for run_id=%s", run["run_id"])
+            return
+        self._notify(run, on_commit)
+
+    def _notify(self, run: dict, on_commit) -> None:
+        if on_commit is None:
+            return
+        try:
+            on_commit()
+        except Exception:
+            logger.exception("on_commit failed for run_id=%s", run["run_id"])
@@ -0,0 +1,121 @@
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import redis
+
+from backend.app.core.constants import TERMINAL_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+class RunCache:
+    """Read-through cache in Redis for the status and result polls of the frontend.
+        cache:run:{run_id}:status -> status of a run
+        cache:run:{run_id}:result -> JSON of the SolverResult fields of a finished run
+        Finished runs never change, their entries live for result_ttl_s. Statuses of unfinished runs
+        are overwritten or deleted by whoever changes the status (JobService, worker, reaper) and
+        only live for STATUS_TTL_S, which bounds how long a read racing with a change stays stale.
+        Result TTLs shrink with the size of the entry, so large assignments leave memory first,
+        and entries above max_entry_bytes are not cached at all.
+        The cache is best effort, Redis errors are logged and count as a miss."""
+
+    STATUS_KEY = "cache:run:{run_id}:status"
+    RESULT_KEY = "cache:run:{run_id}:result"
+    STATUS_TTL_S = 2
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        *,
+        result_ttl_s: int = 3600,
+        min_ttl_s: int = 30,
+        size_reference: int = 64 * 1024,
+        max_entry_bytes: int = 1024 * 1024,
+    ):
+        self.redis = redis_client
+        self.result_ttl_s = result_ttl_s
+        self.min_ttl_s = min_ttl_s
+        self.size_reference = size_reference
+        self.max_entry_bytes = max_entry_bytes
+
+    def status_ttl(self, status: str) -> int:
+        return self.result_ttl_s if status in TERMINAL_STATUSES else self.STATUS_TTL_S
+
+    def result_ttl(self, size: int) -> Optional[int]:
+        """TTL of a result entry of size bytes, None if it is too large to cache.
+        Up to size_reference the full TTL, above it the TTL shrinks in proportion to the size."""
+        if size > self.max_entry_bytes:
+            return None
+        if size <= self.size_reference:
+            return self.result_ttl_s
+        return max(self.min_ttl_s, self.result_ttl_s * self.size_reference // size)
+
+    def get_status(self, run_id: int) -> Optional[str]:
+        try:
+            return self.redis.get(self.STATUS_KEY.format(run_id=run_id))
+        except redis.RedisError:
+            logger.warning("Run cache read failed for run_id=%s", run_id, exc_info=True)
+            return None
+
+    def set_status(self, run_id: int, status: str) -> None:
+        try:
+            self.redis.set(self.STATUS_KEY.format(run_id=run_id), status, ex=self.status_ttl(status))
+        except redis.RedisError:
+            logger.warning("Run cache write failed for run_id=%s", run_id, exc_info=True)
+
+    def get_statuses(self, run_ids: List[int]) -> Dict[int, str]:
+        """Cached statuses of many runs with one MGET, misses are left out."""
+        if not run_ids:
+            return {}
+        try:
+            statuses = self.redis.mget([self.STATUS_KEY.format(run_id=run_id) for run_id in run_ids])
+        except redis.RedisError:
+            logger.warning("Run cache read failed for %s runs", len(run_ids), exc_info=True)
+            return {}
+        return {run_id: status for run_id, status in zip(run_ids, statuses) if status is not None}
+
+    def set_statuses(self, statuses: Dict[int, str]) -> None:
+        """Cache many statuses in one pipeline."""
+        if not statuses:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for run_id, status in statuses.items():
+                pipe.set(self.STATUS_KEY.format(run_id=run_id), status, ex=self.status_ttl(status))
+            pipe.execute()
+        except redis.RedisError:
+            logger.warning("Run cache write failed for %s runs", len(statuses), exc_info=True)
+
+    def get_entry(self, run_id: int) -> Tuple[Optional[str], Optional[dict]]:
+        """Status and result of a run with one MGET, (None, None) on a miss."""
+        try:
+            status, cached = self.redis.mget(
+                self.STATUS_KEY.format(run_id=run_id),
+                self.RESULT_KEY.format(run_id=run_id),
+            )
+        except redis.RedisError:
+            logger.warning("Run cache read failed for run_id=%s", run_id, exc_info=True)
+            return None, None
+        return status, json.loads(cached) if cached is not None else None
+
+    def set_result(self, run_id: int, result: dict) -> None:
+        """Cache the result of a finished run together with its status."""
+        data = json.dumps(result)
+        ttl = self.result_ttl(len(data))
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            if ttl is None:
+                pipe.delete(self.RESULT_KEY.format(run_id=run_id))
+            else:
+                pipe.set(self.RESULT_KEY.format(run_id=run_id), data, ex=ttl)
+            pipe.set(self.STATUS_KEY.format(run_id=run_id), result["status"], ex=self.status_ttl(result["status"]))
+            pipe.execute()
+        except redis.RedisError:
+            logger.warning("Run cache write failed for run_id=%s", run_id, exc_info=True)
+
+    def invalidate(self, run_id: int) -> None:
+        try:
+            self.redis.delete(self.STATUS_KEY.format(run_id=run_id), self.RESULT_KEY.format(run_id=run_id))
+        except redis.RedisError:
+            logger.warning("Run cache invalidation failed for run_id=%s", run_id, exc_info=True)
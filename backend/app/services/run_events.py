@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Callable, Dict, Optional, Set
+
+import redis
+import redis.asyncio
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "run:{run_id}:events"
+CHANNEL_PATTERN = "run:*:events"
+
+
+class RunEvents:
+    """Publishes status transitions of runs on Redis pub/sub (channel run:{run_id}:events).
+        The worker publishes PROCESSING and the final status after the commit, the reaper
+        publishes requeues and abandoned runs. Publishing is best effort: clients that miss an
+        event still read the status from the cache/DB when they subscribe or time out."""
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis = redis_client
+
+    def publish(self, run_id: int, status: str) -> None:
+        try:
+            self.redis.publish(CHANNEL.format(run_id=run_id), status)
+        except redis.RedisError:
+            logger.warning("Failed to publish status %s of run_id=%s", status, run_id, exc_info=True)
+
+
+class RunEventHub:
+    """Fans the events of all runs out to the waiting requests of one API process.
+        A single PSUBSCRIBE connection replaces one Redis connection (and one API thread) per
+        waiting client. subscribe() only returns once the pattern subscription is active, so a
+        caller that subscribes before it reads the current status cannot miss a transition.
+        If the connection breaks, every queue receives None (the caller has to read the status
+        itself) and the reader is started again by the next subscribe()."""
+
+    def __init__(self, redis_factory: Callable[[], redis.asyncio.Redis]):
+        self.redis_factory = redis_factory
+        self._queues: Dict[int, Set[asyncio.Queue]] = {}
+        self._reader: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+
+    async def subscribe(self, run_id: int) -> asyncio.Queue:
+        """Queue that receives every status published for the run, release it with unsubscribe()."""
+        queue = asyncio.Queue()
+        self._queues.setdefault(run_id, set()).add(queue)
+        if self._reader is None or self._reader.done():
+            self._ready = asyncio.Event()
+            self._reader = asyncio.create_task(self._read(self._ready))
+        ready = self._ready
+        reader = self._reader
+        # wait for the subscription, or for the reader to fail
+        waiter = asyncio.create_task(ready.wait())
+        await asyncio.wait({waiter, reader}, return_when=asyncio.FIRST_COMPLETED)
+        waiter.cancel()
+        if not ready.is_set():
+            self.unsubscribe(run_id, queue)
+            reader.result()  # raises the connection error
+        return queue
+
+    def unsubscribe(self, run_id: int, queue: asyncio.Queue) -> None:
+        queues = self._queues.get(run_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._queues[run_id]
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, redis.RedisError):
+                pass
+            self._reader = None
+
+    async def _read(self, ready: asyncio.Event) -> None:
+        client = self.redis_factory()
+        pubsub = client.pubsub()
+        try:
+            await pubsub.psubscribe(CHANNEL_PATTERN)
+            # the confirmation of PSUBSCRIBE is the first message
+            while await pubsub.get_message(timeout=1.0) is None:
+                pass
+            ready.set()
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                self._dispatch(message["channel"], message["data"])
+        except redis.RedisError:
+            logger.exception("Run event subscription failed")
+            raise
+        finally:
+            for queues in self._queues.values():
+                for queue in queues:
+                    queue.put_nowait(None)
+            await pubsub.aclose()
+            await client.aclose()
+
+    def _dispatch(self, channel: str, status: str) -> None:
+        try:
+            run_id = int(channel.split(":")[1])
+        except (IndexError, ValueError):
+            return
+        for queue in self._queues.get(run_id, ()):
+            queue.put_nowait(status)
@@ -0,0 +1,282 @@
+import json
+import os
+import socket
+import time
+import logging
+from typing import Callable, Optional, Tuple
+
+import redis
+
+from backend.app.core.constants import JobStatus, TIMEOUT_S_SUDOKU
+from backend.app.services.queue_service import QueueService
+
+logger = logging.getLogger(__name__)
+
+
+class StreamQueueService(QueueService):
+    """Queue backend on a Redis Stream with a consumer group, same interface as QueueService.
+        stream: q:stream -> one entry {run_id} per job, read by the consumer group of the workers.
+        Claimed entries stay in the pending entries list (PEL) of the group until XACK.
+        Entries of a worker that died are idle in the PEL, claim() takes them over with XAUTOCLAIM
+        once they have been idle for reclaim_idle_s, which must exceed the longest job.
+        A job that was claimed max_attempts times is moved to queue: Dead instead of being retried,
+        and on_dead_letter(run_id, reason) marks its run as failed (see reaper.fail_abandoned_run),
+        which the reaper does for the list backend."""
+
+    """Job keys are the same as for QueueService, meta additionally stores the stream entry id (stream_id)."""
+
+    STREAM = "q:stream"
+    GROUP = "workers"
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        *,
+        consumer: Optional[str] = None,
+        max_attempts=3,
+        job_ttl=3600,
+        reclaim_idle_s: int = TIMEOUT_S_SUDOKU + 60,
+        on_dead_letter: Optional[Callable[[int, str], None]] = None,
+    ):
+        super().__init__(redis_client, max_attempts=max_attempts, job_ttl=job_ttl)
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.reclaim_idle_ms = reclaim_idle_s * 1000
+        self._group_ready = False
+        self.on_dead_letter = on_dead_letter
+
+    def _ensure_group(self) -> None:
+        """Create the consumer group on first claim, producers only need XADD."""
+        if self._group_ready:
+            return
+        try:
+            # id 0 lets the group see entries added before it existed
+            self.redis.xgroup_create(self.STREAM, self.GROUP, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            # the group exists already
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def _add_job(self, pipe, run_id: int, payload: dict, now: int) -> None:
+        """Job keys like QueueService, the run_id goes to the stream instead of a pending lane."""
+        pipe.set(
+            self.JOB_PAYLOAD_KEY.format(run_id=run_id),
+            json.dumps(payload),
+            ex=self.job_ttl,
+        )
+        pipe.hset(
+            self.JOB_META_KEY.format(run_id=run_id),
+            mapping={
+                "attempts": 0,
+                "created_at": now,
+                "last_claimed_at": 0,
+            }
+        )
+        pipe.set(
+            self.JOB_STATUS_KEY.format(run_id=run_id),
+            JobStatus.QUEUED,
+            ex=self.job_ttl,
+        )
+        pipe.xadd(self.STREAM, {"run_id": run_id})
+
+    def claim(self, timeout_s: int = 1, lanes=None):
+        """
+        Take over a stuck entry of a dead worker if there is one, otherwise read a new entry
+        (blocking up to timeout_s). Returns (run_id, payload) or None like QueueService.claim.
+        The stream has a single lane, lanes is accepted for the interface and ignored, so start_worker
+        turns WORKER_SMALL_LANE_SLOTS off for this backend.
+        """
+        try:
+            self._ensure_group()
+            entry = self._reclaim()
+            if entry is None:
+                entry = self._read_new(timeout_s)
+        except redis.RedisError:
+            logger.exception("Redis error during stream claim")
+            raise
+
+        if entry is None:
+            return None
+        entry_id, fields = entry
+        return self._load(entry_id, fields)
+
+    def claim_many(self, n: int, timeout_s: int = 1, lanes=None):
+        """Claim up to n entries, only the first claim blocks. Returns a list of (run_id, payload)."""
+        jobs = []
+        job = self.claim(timeout_s=timeout_s)
+        while job is not None:
+            jobs.append(job)
+            if len(jobs) == n:
+                break
+            job = self.claim(timeout_s=0)
+        return jobs
+
+    def _reclaim(self) -> Optional[Tuple[str, dict]]:
+        """XAUTOCLAIM entries idle for longer than reclaim_idle_s, dead-lettering exhausted ones."""
+        while True:
+            result = self.redis.xautoclaim(
+                self.STREAM,
+                self.GROUP,
+                self.consumer,
+                min_idle_time=self.reclaim_idle_ms,
+                start_id="0-0",
+                count=1,
+            )
+            entries = result[1] if result else []
+            if not entries:
+                return None
+
+            entry_id, fields = entries[0]
+            if not fields:
+                # the entry was deleted from the stream but is still pending
+                self.redis.xack(self.STREAM, self.GROUP, entry_id)
+                continue
+
+            run_id = fields.get("run_id")
+            attempts = self.redis.hget(self.JOB_META_KEY.format(run_id=run_id), "attempts")
+            if attempts is not None and int(attempts) >= self.max_attempts:
+                self._dead_letter(entry_id, run_id, int(attempts))
+                continue
+
+            logger.warning("Reclaimed stuck run_id=%s (entry %s)", run_id, entry_id)
+            return entry_id, fields
+
+    def _read_new(self, timeout_s: int) -> Optional[Tuple[str, dict]]:
+        response = self.redis.xreadgroup(
+            self.GROUP,
+            self.consumer,
+            {self.STREAM: ">"},
+            count=1,
+            block=max(1, int(timeout_s * 1000)),
+        )
+        if not response:
+            return None
+        _, entries = response[0]
+        return entries[0] if entries else None
+
+    def _drop(self, entry_id: str) -> None:
+        """Remove an entry that cannot be processed from the stream."""
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.xack(self.STREAM, self.GROUP, entry_id)
+            pipe.xdel(self.STREAM, entry_id)
+            pipe.execute()
+        except redis.RedisError:
+            logger.exception("Redis error while dropping stream entry %s", entry_id)
+
+    def _dead_letter(self, entry_id: str, run_id: str, attempts: int) -> None:
+        now = int(time.time())
+        reason = f"Abandoned after {attempts} attempts"
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.xack(self.STREAM, self.GROUP, entry_id)
+        pipe.xdel(self.STREAM, entry_id)
+        pipe.rpush(self.DEAD_QUEUE, run_id)
+        pipe.hset(
+            self.JOB_META_KEY.format(run_id=run_id),
+            mapping={
+                "failed_at": now,
+                "last_error": reason,
+            },
+        )
+        pipe.set(self.JOB_STATUS_KEY.format(run_id=run_id), JobStatus.FAILED, ex=self.job_ttl)
+        pipe.execute()
+        logger.warning("Moved run_id=%s to %s after %s attempts", run_id, self.DEAD_QUEUE, attempts)
+        if self.on_dead_letter is not None:
+            try:
+                self.on_dead_letter(int(run_id), reason)
+            except Exception:
+                # the entry is gone from the stream already, a DB error must not fail the claim
+                logger.exception("Dead-letter hook failed for run_id=%s", run_id)
+
+    def _load(self, entry_id: str, fields: dict):
+        try:
+            run_id = int(fields.get("run_id"))
+        except (TypeError, ValueError):
+            logger.error("Claimed stream entry %s without integer run_id: %r", entry_id, fields)
+            self._drop(entry_id)
+            return None
+
+        payload_json = self.redis.get(self.JOB_PAYLOAD_KEY.format(run_id=run_id))
+        if payload_json is None:
+            logger.error(f"Payload does not exist, check payload for run_id: {run_id}.")
+            self._drop(entry_id)
+            return None
+
+        try:
+            payload = json.loads(payload_json)
+        except json.JSONDecodeError as e:
+            logger.error(f"Error parsing job JSON, JSON error: {e}")
+            self._drop(entry_id)
+            return None
+
+        now = int(time.time())
+        # unlike the metadata of the list backend, stream_id is needed for ack/fail
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(
+            self.JOB_META_KEY.format(run_id=run_id),
+            mapping={
+                "last_claimed_at": now,
+                "stream_id": entry_id,
+            },
+        )
+        pipe.hincrby(self.JOB_META_KEY.format(run_id=run_id), "attempts", 1)
+        pipe.execute()
+
+        return run_id, payload
+
+    def ack(self, run_id: int) -> None:
+        """
+        Acknowledge successful job completion with XACK, removes the entry and the job keys.
+        """
+        try:
+            entry_id = self.redis.hget(self.JOB_META_KEY.format(run_id=run_id), "stream_id")
+            pipe = self.redis.pipeline(transaction=True)
+            if entry_id is not None:
+                pipe.xack(self.STREAM, self.GROUP, entry_id)
+                pipe.xdel(self.STREAM, entry_id)
+            pipe.delete(self.JOB_PAYLOAD_KEY.format(run_id=run_id))
+            pipe.delete(self.JOB_META_KEY.format(run_id=run_id))
+            pipe.execute()
+            logger.info("Acked job run_id=%s", run_id)
+        except redis.RedisError:
+            logger.exception("Redis error during ack for run_id=%s", run_id)
+            # Do NOT raise — worker already completed the job
+
+    def fail(self, run_id: int, reason: str) -> None:
+        """
+        Mark job as failed at q level, removes the entry from the stream and does not requeue.
+        DB, worker must handle.
+        """
+        now = int(time.time())
+        try:
+            entry_id = self.redis.hget(self.JOB_META_KEY.format(run_id=run_id), "stream_id")
+            pipe = self.redis.pipeline(transaction=True)
+            if entry_id is not None:
+                pipe.xack(self.STREAM, self.GROUP, entry_id)
+                pipe.xdel(self.STREAM, entry_id)
+            pipe.hset(
+                self.JOB_META_KEY.format(run_id=run_id),
+                mapping={
+                    "failed_at": now,
+                    "last_error": reason,
+                },
+            )
+            pipe.execute()
+            logger.warning("Failed job run_id=%s reason=%s", run_id, reason)
+        except redis.RedisError:
+            logger.exception("Redis error during fail() for run_id=%s", run_id)
+            # Do NOT raise — failure is already being handled at DB level
+
+
+def make_queue_service(
+    redis_client: redis.Redis,
+    backend: str = "list",
+    on_dead_letter: Optional[Callable[[int, str], None]] = None,
+) -> QueueService:
+    """Create the queue backend selected by QUEUE_BACKEND: "list" (BRPOPLPUSH) or "streams".
+    on_dead_letter is only used by "streams", the list backend leaves dead letters to the reaper."""
+    if backend == "streams":
+        return StreamQueueService(redis_client, on_dead_letter=on_dead_letter)
+    if backend != "list":
+        raise ValueError(f"Unknown queue backend {backend!r}")
+    return QueueService(redis_client)
@@ -0,0 +1,125 @@
+"""
+In-process solver through the C API of libsatsolver.so (src/satsolver.h).
+ctypes releases the GIL for every call into the library, so threads solve in parallel,
+and formulas are passed as bytes without pipes or output parsing.
+"""
+
+import ctypes
+import logging
+import os
+import subprocess
+import threading
+from typing import Dict, Optional
+
+from backend.app.solvers.output import format_compact_output
+
+logger = logging.getLogger(__name__)
+
+API_VERSION = 1
+
+RESULT_UNKNOWN = 0
+RESULT_SAT = 10
+RESULT_UNSAT = 20
+RESULT_ERROR = 30
+
+FLAG_CNF = 1
+FLAG_DIMACS = 2
+FLAG_COMPACT = 4
+FLAG_CDCL = 8
+FLAG_PREPROCESS = 16
+
+
+class NativeResult:
+    """Result of an in-process run, rc follows the exit codes of the CLI."""
+
+    def __init__(self, rc: int, assignment: Optional[Dict[str, bool]] = None, error: str = ""):
+        self.rc = rc
+        self.assignment = assignment
+        self.error = error
+
+    def to_completed_process(self, args) -> subprocess.CompletedProcess:
+        """Return the result as the CompletedProcess of an equivalent CLI run with --output=compact."""
+        if self.rc in (RESULT_SAT, RESULT_UNSAT):
+            return subprocess.CompletedProcess(args, self.rc, format_compact_output(self.assignment), "")
+        return subprocess.CompletedProcess(args, self.rc, "", self.error + "\n")
+
+
+class NativeSolver:
+    """Binding of libsatsolver.so, safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        lib = ctypes.CDLL(path)
+        if lib.satApiVersion() != API_VERSION:
+            raise RuntimeError(f"{path} implements API version {lib.satApiVersion()}, expected {API_VERSION}")
+
+        lib.mkSatSolver.restype = ctypes.c_void_p
+        lib.mkSatSolver.argtypes = []
+        lib.freeSatSolver.restype = None
+        lib.freeSatSolver.argtypes = [ctypes.c_void_p]
+        lib.satLoad.restype = ctypes.c_int
+        lib.satLoad.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_size_t, ctypes.c_uint]
+        lib.satSolve.restype = ctypes.c_int
+        lib.satSolve.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_ulong]
+        lib.satErrorMessage.restype = ctypes.c_char_p
+        lib.satErrorMessage.argtypes = [ctypes.c_void_p]
+        lib.satVariableCount.restype = ctypes.c_uint
+        lib.satVariableCount.argtypes = [ctypes.c_void_p]
+        lib.satVariableName.restype = ctypes.c_char_p
+        lib.satVariableName.argtypes = [ctypes.c_void_p, ctypes.c_uint]
+        lib.satModel.restype = ctypes.c_uint
+        lib.satModel.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int), ctypes.c_uint]
+        self.lib = lib
+
+    def solve(self, formula: str, flags: int = 0, conflict_limit: int = 0) -> NativeResult:
+        """Solve a formula in-process.
+
+        Args:
+            formula: RPN formula, or a CNF with FLAG_CNF or FLAG_DIMACS
+            flags: FLAG_* values combined with |
+            conflict_limit: Conflicts before giving up with RESULT_UNKNOWN, 0 means no limit
+
+        Returns:
+            NativeResult with the assignment of the named variables for SAT
+        """
+        lib = self.lib
+        data = formula.encode()
+        solver = lib.mkSatSolver()
+        try:
+            rc = lib.satLoad(solver, data, len(data), flags)
+            if rc == 0:
+                rc = lib.satSolve(solver, flags, conflict_limit)
+            if rc == RESULT_ERROR:
+                return NativeResult(rc, error=lib.satErrorMessage(solver).decode())
+            if rc != RESULT_SAT:
+                return NativeResult(rc)
+
+            count = lib.satVariableCount(solver)
+            model = (ctypes.c_int * count)()
+            lib.satModel(solver, model, count)
+            assignment = {}
+            for var in range(1, count + 1):
+                name = lib.satVariableName(solver, var).decode()
+                # fresh variables of the encoding are not part of the formula
+                if not name.startswith("$"):
+                    assignment[name] = model[var - 1] > 0
+            return NativeResult(rc, assignment)
+        finally:
+            lib.freeSatSolver(solver)
+
+
+_solvers: Dict[str, NativeSolver] = {}
+_solvers_lock = threading.Lock()
+
+
+def get_native_solver(path: str) -> Optional[NativeSolver]:
+    """Return the binding of a library, None if it has not been built."""
+    with _solvers_lock:
+        solver = _solvers.get(path)
+        if solver is None:
+            if not os.path.isfile(path):
+                return None
+            logger.info(f"Loading in-process solver {path}")
+            solver = NativeSolver(path)
+            _solvers[path] = solver
+        return solver
@@ -0,0 +1,46 @@
+"""
+Solver output formats and the parser shared by the worker and the sync endpoint.
+New runs use the compact format (--output=compact): an "s SATISFIABLE" or
+"s UNSATISFIABLE" line followed by "v" lines with the literals of the model.
+Stored results of older runs use the text format with "  name -> TRUE" lines.
+"""
+
+import re
+from typing import Dict, Optional, Tuple
+
+COMPACT_OUTPUT_ARG = "--output=compact"
+
+_TEXT_ASSIGNMENT = re.compile(r"(\S+) -> (TRUE|FALSE)")
+
+
+def format_compact_output(assignment: Optional[Dict[str, bool]]) -> str:
+    """Format a result like the solver does with --output=compact, None means UNSAT."""
+    if assignment is None:
+        return "s UNSATISFIABLE\n"
+    literals = [name if value else "-" + name for name, value in assignment.items()]
+    lines = [" ".join(["v", *literals[i:i + 16]]) for i in range(0, len(literals), 16)]
+    return "s SATISFIABLE\n" + "".join(line + "\n" for line in lines)
+
+
+def parse_solver_output(stdout: str) -> Tuple[str, Optional[Dict[str, bool]]]:
+    """Parse the output of a SAT or UNSAT run in either format.
+
+    The model is read with one split over all "v" lines (compact) or one regex
+    scan (text) instead of splitting every line in Python.
+
+    Returns:
+        Tuple of ("SAT", assignment) or ("UNSAT", None)
+    """
+    stdout = stdout.strip()
+
+    if stdout.startswith("s "):
+        status, _, body = stdout.partition("\n")
+        if status == "s UNSATISFIABLE":
+            return "UNSAT", None
+        literals = " ".join(line[2:] for line in body.split("\n") if line.startswith("v ")).split()
+        return "SAT", {lit.lstrip("-"): lit[0] != "-" for lit in literals}
+
+    if stdout.startswith("UNSAT"):
+        return "UNSAT", None
+
+    return "SAT", {name: val == "TRUE" for name, val in _TEXT_ASSIGNMENT.findall(stdout)}
@@ -6,13 +6,29 @@ The solver takes rpn from endpoint and calls the sat solver, it has two modes on
 import subprocess
 import time
 from backend.app.core.config import settings
-from typing import Tuple
+from backend.app.solvers.native import FLAG_CDCL, RESULT_UNKNOWN, get_native_solver
+from backend.app.solvers.output import COMPACT_OUTPUT_ARG
+from backend.app.solvers.server_pool import get_pool
+from typing import Optional, Tuple
 import logging 
 
 logger = logging.getLogger(__name__)
 
 
-def run_solver(formula: str,  run_id: int, formula_id: int, timeout_s: int = 5) -> Tuple[subprocess.CompletedProcess, float]:
+def use_cdcl(run_id: int) -> bool:
+    """Decide whether a run is part of the CDCL rollout (SOLVER_CDCL_PERCENT)."""
+    return run_id % 100 < settings.SOLVER_CDCL_PERCENT
+
+
+def init_solver_pool(size: int) -> None:
+    """Start the server pool of the fast solver with `size` processes, e.g. one per worker slot.
+    Must be called before the first run, as the pool keeps the size it was created with.
+    """
+    if settings.SOLVER_SERVER_POOL_SIZE > 0:
+        get_pool(settings.SOLVER_PATH_FAST, size, settings.SOLVER_SERVER_MAX_REQUESTS)
+
+
+def run_solver(formula: str,  run_id: int, formula_id: int, timeout_s: int = 5, cdcl: Optional[bool] = None) -> Tuple[subprocess.CompletedProcess, float]:
     """Execute the SAT solver on the formula.
     
     Args:
@@ -20,6 +36,7 @@ def run_solver(formula: str,  run_id: int, formula_id: int, timeout_s: int = 5)
         run_id: Run ID for logging
         formula_id: Formula ID for logging
         timeout_s: Timeout in seconds
+        cdcl: Use the CDCL solver, None decides by the rollout percentage
         
     Returns:
         Tuple of (CompletedProcess, elapsed_time_seconds)
@@ -30,17 +47,35 @@ def run_solver(formula: str,  run_id: int, formula_id: int, timeout_s: int = 5)
         RuntimeError: On other execution errors
     """
     path = settings.SOLVER_PATH_FAST
+    if cdcl is None:
+        cdcl = use_cdcl(run_id)
+    options = [COMPACT_OUTPUT_ARG, "--cdcl"] if cdcl else [COMPACT_OUTPUT_ARG]
     try:
         start = time.perf_counter()
-        logger.info(f"Subprocess is running run_id = {run_id} for formula_id:{formula_id} and formula = {formula}")
-        process = subprocess.run(
-            [path],
-            input=formula,
-            capture_output=True,
-            text=True,
-            timeout=timeout_s,
-            check=False,
-        )
+        logger.info(f"Subprocess is running run_id = {run_id} for formula_id:{formula_id} (cdcl={cdcl}) and formula = {formula}")
+        process = None
+        # small formulas are solved in-process, the rest falls back to a process that can be timed out
+        native = get_native_solver(settings.SOLVER_LIBRARY_PATH) if settings.SOLVER_LIBRARY_CONFLICT_LIMIT > 0 else None
+        if native is not None:
+            result = native.solve(formula, FLAG_CDCL if cdcl else 0, settings.SOLVER_LIBRARY_CONFLICT_LIMIT)
+            if result.rc != RESULT_UNKNOWN:
+                process = result.to_completed_process([native.path, *options])
+        # the in-process attempt counts against timeout_s, the reaper expects a job to end within it
+        remaining = timeout_s - (time.perf_counter() - start)
+        if process is None and remaining <= 0:
+            raise subprocess.TimeoutExpired([path, *options], timeout_s, output=formula)
+        if process is None and settings.SOLVER_SERVER_POOL_SIZE > 0:
+            pool = get_pool(path, settings.SOLVER_SERVER_POOL_SIZE, settings.SOLVER_SERVER_MAX_REQUESTS)
+            process = pool.solve(formula, options, remaining)
+        elif process is None:
+            process = subprocess.run(
+                [path, *options],
+                input=formula,
+                capture_output=True,
+                text=True,
+                timeout=remaining,
+                check=False,
+            )
         end = time.perf_counter()
         runtime = end - start
         logger.info(f"Runtime is {runtime} for run_id{run_id} and formula_id{formula_id}.")
@@ -54,18 +89,3 @@ def run_solver(formula: str,  run_id: int, formula_id: int, timeout_s: int = 5)
     except Exception as e:
         logger.error(f"Solver execution failed: {type(e).__name__}: {e}")
         raise RuntimeError(f"Solver execution failed: {e}") from e
-
-def parse_solver_output(stdout: str):
-    stdout = stdout.strip()
-
-    if stdout.startswith("UNSAT"):
-        return "UNSAT", None
-
-    assignment = {}
-    for line in stdout.splitlines():
-        line = line.strip()
-        if "->" in line:
-            var, val = line.split("->")
-            assignment[var.strip()] = (val.strip() == "TRUE")
-
-    return "SAT", assignment
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Pool of long-lived solver processes.
+Starting the solver costs more than solving most formulas, so the processes run in
+--server mode and answer one length-prefixed request after another.
+"""
+
+import logging
+import os
+import queue
+import select
+import subprocess
+import threading
+import time
+from typing import Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 64 * 1024
+
+
+class SolverServer:
+    """A single solver process in --server mode."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.requests = 0
+        self._buffer = b""
+        self.process = subprocess.Popen(
+            [path, "--server"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self) -> None:
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+
+    def solve(self, formula: str, args: Sequence[str] = (), timeout_s: float = 5) -> subprocess.CompletedProcess:
+        """Solve a single formula.
+
+        Args:
+            formula: Solver input, e.g. an RPN formula
+            args: Run options for this request, e.g. ["--cdcl"]
+            timeout_s: Timeout in seconds
+
+        Returns:
+            CompletedProcess with the return code, stdout and stderr a single
+            solver run would have produced
+
+        Raises:
+            subprocess.TimeoutExpired: On timeout, the server must be closed then
+            RuntimeError: If the server exited
+        """
+        data = formula.encode()
+        header = " ".join([str(len(data)), *args]) + "\n"
+        deadline = time.monotonic() + timeout_s
+        try:
+            self.process.stdin.write(header.encode() + data)
+        except BrokenPipeError as e:
+            raise RuntimeError("Solver server exited") from e
+
+        while b"\n" not in self._buffer:
+            self._read(formula, timeout_s, deadline)
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        rc, size = (int(field) for field in line.split())
+
+        while len(self._buffer) < size:
+            self._read(formula, timeout_s, deadline)
+        output = self._buffer[:size].decode()
+        self._buffer = self._buffer[size:]
+        self.requests += 1
+
+        # a normal run prints errors on stderr and results on stdout
+        if rc in (10, 20):
+            return subprocess.CompletedProcess(self.process.args, rc, output, "")
+        return subprocess.CompletedProcess(self.process.args, rc, "", output)
+
+    def _read(self, formula: str, timeout_s: float, deadline: float) -> None:
+        fd = self.process.stdout.fileno()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+            raise subprocess.TimeoutExpired(self.process.args, timeout_s, output=formula)
+        chunk = os.read(fd, READ_CHUNK)
+        if not chunk:
+            raise RuntimeError(f"Solver server exited with code {self.process.wait()}")
+        self._buffer += chunk
+
+
+class SolverServerPool:
+    """A bounded number of solver servers shared between threads.
+
+    Servers are started on first use and replaced after a timeout, an error
+    or max_requests requests, which bounds what invalid formulas can leak.
+    """
+
+    def __init__(self, path: str, size: int = 2, max_requests: int = 1000):
+        self.path = path
+        self.max_requests = max_requests
+        # None marks a slot without a running server
+        self._slots: "queue.LifoQueue[Optional[SolverServer]]" = queue.LifoQueue()
+        for _ in range(size):
+            self._slots.put(None)
+
+    def solve(self, formula: str, args: Sequence[str] = (), timeout_s: float = 5) -> subprocess.CompletedProcess:
+        """Solve a formula on the next free server, see SolverServer.solve.
+        The wait for a free server counts against timeout_s, so a busy pool cannot
+        stretch a request beyond its timeout.
+
+        Raises:
+            subprocess.TimeoutExpired: On timeout, also if no server became free in time
+            FileNotFoundError: If solver binary not found
+            RuntimeError: If the server exited
+        """
+        deadline = time.monotonic() + timeout_s
+        try:
+            server = self._slots.get(timeout=max(timeout_s, 0))
+        except queue.Empty:
+            raise subprocess.TimeoutExpired([self.path, "--server"], timeout_s, output=formula) from None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            # the server is fine, only this request ran out of time
+            self._slots.put(server)
+            raise subprocess.TimeoutExpired([self.path, "--server"], timeout_s, output=formula)
+        try:
+            if server is not None and not server.alive():
+                server.close()
+                server = None
+            if server is None:
+                server = SolverServer(self.path)
+            result = server.solve(formula, args, remaining)
+            if server.requests >= self.max_requests:
+                server.close()
+                server = None
+            return result
+        except BaseException:
+            if server is not None:
+                server.close()
+                server = None
+            raise
+        finally:
+            self._slots.put(server)
+
+    def close(self) -> None:
+        while True:
+            try:
+                server = self._slots.get_nowait()
+            except queue.Empty:
+                return
+            if server is not None:
+                server.close()
+
+
+_pools: Dict[str, SolverServerPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: str, size: int = 2, max_requests: int = 1000) -> SolverServerPool:
+    """Return the pool of servers for a solver binary, creating it on first use."""
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            logger.info(f"Starting solver server pool for {path} with {size} processes")
+            pool = SolverServerPool(path, size, max_requests)
+            _pools[path] = pool
+        return pool
@@ -3,13 +3,21 @@
 
 This script initializes and runs a worker that processes solver jobs from the queue.
 """
+import functools
 import logging
+import os
 import sys
 
+from backend.app.core.config import settings
 from backend.app.db.session import init_db_pool, get_connection, release_connection
 from backend.app.redis.redis_session import init_redis_pool, get_redis_client
 from backend.app.services.database_service import DatabaseService
-from backend.app.services.queue_service import QueueService
+from backend.app.services.reaper import QueueReaper, fail_abandoned_run
+from backend.app.services.result_batcher import ResultBatcher
+from backend.app.services.run_cache import RunCache
+from backend.app.services.run_events import RunEvents
+from backend.app.services.stream_queue_service import make_queue_service
+from backend.app.solvers.satsolver import init_solver_pool
 from backend.app.worker import Worker
 
 # Configure logging
@@ -22,6 +30,17 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def worker_concurrency() -> int:
+    """Number of worker slots, one per CPU unless WORKER_CONCURRENCY is set.
+    Every slot holds a DB connection while it records a result, so the DB pool bounds the slots.
+    """
+    concurrency = settings.WORKER_CONCURRENCY or os.cpu_count() or 1
+    if concurrency > settings.DB_POOL_MAX:
+        logger.warning("Limiting worker concurrency %s to DB_POOL_MAX=%s", concurrency, settings.DB_POOL_MAX)
+        concurrency = settings.DB_POOL_MAX
+    return concurrency
+
+
 def main():
     """Initialize dependencies and start the worker."""
     logger.info("Initializing worker dependencies...")
@@ -32,16 +51,66 @@ def main():
     
     # Create service instances with proper dependency injection
     redis_client = get_redis_client()
-    queue_service = QueueService(redis_client)
     
     # DatabaseService now takes connection pool functions, not a connection!
     db_service = DatabaseService(get_connection, release_connection)
     
+    # One solver server per slot, so that slots never wait for each other
+    concurrency = worker_concurrency()
+    init_solver_pool(concurrency)
+
+    # Status changes and finished results go to the cache of the status polls
+    cache = RunCache(redis_client, result_ttl_s=settings.RUN_CACHE_TTL_S) if settings.RUN_CACHE_TTL_S > 0 else None
+    # and are published to the clients waiting on /jobs/events and /jobs/wait
+    events = RunEvents(redis_client)
+
+    # the streams backend dead-letters jobs itself, their runs are failed like the reaper does
+    queue_service = make_queue_service(
+        redis_client,
+        settings.QUEUE_BACKEND,
+        on_dead_letter=functools.partial(fail_abandoned_run, db_service, cache=cache, events=events),
+    )
+
+    # The streams backend reclaims stuck jobs itself, the list backend needs the reaper
+    reaper = None
+    if settings.QUEUE_BACKEND == "list" and settings.QUEUE_REAPER_INTERVAL_S > 0:
+        reaper = QueueReaper(
+            queue_service,
+            db_service,
+            grace_s=settings.QUEUE_REAPER_GRACE_S,
+            interval_s=settings.QUEUE_REAPER_INTERVAL_S,
+            cache=cache,
+            events=events,
+        )
+        reaper.start()
+
+    # Write-behind for results, commits many small jobs at once
+    batcher = None
+    if settings.RESULT_BATCH_INTERVAL_MS > 0:
+        batcher = ResultBatcher(
+            db_service,
+            interval_s=settings.RESULT_BATCH_INTERVAL_MS / 1000,
+            max_batch=settings.RESULT_BATCH_MAX,
+        )
+        batcher.start()
+
+    # keep slots for short jobs while long ones run, a single slot cannot be split
+    small_lane_slots = min(settings.WORKER_SMALL_LANE_SLOTS, concurrency - 1)
+    if settings.QUEUE_BACKEND == "streams" and small_lane_slots > 0:
+        # the stream is a single lane, a claim limited to the small lane would take any job
+        logger.warning("WORKER_SMALL_LANE_SLOTS=%s has no effect with QUEUE_BACKEND=streams, ignoring it", settings.WORKER_SMALL_LANE_SLOTS)
+        small_lane_slots = 0
+
     # Create and start worker
     worker = Worker(
         queue=queue_service,
         db=db_service,
-        poll_timeout_s=5
+        poll_timeout_s=5,
+        concurrency=concurrency,
+        small_lane_slots=small_lane_slots,
+        batcher=batcher,
+        cache=cache,
+        events=events,
     )
     
     logger.info("Starting worker process...")
@@ -52,6 +121,12 @@ def main():
     except Exception:
         logger.exception("Worker crashed")
         sys.exit(1)
+    finally:
+        # the worker has finished its in-flight jobs, store their results before exiting
+        if batcher is not None:
+            batcher.stop()
+        if reaper is not None:
+            reaper.stop()
 
 
 if __name__ == "__main__":
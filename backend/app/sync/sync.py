@@ -6,6 +6,10 @@ from typing import Tuple, Union
 
 from fastapi import APIRouter, Body, HTTPException, status
 
+from backend.app.core.config import settings
+from backend.app.solvers.native import RESULT_UNKNOWN, get_native_solver
+from backend.app.solvers.output import COMPACT_OUTPUT_ARG, parse_solver_output
+from backend.app.solvers.server_pool import get_pool
 from backend.app.utils.formula import normalize_and_hash
 from backend.app.sync.syncdb import (
     get_result_by_hash,
@@ -25,6 +29,8 @@ logger = logging.getLogger(__name__)
 # Configuration
 SOLVER_TIMEOUT = 5
 SOLVER_PATH = "bin/satsolver_opt"
+SOLVER_LIBRARY_PATH = "bin/libsatsolver.so"
+SOLVER_LIBRARY_CONFLICT_LIMIT = 10_000
 # Return codes from C solver
 RETURN_CODE_SAT = 10
 RETURN_CODE_UNSAT = 20
@@ -108,14 +114,28 @@ def run_solver(formula: str) -> Tuple[subprocess.CompletedProcess, float]:
     """
     try:
         start = time.perf_counter()
-        process = subprocess.run(
-            [SOLVER_PATH],
-            input=formula,
-            capture_output=True,
-            text=True,
-            timeout=SOLVER_TIMEOUT,
-            check=False,
-        )
+        process = None
+        native = get_native_solver(SOLVER_LIBRARY_PATH)
+        if native is not None:
+            result = native.solve(formula, conflict_limit=SOLVER_LIBRARY_CONFLICT_LIMIT)
+            if result.rc != RESULT_UNKNOWN:
+                process = result.to_completed_process([native.path, COMPACT_OUTPUT_ARG])
+        # the in-process attempt and the wait for a server count against SOLVER_TIMEOUT
+        remaining = SOLVER_TIMEOUT - (time.perf_counter() - start)
+        if process is None and remaining <= 0:
+            raise subprocess.TimeoutExpired([SOLVER_PATH, COMPACT_OUTPUT_ARG], SOLVER_TIMEOUT, output=formula)
+        if process is None and settings.SOLVER_SERVER_POOL_SIZE > 0:
+            pool = get_pool(SOLVER_PATH, settings.SOLVER_SERVER_POOL_SIZE, settings.SOLVER_SERVER_MAX_REQUESTS)
+            process = pool.solve(formula, [COMPACT_OUTPUT_ARG], remaining)
+        elif process is None:
+            process = subprocess.run(
+                [SOLVER_PATH, COMPACT_OUTPUT_ARG],
+                input=formula,
+                capture_output=True,
+                text=True,
+                timeout=remaining,
+                check=False,
+            )
         end = time.perf_counter()
         runtime = end - start
         return process, runtime
@@ -153,18 +173,3 @@ def get_history():
         )
         entries.append(entry)
     return HistoryResponse(entries=entries)
-
-def parse_solver_output(stdout: str):
-    stdout = stdout.strip()
-
-    if stdout.startswith("UNSAT"):
-        return "UNSAT", None
-
-    assignment = {}
-    for line in stdout.splitlines():
-        line = line.strip()
-        if "->" in line:
-            var, val = line.split("->")
-            assignment[var.strip()] = (val.strip() == "TRUE")
-
-    return "SAT", assignment
\ No newline at end of file
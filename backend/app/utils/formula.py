@@ -25,6 +25,23 @@ def normalize_rpn(formula_raw: str) -> str:
             raise ValueError(f"Unallowed symbols or operators.")
     return " ".join(tokens)
 
+# clauses of the Tseitin encoding per operator, see src/tseitin.c
+TSEITIN_CLAUSES = {"&&": 3, "||": 3, "=>": 3, "<=>": 4, "!": 2}
+
+def estimate_cost(normalized_rpn: str) -> int:
+    """Rough solver cost of a normalized formula, used to pick a queue lane at submit time.
+    Counts the clauses the Tseitin encoding produces for the operator mix plus the variables,
+    one pass over the tokens and no parsing."""
+    clauses = 0
+    variables = set()
+    for token in normalized_rpn.split():
+        weight = TSEITIN_CLAUSES.get(token)
+        if weight is None:
+            variables.add(token)
+        else:
+            clauses += weight
+    return clauses + len(variables)
+
 MAX_FORMULA_LENGTH = 300_000
 MAX_TOKENS = 85_000
 
@@ -1,30 +1,63 @@
 import logging
 import signal
 import subprocess
+import threading
 import time
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
 
 from backend.app.services.queue_service import QueueService
 from backend.app.services.database_service import DatabaseService
-from backend.app.core.constants import TIMEOUT_S_SAT, TIMEOUT_S_SUDOKU, JobStatus, SolverMode
-from backend.app.solvers.satsolver import run_solver, parse_solver_output
+from backend.app.services.result_batcher import ResultBatcher
+from backend.app.services.run_cache import RunCache
+from backend.app.services.run_events import RunEvents
+from backend.app.core.constants import TIMEOUT_S_SAT, TIMEOUT_S_SUDOKU, JobStatus, QueueLane, SolverMode
+from backend.app.solvers.output import parse_solver_output
+from backend.app.solvers.satsolver import run_solver
 from backend.app.core.constants import SolverExitCodes
 
 logger = logging.getLogger(__name__)
 
 
 class Worker:
+    """Claims jobs and solves up to `concurrency` of them at the same time.
+
+    Every slot runs one job on a thread of its own. The threads mostly wait for
+    solver processes or for the in-process solver, which releases the GIL, so
+    the jobs use one core each.
+
+    small_lane_slots slots are kept for the small lane: once large and sudoku jobs
+    hold all other slots, the worker only claims small jobs.
+
+    Results are stored with one transaction per job (DatabaseService.complete_run),
+    or handed to a ResultBatcher that commits them in batches and acks afterwards.
+    Status changes and finished results are written to the RunCache of the status polls
+    and published as RunEvents for the /jobs/events and /jobs/wait endpoints.
+    """
     def __init__(
         self,
         queue: QueueService,
         db: DatabaseService,
         poll_timeout_s: int = 5,
+        concurrency: int = 1,
+        small_lane_slots: int = 0,
+        batcher: Optional[ResultBatcher] = None,
+        cache: Optional[RunCache] = None,
+        events: Optional[RunEvents] = None,
     ):
         self.queue = queue
         self.db = db
         self.poll_timeout_s = poll_timeout_s
+        self.concurrency = concurrency
         self.running = True
-        self._current_run_id: Optional[int] = None
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self.small_lane_slots = small_lane_slots
+        self.batcher = batcher
+        self.cache = cache
+        self.events = events
+        # run_id -> lane of the jobs that are being solved
+        self._in_flight: Dict[int, str] = {}
+        self._in_flight_lock = threading.Lock()
 
     def _handle_shutdown_signal(self, signum, frame):
         logger.info("Worker received shutdown signal (%s)", signum)
@@ -35,39 +68,137 @@ class Worker:
         signal.signal(signal.SIGINT, self._handle_shutdown_signal)
 
     """Main loop run forever for workers.
-    
+    Jobs are only claimed for free slots, all free slots at once with claim_many.
+    On shutdown all in-flight jobs are finished first.
     """
     def run_forever(self):
-        logger.info("Worker starting")
+        logger.info("Worker starting with %s slots", self.concurrency)
         self.install_signal_handlers()
 
-        while self.running:
-            try:
-                job = self.queue.claim(timeout_s=self.poll_timeout_s)
-            except Exception:
-                logger.exception("Queue claim failed")
-                time.sleep(2)
-                continue
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="solver-slot") as executor:
+            while self.running:
+                # wait for a free slot, but keep checking for shutdown signals
+                if not self._slots.acquire(timeout=self.poll_timeout_s):
+                    continue
+                free = 1
+                while free < self.concurrency and self._slots.acquire(blocking=False):
+                    free += 1
+
+                count, lanes = self._claim_plan(free)
+                try:
+                    jobs = self.queue.claim_many(count, timeout_s=self.poll_timeout_s, lanes=lanes)
+                except Exception:
+                    self._slots.release(free)
+                    logger.exception("Queue claim failed")
+                    time.sleep(2)
+                    continue
 
-            if job is None:
-                # no job available, loop again (idle, no CPU)
-                continue
+                # slots without a job go back, none at all means idle (no CPU)
+                if free > len(jobs):
+                    self._slots.release(free - len(jobs))
 
-            run_id, payload = job
-            self._current_run_id = run_id
-            logger.info("Claimed run_id=%s", run_id)
+                for run_id, payload in jobs:
+                    logger.info("Claimed run_id=%s", run_id)
+                    with self._in_flight_lock:
+                        self._in_flight[run_id] = payload.get("lane", QueueLane.SMALL)
+                    executor.submit(self._run_slot, run_id, payload)
 
-            try:
-                self._process_job(run_id, payload)
-            finally:
-                self._current_run_id = None
+            logger.info("Worker waiting for %s in-flight jobs", len(self.in_flight()))
 
         logger.info("Worker shutting down cleanly")
 
+    def in_flight(self) -> Set[int]:
+        """Run ids of the jobs that are currently being solved."""
+        with self._in_flight_lock:
+            return set(self._in_flight)
+
+    def _claim_plan(self, free: int) -> Tuple[int, Optional[List[str]]]:
+        """Number of jobs and lanes for the next claim, None serves all lanes.
+        Jobs of other lanes are only claimed as long as small_lane_slots stay for the small lane."""
+        if self.small_lane_slots <= 0:
+            return free, None
+        with self._in_flight_lock:
+            heavy = sum(1 for lane in self._in_flight.values() if lane != QueueLane.SMALL)
+        budget = self.concurrency - self.small_lane_slots - heavy
+        if budget <= 0:
+            return free, [QueueLane.SMALL]
+        return min(free, budget), None
+
+    def _run_slot(self, run_id: int, payload: dict):
+        try:
+            self._process_job(run_id, payload)
+        except Exception:
+            # _process_job records its own failures, this only keeps the slot alive
+            logger.exception("Unhandled error in slot for run_id=%s", run_id)
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(run_id, None)
+            self._slots.release()
+
+    def _complete(self, payload: dict, run_id: int, status: str, **result):
+        """Store the result and final status of a run, then cache and publish it and ack the job."""
+        def committed():
+            self._cache_result(payload, run_id, status, result)
+            # waiting clients read the result right away, so publish only once it is stored
+            self._publish(run_id, status)
+            self.queue.ack(run_id)
+
+        if self.batcher is not None:
+            # the ack waits for the commit of the batch, a run that cannot be stored is failed instead
+            self.batcher.submit(
+                run_id,
+                status,
+                on_commit=committed,
+                on_error=lambda e: self._fail_unstored(run_id, reason=str(e)),
+                **result,
+            )
+            return
+        self.db.complete_run(run_id=run_id, status=status, **result)
+        committed()
+
+    def _fail_unstored(self, run_id: int, reason: str):
+        """End a run whose result could not be stored.
+        Without a final status the run would stay PROCESSING, waiting clients would get no event and
+        every submit of the formula would reuse it. Only once FAILED is written the job leaves the
+        queue, otherwise it stays in processing for the reaper."""
+        try:
+            self.db.update_run_status(run_id, JobStatus.FAILED)
+        except Exception:
+            logger.exception("Failed to mark run_id=%s as FAILED, leaving the job to the reaper", run_id)
+            return
+        if self.cache is not None:
+            self.cache.invalidate(run_id)
+        self._publish(run_id, JobStatus.FAILED)
+        try:
+            self.queue.fail(run_id, reason=reason)
+        except Exception:
+            logger.exception("Failed queue cleanup run_id=%s", run_id)
+
+    def _cache_result(self, payload: dict, run_id: int, status: str, result: dict):
+        """Write the result as JobService.get_run_result would read it, so polls skip Postgres."""
+        if self.cache is None or "formula_id" not in payload or "formula" not in payload:
+            return
+        self.cache.set_result(run_id, dict(
+            status=status,
+            run_id=run_id,
+            formula_id=payload["formula_id"],
+            formula=payload["formula"],
+            result=result["result"],
+            assignment=result["assignment"],
+            runtime=result["runtime_s"],
+        ))
+
+    def _publish(self, run_id: int, status: str):
+        if self.events is not None:
+            self.events.publish(run_id, status)
+
     #process a run
     def _process_job(self, run_id: int, payload: dict):
         try:
             self.db.update_run_status(run_id, JobStatus.PROCESSING)
+            if self.cache is not None:
+                self.cache.set_status(run_id, JobStatus.PROCESSING)
+            self._publish(run_id, JobStatus.PROCESSING)
             
             formula = payload["formula"]
             formula_id = payload["formula_id"]
@@ -94,8 +225,10 @@ class Worker:
             # Parse output based on return code
             if rc == SolverExitCodes.PARSE_ERROR:
                 # Parse error - store as failed result
-                self.db.insert_result(
+                self._complete(
+                    payload,
                     run_id=run_id,
+                    status=JobStatus.FAILED,
                     result="ERROR",
                     assignment=None,
                     stdout=stdout,
@@ -104,15 +237,15 @@ class Worker:
                     error_message=stderr or "Formula parsing failed",
                     runtime_s=runtime_s,
                 )
-                self.db.update_run_status(run_id, JobStatus.FAILED)
-                self.queue.ack(run_id)
                 logger.info("Parse error for run_id=%s", run_id)
                 
             elif rc in {SolverExitCodes.SAT, SolverExitCodes.UNSAT}:
                 # SAT/UNSAT - parse and store result
                 result, assignment = parse_solver_output(stdout)
-                self.db.insert_result(
+                self._complete(
+                    payload,
                     run_id=run_id,
+                    status=JobStatus.COMPLETED,
                     result=result,
                     assignment=assignment,
                     stdout=stdout,
@@ -121,14 +254,14 @@ class Worker:
                     error_message=None,
                     runtime_s=runtime_s,
                 )
-                self.db.update_run_status(run_id, JobStatus.COMPLETED)
-                self.queue.ack(run_id)
                 logger.info("Completed run_id=%s with result=%s", run_id, result)
                 
             else:
                 # Unexpected return code
-                self.db.insert_result(
+                self._complete(
+                    payload,
                     run_id=run_id,
+                    status=JobStatus.FAILED,
                     result="ERROR",
                     assignment=None,
                     stdout=stdout,
@@ -137,15 +270,15 @@ class Worker:
                     error_message=f"Unexpected solver return code {rc}",
                     runtime_s=runtime_s,
                 )
-                self.db.update_run_status(run_id, JobStatus.FAILED)
-                self.queue.ack(run_id)
                 logger.warning("Unexpected return code %s for run_id=%s", rc, run_id)
 
         except subprocess.TimeoutExpired:
             logger.warning("Solver timeout for run_id=%s", run_id)
             try:
-                self.db.insert_result(
+                self._complete(
+                    payload,
                     run_id=run_id,
+                    status=JobStatus.TIMEOUT,
                     result="TIMEOUT",
                     assignment=None,
                     stdout="",
@@ -154,20 +287,17 @@ class Worker:
                     error_message=f"Solver execution timed out after {timeout_s}s",
                     runtime_s= timeout_s,
                 )
-                self.db.update_run_status(run_id, JobStatus.TIMEOUT)
-                self.queue.ack(run_id)
             except Exception:
                 logger.exception("Failed to record timeout for run_id=%s", run_id)
-                try:
-                    self.queue.fail(run_id, reason="Timeout")
-                except Exception:
-                    logger.exception("Failed queue cleanup after timeout run_id=%s", run_id)
+                self._fail_unstored(run_id, reason="Timeout")
                     
         except FileNotFoundError:
             logger.error("Solver binary not found for run_id=%s", run_id)
             try:
-                self.db.insert_result(
+                self._complete(
+                    payload,
                     run_id=run_id,
+                    status=JobStatus.FAILED,
                     result="ERROR",
                     assignment=None,
                     stdout="",
@@ -176,20 +306,17 @@ class Worker:
                     error_message="Solver binary not available",
                     runtime_s=0,
                 )
-                self.db.update_run_status(run_id, JobStatus.FAILED)
-                self.queue.ack(run_id)
             except Exception:
                 logger.exception("Failed to record binary error for run_id=%s", run_id)
-                try:
-                    self.queue.fail(run_id, reason="Binary not found")
-                except Exception:
-                    logger.exception("Failed queue cleanup run_id=%s", run_id)
+                self._fail_unstored(run_id, reason="Binary not found")
                     
         except Exception as e:
             logger.exception("Job failed run_id=%s", run_id)
             try:
-                self.db.insert_result(
+                self._complete(
+                    payload,
                     run_id=run_id,
+                    status=JobStatus.FAILED,
                     result="ERROR",
                     assignment=None,
                     stdout="",
@@ -198,11 +325,6 @@ class Worker:
                     error_message=str(e),
                     runtime_s=0,
                 )
-                self.db.update_run_status(run_id, JobStatus.FAILED)
-                self.queue.ack(run_id)
             except Exception:
                 logger.exception("Failed DB update for run_id=%s", run_id)
-                try:
-                    self.queue.fail(run_id, reason=str(e))
-                except Exception:
-                    logger.exception("Failed queue cleanup run_id=%s", run_id)
+                self._fail_unstored(run_id, reason=str(e))
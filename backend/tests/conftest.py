@@ -0,0 +1,140 @@
+"""Shared test setup for the backend: fakes of the queue and database services and fakeredis fixtures.
+
+Test dependencies are listed in backend/requirements-test.txt. Tests that run the Lua
+claim scripts of QueueService on fakeredis are marked with `lua`, they need lupa and are
+skipped with a reason (pytest -rs) instead of silently when it is missing.
+"""
+import importlib.util
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.core.constants import QueueLane
+
+HAS_LUPA = importlib.util.find_spec("lupa") is not None
+MISSING_LUPA = "lupa is not installed, fakeredis needs it for the Lua claim scripts (pip install -r backend/requirements-test.txt)"
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "lua: runs the Lua scripts of QueueService on fakeredis, needs lupa")
+
+
+def pytest_report_header(config):
+    if not HAS_LUPA:
+        return f"backend: {MISSING_LUPA}"
+
+
+def pytest_collection_modifyitems(config, items):
+    if HAS_LUPA:
+        return
+    skip_lua = pytest.mark.skip(reason=MISSING_LUPA)
+    for item in items:
+        if "lua" in item.keywords:
+            item.add_marker(skip_lua)
+
+
+class FakeQueue:
+    """The claim side of QueueService over a list of (run_id, job_data), records the acks and fails."""
+
+    def __init__(self, jobs=()):
+        self.jobs = list(jobs)
+        self.acked = []
+        self.failed = []
+        self.lock = threading.Lock()
+
+    def _take(self, lanes):
+        with self.lock:
+            for i, job in enumerate(self.jobs):
+                if lanes is None or job[1].get("lane", QueueLane.SMALL) in lanes:
+                    return self.jobs.pop(i)
+        return None
+
+    def claim(self, timeout_s=1, lanes=None):
+        job = self._take(lanes)
+        if job is None:
+            time.sleep(0.01)
+        return job
+
+    def claim_many(self, n, timeout_s=1, lanes=None):
+        jobs = []
+        job = self.claim(timeout_s, lanes)
+        while job is not None:
+            jobs.append(job)
+            if len(jobs) == n:
+                break
+            job = self._take(lanes)
+        return jobs
+
+    def ack(self, run_id):
+        with self.lock:
+            self.acked.append(run_id)
+
+    def fail(self, run_id, reason):
+        with self.lock:
+            self.failed.append(run_id)
+
+
+class FakeDB:
+    """The run-writing DatabaseService methods over dicts.
+
+    Set fail_batches to make complete_runs raise and bad_run_id to make complete_run raise for that run.
+    """
+
+    def __init__(self):
+        self.statuses = {}  # run_id -> status
+        self.results = {}  # run_id -> result columns
+        self.batches = []  # run ids of each complete_runs call
+        self.single = []  # run ids of the complete_run calls
+        self.fail_batches = False
+        self.bad_run_id = None
+        self.lock = threading.Lock()
+
+    def update_run_status(self, run_id, status):
+        with self.lock:
+            self.statuses[run_id] = status
+
+    def complete_run(self, run_id, status, **result):
+        if run_id == self.bad_run_id:
+            raise RuntimeError("bad row")
+        with self.lock:
+            self.single.append(run_id)
+            self.results[run_id] = result
+            self.statuses[run_id] = status
+
+    def complete_runs(self, runs):
+        if self.fail_batches:
+            raise RuntimeError("batch failed")
+        with self.lock:
+            self.batches.append([run["run_id"] for run in runs])
+            for run in runs:
+                self.results[run["run_id"]] = run
+                self.statuses[run["run_id"]] = run["status"]
+
+
+@pytest.fixture
+def db():
+    return FakeDB()
+
+
+@pytest.fixture
+def fake_queue():
+    return FakeQueue()
+
+
+@pytest.fixture
+def redis_server():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def redis_client(redis_server):
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeRedis(server=redis_server, decode_responses=True)
@@ -0,0 +1,207 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("fastapi")
+pytestmark = pytest.mark.lua
+
+from fastapi import HTTPException
+
+from backend.app.core.constants import JobStatus, QueueLane, SolverMode
+from backend.app.schemas.job import JobSubmitRequest
+from backend.app.services.job_service import JobService
+from backend.app.services.queue_service import QueueService
+from backend.app.services.run_cache import RunCache
+
+REUSABLE_STATUSES = {JobStatus.COMPLETED, JobStatus.CREATED, JobStatus.PROCESSING, JobStatus.QUEUED}
+
+
+class FakeSubmitDB:
+    """The submit and batch DatabaseService methods over dicts, counts the calls (round trips)."""
+
+    def __init__(self):
+        self.formulas = {}  # hash -> formula_id
+        self.runs = {}  # run_id -> {"formula_id", "status", "mode", "timeout_s"}
+        self.calls = []
+
+    def submit_run(self, normalized_input, hash_value, notation, mode, timeout_s):
+        self.calls.append("submit_run")
+        return self._submit(hash_value, mode, timeout_s)
+
+    def _submit(self, hash_value, mode, timeout_s):
+        formula_id = self.formulas.setdefault(hash_value, len(self.formulas) + 1)
+        reusable = self._reusable([formula_id])
+        if formula_id in reusable:
+            run_id, status = reusable[formula_id]
+            return dict(formula_id=formula_id, run_id=run_id, status=status, created=False)
+        run_id = len(self.runs) + 1
+        self.runs[run_id] = dict(formula_id=formula_id, status=JobStatus.QUEUED, mode=mode, timeout_s=timeout_s)
+        return dict(formula_id=formula_id, run_id=run_id, status=JobStatus.QUEUED, created=True)
+
+    def update_run_status(self, run_id, status):
+        self.calls.append("update_run_status")
+        self.runs[run_id]["status"] = status
+
+    def submit_runs(self, jobs):
+        self.calls.append("submit_runs")
+        hashes = [hash_value for _, hash_value, _, _, _ in jobs]
+        assert len(set(hashes)) == len(hashes)
+        return {hash_value: self._submit(hash_value, mode, timeout_s) for _, hash_value, _, mode, timeout_s in jobs}
+
+    def finish_runs(self, run_ids, status):
+        self.calls.append("finish_runs")
+        for run_id in run_ids:
+            self.runs[run_id]["status"] = status
+
+    def _reusable(self, formula_ids):
+        # the runs GET_REUSABLE_RUNS picks: a completed run first, else the newest live one
+        reusable = {}
+        for run_id, run in self.runs.items():
+            if run["formula_id"] in formula_ids and run["status"] in REUSABLE_STATUSES:
+                best = reusable.get(run["formula_id"])
+                if best is None or best[1] != JobStatus.COMPLETED:
+                    reusable[run["formula_id"]] = (run_id, run["status"])
+        return reusable
+
+    def get_run_statuses(self, run_ids):
+        self.calls.append("get_run_statuses")
+        return {run_id: self.runs[run_id]["status"] for run_id in run_ids if run_id in self.runs}
+
+
+@pytest.fixture
+def db():
+    return FakeSubmitDB()
+
+
+def jobs(*formulas, mode="RPN"):
+    return [JobSubmitRequest(formula=formula, mode=mode) for formula in formulas]
+
+
+def test_submit_job_is_one_database_call(db, redis_client):
+    service = JobService(db, QueueService(redis_client))
+    first = service.submit_job("a b &&")
+    again = service.submit_job("a  b &&")
+
+    assert first.status == JobStatus.QUEUED
+    assert first.msg == "Job submitted successfully"
+    assert again.run_id == first.run_id
+    assert again.msg.startswith("A run already exists")
+    assert db.calls == ["submit_run", "submit_run"]
+    assert redis_client.lrange(QueueService.PENDING_QUEUE, 0, -1) == [str(first.run_id)]
+
+
+def test_submit_job_fails_run_without_redis(db, redis_server, redis_client):
+    redis_server.connected = False
+    service = JobService(db, QueueService(redis_client))
+    with pytest.raises(HTTPException) as e:
+        service.submit_job("a b &&")
+
+    assert e.value.status_code == 503
+    assert db.runs[1]["status"] == JobStatus.FAILED
+
+
+def test_submit_batch_deduplicates(db, redis_client):
+    service = JobService(db, QueueService(redis_client))
+    response = service.submit_batch(jobs("a b &&", "a  b &&", "c !"))
+
+    first, duplicate, other = response.jobs
+    assert first.run_id == duplicate.run_id != other.run_id
+    assert first.formula == duplicate.formula == "a b &&"
+    assert [job.status for job in response.jobs] == [JobStatus.QUEUED] * 3
+    assert first.msg == "Job submitted successfully"
+    assert duplicate.msg.startswith("A run already exists")
+    assert len(db.runs) == 2
+    assert db.calls == ["submit_runs"]
+    assert redis_client.lrange(QueueService.PENDING_QUEUE, 0, -1) == [str(first.run_id), str(other.run_id)]
+
+
+def test_submit_batch_reuses_existing_runs(db, redis_client):
+    service = JobService(db, QueueService(redis_client))
+    done = service.submit_batch(jobs("a b &&")).jobs[0]
+    db.runs[done.run_id]["status"] = JobStatus.COMPLETED
+
+    response = service.submit_batch(jobs("a b &&", "b c ||"))
+
+    assert response.jobs[0].run_id == done.run_id
+    assert response.jobs[0].status == JobStatus.COMPLETED
+    assert response.jobs[0].msg.startswith("Cached result found")
+    assert response.jobs[1].status == JobStatus.QUEUED
+    assert len(db.runs) == 2
+
+
+def test_submit_batch_retries_timed_out_runs(db, redis_client):
+    service = JobService(db, QueueService(redis_client))
+    timed_out = service.submit_batch(jobs("a b &&")).jobs[0]
+    db.runs[timed_out.run_id]["status"] = JobStatus.TIMEOUT
+
+    retry = service.submit_batch(jobs("a b &&")).jobs[0]
+
+    assert retry.run_id != timed_out.run_id
+    assert retry.status == JobStatus.QUEUED
+
+
+def test_submit_batch_lanes_and_timeouts(db, redis_client):
+    queue = QueueService(redis_client)
+    service = JobService(db, queue)
+    run_id = service.submit_batch(jobs("a b &&", mode=SolverMode.CNF_SUDOKU)).jobs[0].run_id
+
+    assert redis_client.lrange(queue.LANE_QUEUES[QueueLane.SUDOKU], 0, -1) == [str(run_id)]
+    assert db.runs[run_id]["timeout_s"] == service._timeout_for(SolverMode.CNF_SUDOKU)
+
+
+def test_submit_batch_rejects_invalid_formula(db, redis_client):
+    service = JobService(db, QueueService(redis_client))
+    with pytest.raises(HTTPException) as e:
+        service.submit_batch(jobs("a b &&", "a $ b"))
+
+    assert e.value.status_code == 400
+    assert "formula 1" in e.value.detail
+    assert db.calls == []
+
+
+def test_submit_batch_fails_runs_without_redis(db, redis_server, redis_client):
+    redis_server.connected = False
+    service = JobService(db, QueueService(redis_client))
+    with pytest.raises(HTTPException) as e:
+        service.submit_batch(jobs("a b &&", "c !"))
+
+    assert e.value.status_code == 503
+    assert [run["status"] for run in db.runs.values()] == [JobStatus.FAILED] * 2
+
+
+def test_submit_batch_failure_invalidates_cached_statuses(db, redis_server, redis_client):
+    cache = RunCache(fakeredis.FakeRedis(decode_responses=True))
+    # a poll cached the new runs as QUEUED before the enqueue failed
+    cache.set_statuses({1: JobStatus.QUEUED, 2: JobStatus.QUEUED})
+    redis_server.connected = False
+    service = JobService(db, QueueService(redis_client), cache)
+    with pytest.raises(HTTPException):
+        service.submit_batch(jobs("a b &&", "c !"))
+
+    assert cache.get_statuses([1, 2]) == {}
+
+
+def test_get_run_statuses(db, redis_client):
+    cache = RunCache(redis_client)
+    service = JobService(db, QueueService(redis_client), cache)
+    run_ids = [job.run_id for job in service.submit_batch(jobs("a", "b", "c")).jobs]
+    cache.set_status(run_ids[0], JobStatus.PROCESSING)
+    db.calls.clear()
+
+    response = service.get_run_statuses([run_ids[0], 999, run_ids[1], run_ids[0], run_ids[2]])
+
+    assert [(run.run_id, run.status) for run in response.runs] == [
+        (run_ids[0], JobStatus.PROCESSING),
+        (run_ids[1], JobStatus.QUEUED),
+        (run_ids[2], JobStatus.QUEUED),
+    ]
+    assert response.missing == [999]
+    assert db.calls == ["get_run_statuses"]
+    # the misses are cached for the next poll
+    assert cache.get_statuses(run_ids) == {run_id: run.status for run_id, run in zip(run_ids, response.runs)}
@@ -0,0 +1,76 @@
+import sys
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.solvers.native import (
+    FLAG_CDCL,
+    FLAG_DIMACS,
+    FLAG_PREPROCESS,
+    RESULT_ERROR,
+    RESULT_SAT,
+    RESULT_UNKNOWN,
+    RESULT_UNSAT,
+    NativeSolver,
+)
+from backend.app.solvers.output import COMPACT_OUTPUT_ARG, parse_solver_output
+
+LIBRARY_PATH = project_root / "bin" / "libsatsolver.so"
+SOLVER_PATH = str(project_root / "bin" / "satsolver_opt")
+DATA = project_root / "test" / "data"
+
+pytestmark = pytest.mark.skipif(not LIBRARY_PATH.exists(), reason="solver library not built")
+
+
+@pytest.fixture(scope="module")
+def native():
+    return NativeSolver(str(LIBRARY_PATH))
+
+
+@pytest.mark.parametrize("name", sorted(p.name for p in (DATA / "solver").glob("*.in")))
+def test_matches_cli(native, name):
+    formula = (DATA / "solver" / name).read_text()
+    single = subprocess.run([SOLVER_PATH, COMPACT_OUTPUT_ARG], input=formula, capture_output=True, text=True)
+    process = native.solve(formula).to_completed_process([SOLVER_PATH, COMPACT_OUTPUT_ARG])
+
+    assert process.returncode == single.returncode
+    assert parse_solver_output(process.stdout) == parse_solver_output(single.stdout)
+
+
+def test_flags(native):
+    assert native.solve("a a ! &&", FLAG_CDCL | FLAG_PREPROCESS).rc == RESULT_UNSAT
+    result = native.solve("x y || z ! &&", FLAG_PREPROCESS)
+    assert result.rc == RESULT_SAT
+    assert result.assignment["z"] is False
+
+    cnf = (DATA / "dimacs" / "public_pigeonhole54_unsat.cnf").read_text()
+    assert native.solve(cnf, FLAG_DIMACS | FLAG_CDCL).rc == RESULT_UNSAT
+
+
+def test_invalid_input(native):
+    result = native.solve("a b")
+    assert result.rc == RESULT_ERROR
+    assert result.error.startswith("Error: ")
+    # the library stays usable after an error
+    assert native.solve("a").rc == RESULT_SAT
+
+
+def test_conflict_limit(native):
+    cnf = (DATA / "dimacs" / "public_pigeonhole54_unsat.cnf").read_text()
+    assert native.solve(cnf, FLAG_DIMACS, conflict_limit=1).rc == RESULT_UNKNOWN
+
+
+def test_concurrent_solves(native):
+    formulas = [f"a{i} b{i} && c{i} ! &&" for i in range(50)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(native.solve, formulas))
+
+    for i, result in enumerate(results):
+        assert result.rc == RESULT_SAT
+        assert result.assignment == {f"a{i}": True, f"b{i}": True, f"c{i}": False}
@@ -0,0 +1,162 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+pytestmark = pytest.mark.lua
+
+from backend.app.core.constants import QueueLane, SolverMode, SMALL_JOB_MAX_COST
+from backend.app.services.queue_service import QueueService, lane_for
+
+
+@pytest.fixture
+def queue(redis_client):
+    return QueueService(redis_client)
+
+
+def enqueue(queue, run_id, lane):
+    queue.enqueue(run_id, {"formula": "a", "lane": lane})
+
+
+def test_lane_for():
+    assert lane_for(SolverMode.CNF_SUDOKU, 0) == QueueLane.SUDOKU
+    assert lane_for("RPN", SMALL_JOB_MAX_COST) == QueueLane.SMALL
+    assert lane_for("RPN", SMALL_JOB_MAX_COST + 1) == QueueLane.LARGE
+
+
+def test_enqueue_uses_lane_lists(queue):
+    enqueue(queue, 1, QueueLane.SMALL)
+    enqueue(queue, 2, QueueLane.SUDOKU)
+    queue.enqueue(3, {"formula": "a"})
+
+    assert queue.redis.lrange(queue.PENDING_QUEUE, 0, -1) == ["1", "3"]
+    assert queue.redis.lrange(queue.LANE_QUEUES[QueueLane.SUDOKU], 0, -1) == ["2"]
+    assert queue.redis.hget(queue.JOB_META_KEY.format(run_id=2), "lane") == QueueLane.SUDOKU
+
+
+def test_enqueue_many(queue):
+    queue.enqueue_many([
+        (1, {"formula": "a", "lane": QueueLane.SMALL}),
+        (2, {"formula": "b", "lane": QueueLane.LARGE}),
+        (3, {"formula": "c", "lane": QueueLane.SMALL}),
+    ])
+
+    assert queue.redis.lrange(queue.PENDING_QUEUE, 0, -1) == ["1", "3"]
+    assert queue.redis.lrange(queue.LANE_QUEUES[QueueLane.LARGE], 0, -1) == ["2"]
+    assert sorted(run_id for run_id, _ in queue.claim_many(3, timeout_s=0)) == [1, 2, 3]
+
+
+def test_claim_weighted_across_lanes(queue):
+    # a backlog of sudoku jobs queued before the SAT jobs
+    for run_id in range(100, 120):
+        enqueue(queue, run_id, QueueLane.SUDOKU)
+    for run_id in range(20):
+        enqueue(queue, run_id, QueueLane.SMALL)
+
+    claimed = [queue.claim(timeout_s=0)[0] for _ in range(10)]
+    small = [run_id for run_id in claimed if run_id < 100]
+    # weights 4:1 among the two non-empty lanes
+    assert len(small) == 8
+    assert claimed[0] < 100
+
+
+def test_claim_falls_through_empty_lanes(queue):
+    enqueue(queue, 1, QueueLane.SUDOKU)
+    assert queue.claim(timeout_s=0)[0] == 1
+    assert queue.claim(timeout_s=0) is None
+
+
+def test_claim_restricted_to_lanes(queue):
+    enqueue(queue, 1, QueueLane.SUDOKU)
+    enqueue(queue, 2, QueueLane.SMALL)
+    assert queue.claim(timeout_s=1, lanes=[QueueLane.SUDOKU])[0] == 1
+
+    start = time.monotonic()
+    assert queue.claim(timeout_s=0.2, lanes=[QueueLane.SUDOKU, QueueLane.LARGE]) is None
+    assert time.monotonic() - start >= 0.2
+
+
+def test_estimate_cost():
+    pytest.importorskip("fastapi")
+    from backend.app.utils.formula import estimate_cost
+
+    assert estimate_cost("a") == 1
+    assert estimate_cost("a b && a ! ||") == 2 + 3 + 2 + 3
+
+
+def test_claim_updates_meta(queue):
+    enqueue(queue, 1, QueueLane.SMALL)
+    before = int(time.time())
+
+    assert queue.claim(timeout_s=0) == (1, {"formula": "a", "lane": QueueLane.SMALL})
+    meta = queue.redis.hgetall(queue.JOB_META_KEY.format(run_id=1))
+    assert meta["attempts"] == "1"
+    assert int(meta["last_claimed_at"]) >= before
+    assert queue.redis.lrange(queue.PROCESSING_QUEUE, 0, -1) == ["1"]
+
+
+def test_claim_many(queue):
+    for run_id in range(5):
+        enqueue(queue, run_id, QueueLane.SMALL)
+    enqueue(queue, 9, QueueLane.LARGE)
+
+    jobs = queue.claim_many(4, timeout_s=0)
+    assert len(jobs) == 4
+    assert 9 in [run_id for run_id, _ in jobs]
+    assert len(queue.claim_many(4, timeout_s=0)) == 2
+    assert queue.claim_many(4, timeout_s=0) == []
+    assert queue.redis.llen(queue.PROCESSING_QUEUE) == 6
+
+
+def test_claim_drops_broken_jobs(queue):
+    queue.redis.rpush(queue.PENDING_QUEUE, "x", "2", "3")
+    queue.redis.set(queue.JOB_PAYLOAD_KEY.format(run_id=3), "{")
+    enqueue(queue, 4, QueueLane.SMALL)
+
+    assert queue.claim_many(4, timeout_s=0) == [(4, {"formula": "a", "lane": QueueLane.SMALL})]
+    assert queue.redis.lrange(queue.PROCESSING_QUEUE, 0, -1) == ["4"]
+
+
+def test_single_lane_claim_waits_for_job(queue):
+    timer = threading.Timer(0.1, enqueue, (queue, 5, QueueLane.SMALL))
+    timer.start()
+    try:
+        assert queue.claim(timeout_s=2, lanes=[QueueLane.SMALL])[0] == 5
+    finally:
+        timer.join()
+    assert queue.redis.hget(queue.JOB_META_KEY.format(run_id=5), "attempts") == "1"
+
+
+def test_idle_claim_picks_up_small_job_at_once(queue):
+    arrived = []
+
+    def enqueue_small():
+        arrived.append(time.monotonic())
+        enqueue(queue, 6, QueueLane.SMALL)
+
+    # the worker has been idle for longer than CLAIM_POLL_MAX_S when the job arrives
+    timer = threading.Timer(0.5, enqueue_small)
+    timer.start()
+    try:
+        assert queue.claim(timeout_s=2)[0] == 6
+        picked_up = time.monotonic()
+    finally:
+        timer.join()
+    assert picked_up - arrived[0] < 0.05
+
+
+def test_idle_claim_sees_other_lanes(queue):
+    timer = threading.Timer(0.1, enqueue, (queue, 7, QueueLane.SUDOKU))
+    timer.start()
+    try:
+        start = time.monotonic()
+        assert queue.claim(timeout_s=2)[0] == 7
+    finally:
+        timer.join()
+    assert time.monotonic() - start < 0.1 + queue.CLAIM_POLL_MAX_S + 0.05
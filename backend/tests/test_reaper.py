@@ -0,0 +1,71 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+pytestmark = pytest.mark.lua
+
+from backend.app.core.constants import JobStatus, TIMEOUT_S_SAT
+from backend.app.services.queue_service import QueueService
+from backend.app.services.reaper import QueueReaper
+
+
+@pytest.fixture
+def queue(redis_client):
+    return QueueService(redis_client, max_attempts=2)
+
+
+def make_reaper(queue, db):
+    return QueueReaper(queue, db, grace_s=10)
+
+
+def test_recent_claims_are_kept(queue, db):
+    queue.enqueue(1, {"formula": "a", "timeout_s": TIMEOUT_S_SAT})
+    queue.claim()
+
+    assert make_reaper(queue, db).reap_once(now=int(time.time()) + TIMEOUT_S_SAT) == 0
+    assert queue.redis.lrange(queue.PROCESSING_QUEUE, 0, -1) == ["1"]
+    assert db.statuses == {}
+
+
+def test_abandoned_job_is_requeued_then_dead_lettered(queue, db):
+    reaper = make_reaper(queue, db)
+    queue.enqueue(1, {"formula": "a", "timeout_s": TIMEOUT_S_SAT})
+
+    queue.claim()
+    assert reaper.reap_once(now=int(time.time()) + TIMEOUT_S_SAT + 11) == 1
+    assert queue.redis.lrange(queue.PENDING_QUEUE, 0, -1) == ["1"]
+    assert queue.redis.llen(queue.PROCESSING_QUEUE) == 0
+    assert db.statuses[1] == JobStatus.QUEUED
+
+    # the second claim exhausts max_attempts
+    assert queue.claim() == (1, {"formula": "a", "timeout_s": TIMEOUT_S_SAT})
+    assert reaper.reap_once(now=int(time.time()) + TIMEOUT_S_SAT + 11) == 1
+    assert queue.redis.lrange(queue.DEAD_QUEUE, 0, -1) == ["1"]
+    assert queue.redis.llen(queue.PENDING_QUEUE) == 0
+    assert queue.redis.get(queue.JOB_STATUS_KEY.format(run_id=1)) == JobStatus.FAILED
+    assert db.statuses[1] == JobStatus.FAILED
+    assert db.results[1]["error_type"] == "ABANDONED"
+
+
+def test_late_ack_wins(queue, db):
+    queue.enqueue(1, {"formula": "a", "timeout_s": TIMEOUT_S_SAT})
+    queue.claim()
+    queue.ack(1)
+
+    assert make_reaper(queue, db).reap_once(now=int(time.time()) + 10_000) == 0
+    assert queue.redis.llen(queue.PENDING_QUEUE) == 0
+    assert db.statuses == {}
+
+
+def test_job_without_data_is_failed(queue, db):
+    queue.redis.rpush(queue.PROCESSING_QUEUE, "7")
+
+    assert make_reaper(queue, db).reap_once() == 1
+    assert queue.redis.llen(queue.PROCESSING_QUEUE) == 0
+    assert db.statuses[7] == JobStatus.FAILED
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.core.constants import JobStatus
+from backend.app.services.result_batcher import ResultBatcher
+
+
+def result(run_id):
+    return dict(
+        result="SAT",
+        assignment={"a": True},
+        stdout="s SATISFIABLE\nv a\n",
+        stderr="",
+        error_type=None,
+        error_message=None,
+        runtime_s=0,
+    )
+
+
+def test_results_are_committed_in_batches(db):
+    acked = []
+    batcher = ResultBatcher(db, interval_s=0.2, max_batch=50)
+    batcher.start()
+    for run_id in range(120):
+        batcher.submit(run_id, JobStatus.COMPLETED, on_commit=lambda run_id=run_id: acked.append(run_id), **result(run_id))
+    batcher.stop()
+
+    assert sum(len(batch) for batch in db.batches) == 120
+    assert len(db.batches) <= 4
+    assert max(len(batch) for batch in db.batches) == 50
+    # acks only after the commit, in submit order
+    assert acked == list(range(120))
+
+
+def test_failed_batch_is_retried_one_by_one(db):
+    db.fail_batches, db.bad_run_id = True, 2
+    acked, failed = [], []
+    batcher = ResultBatcher(db, interval_s=0.05)
+    batcher.start()
+    for run_id in range(4):
+        batcher.submit(
+            run_id,
+            JobStatus.COMPLETED,
+            on_commit=lambda run_id=run_id: acked.append(run_id),
+            on_error=lambda e, run_id=run_id: failed.append(run_id),
+            **result(run_id),
+        )
+    batcher.stop()
+
+    assert db.single == [0, 1, 3]
+    assert acked == [0, 1, 3]
+    assert failed == [2]
+
+
+def test_stop_without_results(db):
+    batcher = ResultBatcher(db, interval_s=0.05)
+    batcher.start()
+    batcher.stop()
+    assert batcher.pending() == 0
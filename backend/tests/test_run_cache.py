@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.core.constants import JobStatus
+from backend.app.services.run_cache import RunCache
+
+
+@pytest.fixture
+def cache(redis_client):
+    return RunCache(redis_client, result_ttl_s=3600, min_ttl_s=30, size_reference=1000, max_entry_bytes=100_000)
+
+
+def entry(run_id, assignment):
+    return dict(
+        status=JobStatus.COMPLETED,
+        run_id=run_id,
+        formula_id=7,
+        formula="a b &&",
+        result="SAT",
+        assignment=assignment,
+        runtime=0.01,
+    )
+
+
+def test_result_ttl_shrinks_with_size(cache):
+    assert cache.result_ttl(100) == 3600
+    assert cache.result_ttl(2000) == 1800
+    assert cache.result_ttl(99_000) == 36
+    assert cache.result_ttl(100_001) is None
+
+
+def test_set_result(cache):
+    cache.set_result(1, entry(1, {"a": True, "b": True}))
+
+    assert cache.get_entry(1) == (JobStatus.COMPLETED, entry(1, {"a": True, "b": True}))
+    assert cache.get_status(1) == JobStatus.COMPLETED
+    assert 3590 < cache.redis.ttl(cache.RESULT_KEY.format(run_id=1)) <= 3600
+
+
+def test_large_result_has_short_ttl(cache):
+    cache.set_result(1, entry(1, {f"x{i}": True for i in range(500)}))
+    assert cache.redis.ttl(cache.RESULT_KEY.format(run_id=1)) < 600
+
+    cache.set_result(2, entry(2, {f"x{i}": True for i in range(20_000)}))
+    assert cache.get_entry(2) == (JobStatus.COMPLETED, None)
+
+
+def test_unfinished_status_expires_quickly(cache):
+    cache.set_status(1, JobStatus.PROCESSING)
+    assert cache.redis.ttl(cache.STATUS_KEY.format(run_id=1)) <= RunCache.STATUS_TTL_S
+    cache.set_status(1, JobStatus.FAILED)
+    assert cache.redis.ttl(cache.STATUS_KEY.format(run_id=1)) > RunCache.STATUS_TTL_S
+
+
+def test_invalidate(cache):
+    cache.set_result(1, entry(1, None))
+    cache.invalidate(1)
+    assert cache.get_entry(1) == (None, None)
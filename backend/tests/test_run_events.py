@@ -0,0 +1,78 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from backend.app.core.constants import JobStatus
+from backend.app.services.run_events import RunEventHub, RunEvents
+
+
+def make_hub(server):
+    return RunEventHub(lambda: fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+
+
+async def next_status(queue):
+    return await asyncio.wait_for(queue.get(), 2)
+
+
+def test_events_reach_the_subscribers_of_the_run(redis_server, redis_client):
+    events = RunEvents(redis_client)
+
+    async def scenario():
+        hub = make_hub(redis_server)
+        first = await hub.subscribe(1)
+        second = await hub.subscribe(1)
+        other = await hub.subscribe(2)
+        try:
+            events.publish(1, JobStatus.PROCESSING)
+            events.publish(1, JobStatus.COMPLETED)
+            for queue in (first, second):
+                assert await next_status(queue) == JobStatus.PROCESSING
+                assert await next_status(queue) == JobStatus.COMPLETED
+            assert other.empty()
+        finally:
+            await hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_unsubscribed_queue_gets_no_events(redis_server, redis_client):
+    events = RunEvents(redis_client)
+
+    async def scenario():
+        hub = make_hub(redis_server)
+        stale = await hub.subscribe(1)
+        hub.unsubscribe(1, stale)
+        live = await hub.subscribe(1)
+        try:
+            events.publish(1, JobStatus.FAILED)
+            assert await next_status(live) == JobStatus.FAILED
+            assert stale.empty()
+        finally:
+            await hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_publish_without_redis_is_best_effort(redis_server, redis_client):
+    redis_server.connected = False
+    RunEvents(redis_client).publish(1, JobStatus.COMPLETED)
+
+
+def test_subscribe_fails_without_redis(redis_server):
+    redis_server.connected = False
+
+    async def scenario():
+        hub = make_hub(redis_server)
+        with pytest.raises(Exception):
+            await hub.subscribe(1)
+        assert 1 not in hub._queues
+
+    asyncio.run(scenario())
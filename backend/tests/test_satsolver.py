@@ -0,0 +1,58 @@
+import sys
+import subprocess
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.core.config import settings
+from backend.app.solvers import satsolver
+from backend.app.solvers.native import RESULT_UNKNOWN, NativeResult
+
+
+class SlowNative:
+    """An in-process solver that hits its conflict limit after delay_s."""
+
+    path = "libsatsolver.so"
+
+    def __init__(self, delay_s):
+        self.delay_s = delay_s
+
+    def solve(self, formula, flags, conflict_limit):
+        time.sleep(self.delay_s)
+        return NativeResult(RESULT_UNKNOWN)
+
+
+@pytest.fixture
+def fallback(monkeypatch):
+    """Timeouts of the process fallback after an in-process attempt of 0.3 s."""
+    timeouts = []
+
+    def run(args, timeout, **kwargs):
+        timeouts.append(timeout)
+        return subprocess.CompletedProcess(args, 20, "s UNSATISFIABLE\n", "")
+
+    monkeypatch.setattr(settings, "SOLVER_LIBRARY_CONFLICT_LIMIT", 1)
+    monkeypatch.setattr(settings, "SOLVER_SERVER_POOL_SIZE", 0)
+    monkeypatch.setattr(satsolver, "get_native_solver", lambda path: SlowNative(0.3))
+    monkeypatch.setattr(satsolver.subprocess, "run", run)
+    return timeouts
+
+
+def test_in_process_attempt_counts_against_timeout(fallback):
+    process, runtime = satsolver.run_solver("a", run_id=1, formula_id=1, timeout_s=1, cdcl=False)
+
+    assert process.returncode == 20
+    assert len(fallback) == 1
+    assert fallback[0] <= 0.7
+    assert runtime < 1
+
+
+def test_no_time_left_after_in_process_attempt(fallback):
+    with pytest.raises(subprocess.TimeoutExpired):
+        satsolver.run_solver("a", run_id=1, formula_id=1, timeout_s=0.2, cdcl=False)
+    assert fallback == []
@@ -0,0 +1,79 @@
+import sys
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.solvers.server_pool import SolverServerPool
+
+SOLVER_PATH = str(project_root / "bin" / "satsolver_opt")
+
+pytestmark = pytest.mark.skipif(not Path(SOLVER_PATH).exists(), reason="solver binary not built")
+
+
+@pytest.fixture
+def pool():
+    pool = SolverServerPool(SOLVER_PATH, size=2, max_requests=3)
+    yield pool
+    pool.close()
+
+
+def test_results_match_single_runs(pool):
+    for formula, args in [("a b &&", []), ("a a ! &&", ["--cdcl"]), ("a b", []), ("x y || z ! <=>", [])]:
+        single = subprocess.run([SOLVER_PATH, *args], input=formula, capture_output=True, text=True)
+        pooled = pool.solve(formula, args)
+
+        assert pooled.returncode == single.returncode
+        assert pooled.stdout == single.stdout
+        assert pooled.stderr == single.stderr
+
+
+def test_invalid_option(pool):
+    assert pool.solve("a", ["--bogus"]).returncode == 2
+    assert pool.solve("a").returncode == 10
+
+
+def test_concurrent_requests(pool):
+    formulas = [f"a{i} b{i} && c{i} ! &&" for i in range(20)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(pool.solve, formulas))
+
+    for i, result in enumerate(results):
+        assert result.returncode == 10
+        assert f"c{i} -> FALSE" in result.stdout
+
+
+def test_dead_server_is_replaced(pool):
+    pool.solve("a")
+    server = pool._slots.get()
+    server.process.kill()
+    server.process.wait()
+    pool._slots.put(server)
+
+    assert pool.solve("a").returncode == 10
+
+
+def test_missing_binary():
+    pool = SolverServerPool(str(project_root / "bin" / "does-not-exist"))
+    with pytest.raises(FileNotFoundError):
+        pool.solve("a")
+
+
+def test_wait_for_free_server_counts_against_timeout():
+    pool = SolverServerPool(SOLVER_PATH, size=1)
+    try:
+        busy = pool._slots.get()
+        start = time.monotonic()
+        with pytest.raises(subprocess.TimeoutExpired):
+            pool.solve("a", timeout_s=0.2)
+        assert time.monotonic() - start < 1
+        pool._slots.put(busy)
+        assert pool.solve("a").returncode == 10
+    finally:
+        pool.close()
@@ -0,0 +1,160 @@
+"""Concurrent identical submissions against a real Postgres, set TEST_DATABASE_DSN to run them.
+
+CI runs them against a Postgres service container. Locally they are skipped without the DSN, e.g.
+TEST_DATABASE_DSN="host=localhost dbname=postgres user=postgres" pytest backend/tests/test_single_flight.py
+The tests create their tables in a scratch schema and drop it afterwards.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+DSN = os.environ.get("TEST_DATABASE_DSN")
+pytestmark = [pytest.mark.skipif(not DSN, reason="TEST_DATABASE_DSN not set"), pytest.mark.lua]
+
+psycopg2 = pytest.importorskip("psycopg2")
+pytest.importorskip("fastapi")
+
+from psycopg2.pool import ThreadedConnectionPool
+
+from backend.app.core.constants import JobStatus
+from backend.app.schemas.job import JobSubmitRequest
+from backend.app.services.database_service import DatabaseService
+from backend.app.services.job_service import JobService
+from backend.app.services.queue_service import QueueService
+from backend.app.worker import Worker
+
+SCHEMA = "single_flight_test"
+SUBMITTERS = 16
+
+TABLES = """
+CREATE TABLE formulas (id SERIAL PRIMARY KEY, normalized_input TEXT NOT NULL, hash TEXT UNIQUE NOT NULL,
+    notation TEXT NOT NULL, created_at TIMESTAMPTZ DEFAULT NOW());
+CREATE TABLE runs (id SERIAL PRIMARY KEY, formula_id INT REFERENCES formulas(id), status TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(), started_at TIMESTAMPTZ, finished_at TIMESTAMPTZ, timeout_s INT, mode TEXT);
+CREATE TABLE results (id SERIAL PRIMARY KEY, run_id INT UNIQUE REFERENCES runs(id), result TEXT, assignment JSONB,
+    stdout TEXT, stderr TEXT, error_type TEXT, error_message TEXT, runtime_s DOUBLE PRECISION);
+"""
+
+
+@pytest.fixture
+def pool():
+    admin = psycopg2.connect(DSN)
+    admin.autocommit = True
+    with admin.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}; SET search_path TO {SCHEMA};")
+        cur.execute(TABLES)
+    pool = ThreadedConnectionPool(1, SUBMITTERS, DSN, options=f"-c search_path={SCHEMA}")
+    yield pool
+    pool.closeall()
+    with admin.cursor() as cur:
+        cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE;")
+    admin.close()
+
+
+@pytest.fixture
+def service(pool, redis_client):
+    db = DatabaseService(pool.getconn, pool.putconn)
+    return JobService(db, QueueService(redis_client))
+
+
+def submit_concurrently(submit, n=SUBMITTERS):
+    """Call submit(i) from n threads released at once, returns the run ids."""
+    barrier = threading.Barrier(n)
+    run_ids = [None] * n
+    errors = []
+
+    def submitter(i):
+        try:
+            barrier.wait()
+            run_ids[i] = submit(i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=submitter, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    return run_ids
+
+
+def count_runs(pool):
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT count(*) FROM runs;")
+            return cur.fetchone()[0]
+    finally:
+        conn.rollback()
+        pool.putconn(conn)
+
+
+def test_concurrent_submits_share_one_run(pool, service):
+    # the race window is short, so retry it for many formulas
+    for k in range(50):
+        # the same formula with different whitespace, as retries of clients send it
+        run_ids = submit_concurrently(lambda i: service.submit_job(f"a{k} " + " " * (i % 3) + f"b{k} &&").run_id)
+        assert len(set(run_ids)) == 1
+    assert count_runs(pool) == 50
+
+
+def test_concurrent_batches_and_submits_share_runs(pool, service):
+    formulas = [f"c{k} d{k} ||" for k in range(20)]
+
+    def submit(i):
+        if i % 2:
+            return service.submit_job(formulas[i % len(formulas)]).run_id
+        # batches in different orders, all of them contain every formula
+        order = formulas[i:] + formulas[:i]
+        response = service.submit_batch([JobSubmitRequest(formula=formula) for formula in order])
+        return next(job.run_id for job in response.jobs if job.formula == formulas[i % len(formulas)])
+
+    submit_concurrently(submit)
+    assert count_runs(pool) == len(formulas)
+
+
+def test_concurrent_submits_solve_once(pool, service, monkeypatch):
+    calls = []
+
+    def run_solver(formula, run_id, formula_id, timeout_s):
+        calls.append(formula)
+        return subprocess.CompletedProcess([], 10, "s SATISFIABLE\nv a b\n", ""), 0.01
+
+    monkeypatch.setattr("backend.app.worker.run_solver", run_solver)
+    formulas = [f"e{k} f{k} &&" for k in range(20)]
+    run_ids = []
+    for formula in formulas:
+        submitted = submit_concurrently(lambda i: service.submit_job(formula).run_id)
+        assert len(set(submitted)) == 1
+        run_ids.append(submitted[0])
+
+    worker = Worker(service.queue, service.db, poll_timeout_s=0.05, concurrency=4)
+    worker.install_signal_handlers = lambda: None
+    thread = threading.Thread(target=worker.run_forever)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while len(calls) < len(formulas) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # give the worker the chance to claim anything else that might have been queued
+        time.sleep(0.2)
+    finally:
+        worker.running = False
+        thread.join(timeout=5)
+
+    # one solver invocation per formula, however many clients submitted it
+    assert sorted(calls) == sorted(formulas)
+    assert service.get_run_statuses(run_ids).missing == []
+    assert all(run.status == JobStatus.COMPLETED for run in service.get_run_statuses(run_ids).runs)
+    # a resubmit after the run finished returns its result instead of solving again
+    assert service.submit_job(formulas[0]).run_id == run_ids[0]
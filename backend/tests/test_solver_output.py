@@ -0,0 +1,43 @@
+import sys
+import subprocess
+from pathlib import Path
+
+import pytest
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.solvers.output import COMPACT_OUTPUT_ARG, format_compact_output, parse_solver_output
+
+SOLVER_PATH = project_root / "bin" / "satsolver_opt"
+DATA = project_root / "test" / "data"
+
+
+def test_text_format():
+    stdout = "SAT: Assignment is\n  a -> TRUE\n  b -> FALSE\n"
+    assert parse_solver_output(stdout) == ("SAT", {"a": True, "b": False})
+    assert parse_solver_output("UNSAT\n") == ("UNSAT", None)
+
+
+def test_compact_format():
+    stdout = "s SATISFIABLE\nv a -b\nv v -c\n"
+    assert parse_solver_output(stdout) == ("SAT", {"a": True, "b": False, "v": True, "c": False})
+    assert parse_solver_output("s UNSATISFIABLE\n") == ("UNSAT", None)
+
+
+def test_format_round_trip():
+    assignment = {f"x{i}": i % 3 == 0 for i in range(100)}
+    assert parse_solver_output(format_compact_output(assignment)) == ("SAT", assignment)
+    assert parse_solver_output(format_compact_output(None)) == ("UNSAT", None)
+
+
+@pytest.mark.skipif(not SOLVER_PATH.exists(), reason="solver binary not built")
+@pytest.mark.parametrize("name", sorted(p.name for p in (DATA / "solver").glob("*.in")))
+def test_formats_agree(name):
+    path = str(DATA / "solver" / name)
+    text = subprocess.run([str(SOLVER_PATH), path], capture_output=True, text=True)
+    compact = subprocess.run([str(SOLVER_PATH), COMPACT_OUTPUT_ARG, path], capture_output=True, text=True)
+
+    assert compact.returncode == text.returncode
+    assert parse_solver_output(compact.stdout) == parse_solver_output(text.stdout)
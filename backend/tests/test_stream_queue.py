@@ -0,0 +1,110 @@
+import functools
+import sys
+from pathlib import Path
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.core.constants import JobStatus
+from backend.app.services.reaper import fail_abandoned_run
+from backend.app.services.run_cache import RunCache
+from backend.app.services.stream_queue_service import StreamQueueService
+
+
+def make_queue(redis_client, consumer, reclaim_idle_s=300, on_dead_letter=None):
+    return StreamQueueService(redis_client, consumer=consumer, reclaim_idle_s=reclaim_idle_s, on_dead_letter=on_dead_letter)
+
+
+def test_enqueue_claim_ack(redis_client):
+    queue = make_queue(redis_client, "w1")
+    queue.enqueue(1, {"formula": "a b &&"})
+    queue.enqueue(2, {"formula": "a"})
+
+    assert queue.claim() == (1, {"formula": "a b &&"})
+    assert queue.claim() == (2, {"formula": "a"})
+    assert queue.claim(timeout_s=0) is None
+
+    queue.ack(1)
+    queue.ack(2)
+    assert redis_client.xlen(queue.STREAM) == 0
+    assert redis_client.xpending(queue.STREAM, queue.GROUP)["pending"] == 0
+    assert not redis_client.exists(queue.JOB_PAYLOAD_KEY.format(run_id=1))
+
+
+def test_jobs_of_dead_worker_are_reclaimed(redis_client):
+    queue = make_queue(redis_client, "w1")
+    queue.enqueue(1, {"formula": "a"})
+    assert queue.claim()[0] == 1
+    # w1 dies without ack, w2 takes the job over once it is idle long enough
+
+    patient = make_queue(redis_client, "w2")
+    assert patient.claim(timeout_s=0) is None
+
+    eager = make_queue(redis_client, "w3", reclaim_idle_s=0)
+    assert eager.claim(timeout_s=0) == (1, {"formula": "a"})
+    assert redis_client.hget(queue.JOB_META_KEY.format(run_id=1), "attempts") == "2"
+
+    eager.ack(1)
+    assert redis_client.xpending(queue.STREAM, queue.GROUP)["pending"] == 0
+
+
+def test_exhausted_jobs_move_to_dead_queue(redis_client):
+    queue = make_queue(redis_client, "w1", reclaim_idle_s=0)
+    queue.enqueue(1, {"formula": "a"})
+
+    for _ in range(queue.max_attempts):
+        assert queue.claim(timeout_s=0)[0] == 1
+
+    assert queue.claim(timeout_s=0) is None
+    assert redis_client.lrange(queue.DEAD_QUEUE, 0, -1) == ["1"]
+    assert redis_client.get(queue.JOB_STATUS_KEY.format(run_id=1)) == JobStatus.FAILED
+    assert redis_client.xpending(queue.STREAM, queue.GROUP)["pending"] == 0
+
+
+def test_exhausted_jobs_fail_their_run(redis_client, db):
+    cache = RunCache(redis_client)
+    queue = make_queue(redis_client, "w1", reclaim_idle_s=0, on_dead_letter=functools.partial(fail_abandoned_run, db, cache=cache))
+    queue.enqueue(1, {"formula": "a"})
+    for _ in range(queue.max_attempts):
+        assert queue.claim(timeout_s=0)[0] == 1
+    cache.set_status(1, JobStatus.PROCESSING)
+
+    assert queue.claim(timeout_s=0) is None
+    # the runs row leaves PROCESSING, so resubmissions no longer attach to the dead run
+    assert db.statuses == {1: JobStatus.FAILED}
+    assert db.results[1]["error_type"] == "ABANDONED"
+    assert db.results[1]["error_message"] == f"Abandoned after {queue.max_attempts} attempts"
+    assert cache.get_status(1) is None
+
+
+def test_dead_letter_hook_errors_do_not_fail_the_claim(redis_client):
+    def broken_hook(run_id, reason):
+        raise RuntimeError("database down")
+
+    queue = make_queue(redis_client, "w1", reclaim_idle_s=0, on_dead_letter=broken_hook)
+    queue.enqueue(1, {"formula": "a"})
+    for _ in range(queue.max_attempts):
+        queue.claim(timeout_s=0)
+
+    assert queue.claim(timeout_s=0) is None
+    assert redis_client.lrange(queue.DEAD_QUEUE, 0, -1) == ["1"]
+
+
+def test_fail_removes_entry(redis_client):
+    queue = make_queue(redis_client, "w1", reclaim_idle_s=0)
+    queue.enqueue(1, {"formula": "a"})
+    queue.claim()
+    queue.fail(1, reason="boom")
+
+    assert queue.claim(timeout_s=0) is None
+    assert redis_client.hget(queue.JOB_META_KEY.format(run_id=1), "last_error") == "boom"
+
+
+def test_missing_payload_is_dropped(redis_client):
+    queue = make_queue(redis_client, "w1")
+    queue.enqueue(1, {"formula": "a"})
+    redis_client.delete(queue.JOB_PAYLOAD_KEY.format(run_id=1))
+
+    assert queue.claim(timeout_s=0) is None
+    assert redis_client.xlen(queue.STREAM) == 0
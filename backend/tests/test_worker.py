@@ -0,0 +1,164 @@
+import sys
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+# Add the project root to sys.path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.app.core.constants import JobStatus, QueueLane
+from backend.app.services.result_batcher import ResultBatcher
+from backend.app.worker import Worker
+
+
+def make_slow_solver(delay_s, peak):
+    running = [0]
+    lock = threading.Lock()
+
+    def run_solver(formula, run_id, formula_id, timeout_s):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(delay_s)
+        with lock:
+            running[0] -= 1
+        return subprocess.CompletedProcess([], 20, "s UNSATISFIABLE\n", ""), delay_s
+
+    return run_solver
+
+
+def run_worker(worker, stop_when):
+    worker.install_signal_handlers = lambda: None
+    thread = threading.Thread(target=worker.run_forever)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not stop_when() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker.running = False
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+
+def test_jobs_run_concurrently(monkeypatch, fake_queue, db):
+    peak = [0]
+    monkeypatch.setattr("backend.app.worker.run_solver", make_slow_solver(0.2, peak))
+    jobs = [(i, {"formula": "a", "formula_id": i, "mode": "SAT"}) for i in range(8)]
+    fake_queue.jobs.extend(jobs)
+    worker = Worker(fake_queue, db, poll_timeout_s=0.05, concurrency=4)
+
+    start = time.monotonic()
+    run_worker(worker, lambda: len(fake_queue.acked) == 8)
+
+    assert peak[0] == 4
+    assert sorted(fake_queue.acked) == list(range(8))
+    assert all(status == JobStatus.COMPLETED for status in db.statuses.values())
+    # two rounds of four jobs instead of eight sequential ones
+    assert time.monotonic() - start < 1.2
+
+
+def test_shutdown_finishes_in_flight_jobs(monkeypatch, fake_queue, db):
+    peak = [0]
+    monkeypatch.setattr("backend.app.worker.run_solver", make_slow_solver(0.3, peak))
+    jobs = [(i, {"formula": "a", "formula_id": i, "mode": "SAT"}) for i in range(3)]
+    fake_queue.jobs.extend(jobs)
+    worker = Worker(fake_queue, db, poll_timeout_s=0.05, concurrency=3)
+
+    # stop as soon as all jobs are claimed, long before they are solved
+    run_worker(worker, lambda: len(worker.in_flight()) == 3)
+
+    assert sorted(fake_queue.acked) == [0, 1, 2]
+    assert worker.in_flight() == set()
+
+
+def test_small_lane_slot_stays_free(monkeypatch, fake_queue, db):
+    peak = [0]
+    monkeypatch.setattr("backend.app.worker.run_solver", make_slow_solver(0.3, peak))
+    jobs = [(i, {"formula": "a", "formula_id": i, "mode": "SAT", "lane": QueueLane.LARGE}) for i in range(4)]
+    jobs.append((4, {"formula": "a", "formula_id": 4, "mode": "SAT", "lane": QueueLane.SMALL}))
+    fake_queue.jobs.extend(jobs)
+    worker = Worker(fake_queue, db, poll_timeout_s=0.05, concurrency=2, small_lane_slots=1)
+
+    # the small job queued behind four large ones starts next to the first large one
+    run_worker(worker, lambda: 4 in fake_queue.acked)
+
+    assert fake_queue.acked[0] in (0, 4)
+    assert 4 in fake_queue.acked[:2]
+
+
+def test_batched_results_are_acked(monkeypatch, fake_queue, db):
+    peak = [0]
+    monkeypatch.setattr("backend.app.worker.run_solver", make_slow_solver(0.01, peak))
+    jobs = [(i, {"formula": "a", "formula_id": i, "mode": "SAT"}) for i in range(20)]
+    fake_queue.jobs.extend(jobs)
+    batcher = ResultBatcher(db, interval_s=0.1)
+    batcher.start()
+    worker = Worker(fake_queue, db, poll_timeout_s=0.05, concurrency=4, batcher=batcher)
+
+    run_worker(worker, lambda: len(db.statuses) == 20)
+    batcher.stop()
+
+    assert sorted(fake_queue.acked) == list(range(20))
+    assert all(status == JobStatus.COMPLETED for status in db.statuses.values())
+    assert len(db.batches) < 20
+
+
+def test_unstored_result_fails_the_run(monkeypatch, fake_queue, db, redis_client):
+    from backend.app.services.run_cache import RunCache
+
+    peak = [0]
+    monkeypatch.setattr("backend.app.worker.run_solver", make_slow_solver(0.01, peak))
+    fake_queue.jobs.extend([(1, {"formula": "a", "formula_id": 1, "mode": "SAT"}), (2, {"formula": "a", "formula_id": 2, "mode": "SAT"})])
+    db.fail_batches, db.bad_run_id = True, 2
+    cache = RunCache(redis_client)
+    batcher = ResultBatcher(db, interval_s=0.05)
+    batcher.start()
+    worker = Worker(fake_queue, db, poll_timeout_s=0.05, concurrency=2, batcher=batcher, cache=cache)
+
+    run_worker(worker, lambda: fake_queue.acked == [1] and fake_queue.failed == [2])
+    batcher.stop()
+
+    # the result of run 2 is lost, but it no longer stays PROCESSING for later submits to reuse
+    assert db.statuses == {1: JobStatus.COMPLETED, 2: JobStatus.FAILED}
+    assert cache.get_entry(2) == (None, None)
+
+
+def test_run_that_cannot_be_failed_is_left_to_the_reaper(monkeypatch, fake_queue, db):
+    peak = [0]
+    monkeypatch.setattr("backend.app.worker.run_solver", make_slow_solver(0.01, peak))
+    fake_queue.jobs.append((2, {"formula": "a", "formula_id": 2, "mode": "SAT"}))
+    db.fail_batches, db.bad_run_id = True, 2
+    batcher = ResultBatcher(db, interval_s=0.05)
+    batcher.start()
+    worker = Worker(fake_queue, db, poll_timeout_s=0.05, batcher=batcher)
+
+    def update_run_status(run_id, status):
+        if status == JobStatus.FAILED:
+            raise RuntimeError("database down")
+        db.statuses[run_id] = status
+
+    monkeypatch.setattr(db, "update_run_status", update_run_status)
+    run_worker(worker, lambda: 2 in db.statuses and not worker.in_flight())
+    batcher.stop()
+
+    assert db.statuses == {2: JobStatus.PROCESSING}
+    assert fake_queue.failed == []
+    assert fake_queue.acked == []
+
+
+def test_finished_runs_are_cached(monkeypatch, fake_queue, db, redis_client):
+    from backend.app.services.run_cache import RunCache
+
+    peak = [0]
+    monkeypatch.setattr("backend.app.worker.run_solver", make_slow_solver(0.01, peak))
+    fake_queue.jobs.append((1, {"formula": "a", "formula_id": 3, "mode": "SAT"}))
+    cache = RunCache(redis_client)
+    worker = Worker(fake_queue, db, poll_timeout_s=0.05, cache=cache)
+
+    run_worker(worker, lambda: fake_queue.acked == [1])
+
+    status, entry = cache.get_entry(1)
+    assert status == JobStatus.COMPLETED
+    assert entry["formula_id"] == 3
+    assert entry["result"] == "UNSAT"
@@ -87,6 +87,9 @@ async function processCommand(command, panel) {
         case 'status':
             await checkStatus(args[0], panel);
             break;
+        case 'wait':
+            await waitForJob(args[0], panel);
+            break;
         case 'result':
             await getResult(args[0], panel);
             break;
@@ -129,6 +132,8 @@ function showHelp(panel) {
         '',
         '  status <run_id>     Check status of a job',
         '                      Example: status 42',
+        '  wait <run_id>       Follow a job until it finishes',
+        '                      Example: wait 42',
         '  result <run_id>     Get result of completed job',
         '                      Example: result 42',
         '  help                Show this help message',
@@ -240,6 +245,43 @@ async function checkStatus(runId, panel) {
     }
 }
 
+function waitForJob(runId, panel) {
+    if (!runId) {
+        appendOutput('Error: No run_id provided', panel, 'error');
+        appendOutput('Usage: wait <run_id>', panel, 'muted');
+        return;
+    }
+
+    appendOutput(`Waiting for run_id: ${runId}`, panel, 'info');
+
+    // The server pushes every status change and ends the stream with the final one
+    return new Promise(resolve => {
+        const source = new EventSource(`${API_BASE_URL}/jobs/events/${runId}`);
+        let finished = false;
+
+        source.addEventListener('status', (event) => {
+            const data = JSON.parse(event.data);
+            if (data.status === 'QUEUED' || data.status === 'PROCESSING') {
+                appendOutput(`run_id ${data.run_id}: ${data.status}`, panel, getStatusColor(data.status));
+                return;
+            }
+            finished = true;
+            source.close();
+            displayStatus(data, panel);
+            resolve();
+        });
+
+        source.onerror = () => {
+            // EventSource reconnects by itself unless the request failed, e.g. with 404
+            if (!finished && source.readyState === EventSource.CLOSED) {
+                appendOutput(`Error: Could not follow run_id ${runId}`, panel, 'error');
+                appendOutput('   Use "status <run_id>" to check that the run exists.', panel, 'muted');
+                resolve();
+            }
+        };
+    });
+}
+
 async function getResult(runId, panel) {
     if (!runId) {
         appendOutput('Error: No run_id provided', panel, 'error');
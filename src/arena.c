@@ -0,0 +1,96 @@
+#include "arena.h"
+
+#include <stdlib.h>
+
+#define MIN_CHUNK_SIZE 4096
+#define MAX_CHUNK_SIZE (1 << 20)
+
+/**
+ * Alignment of all allocations, sufficient for pointers and integers.
+ */
+typedef union Aligned {
+    void* p;
+    long l;
+    double d;
+} Aligned;
+
+#define ALIGNMENT sizeof(Aligned)
+
+/**
+ * Struct for a block of memory of an arena.
+ */
+typedef struct ArenaChunk {
+    struct ArenaChunk* prev;  // the chunk allocated before this one
+    Aligned data[];
+} ArenaChunk;
+
+Arena mkArena(void) {
+    Arena res = ARENA_INIT;
+    return res;
+}
+
+void* arenaAlloc(Arena* a, size_t size) {
+    size = (size + ALIGNMENT - 1) / ALIGNMENT * ALIGNMENT;
+
+    if (a->chunks == NULL || a->used + size > a->capacity) {
+        // chunks grow geometrically, large objects get a chunk of their own
+        size_t capacity = a->capacity == 0 ? MIN_CHUNK_SIZE : 2 * a->capacity;
+        if (capacity > MAX_CHUNK_SIZE) {
+            capacity = MAX_CHUNK_SIZE;
+        }
+        if (capacity < size) {
+            capacity = size;
+        }
+
+        ArenaChunk* chunk =
+            (ArenaChunk*)malloc(sizeof(ArenaChunk) + capacity);
+        chunk->prev = a->chunks;
+        a->chunks = chunk;
+        a->used = 0;
+        a->capacity = capacity;
+    }
+
+    void* res = (char*)a->chunks->data + a->used;
+    a->used += size;
+    return res;
+}
+
+void freeArena(Arena* a) {
+    while (a->chunks != NULL) {
+        ArenaChunk* prev = a->chunks->prev;
+        free(a->chunks);
+        a->chunks = prev;
+    }
+    a->used = 0;
+    a->capacity = 0;
+}
+
+Pool mkPool(size_t elem_size) {
+    Pool res = POOL_INIT(elem_size);
+    return res;
+}
+
+void* poolAlloc(Pool* p) {
+    p->live++;
+
+    if (p->free_list != NULL) {
+        void* res = p->free_list;
+        p->free_list = *(void**)res;
+        return res;
+    }
+
+    // freed objects have to hold the link of the free list
+    size_t size = p->elem_size < sizeof(void*) ? sizeof(void*) : p->elem_size;
+    return arenaAlloc(&p->arena, size);
+}
+
+void poolFree(Pool* p, void* elem) {
+    *(void**)elem = p->free_list;
+    p->free_list = elem;
+    p->live--;
+
+    if (p->live == 0) {
+        p->free_list = NULL;
+        freeArena(&p->arena);
+    }
+}
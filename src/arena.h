@@ -0,0 +1,91 @@
+#pragma once
+
+/**
+ * In this file, we provide two simple allocators for objects that are created
+ * in large numbers and live about equally long.
+ *
+ * An arena hands out memory from large chunks by bumping a pointer. Single
+ * objects cannot be freed, instead the whole arena is freed at once.
+ *
+ * A pool hands out objects of a fixed size from an arena and keeps freed
+ * objects in a free list for reuse. When the last object of a pool is freed,
+ * the memory of the arena is released.
+ */
+
+#include <stddef.h>
+
+struct ArenaChunk;
+
+/**
+ * Struct for a bump allocator. Should be initialized by mkArena or
+ * ARENA_INIT.
+ */
+typedef struct Arena {
+    struct ArenaChunk* chunks;  // most recent chunk first
+    size_t used;                // bytes used in the most recent chunk
+    size_t capacity;            // size of the most recent chunk
+} Arena;
+
+#define ARENA_INIT {NULL, 0, 0}
+
+/**
+ * Struct for an allocator of objects of a fixed size. Should be initialized
+ * by mkPool or POOL_INIT.
+ */
+typedef struct Pool {
+    size_t elem_size;
+    void* free_list;  // freed objects, linked through their first word
+    unsigned live;    // number of objects in use
+    Arena arena;
+} Pool;
+
+#define POOL_INIT(elem_size) {(elem_size), NULL, 0, ARENA_INIT}
+
+/**
+ * Creates a new empty arena.
+ *
+ * @return  the new arena
+ */
+Arena mkArena(void);
+
+/**
+ * Allocates memory from an arena. The memory is suitably aligned for any
+ * pointer or integer type and stays valid until the arena is freed.
+ *
+ * @param a     an arena
+ * @param size  the number of bytes
+ * @return      a pointer to the uninitialized memory
+ */
+void* arenaAlloc(Arena* a, size_t size);
+
+/**
+ * Frees all memory allocated from an arena. The arena is empty afterwards and
+ * can be used again.
+ *
+ * @param a  an arena
+ */
+void freeArena(Arena* a);
+
+/**
+ * Creates a new empty pool.
+ *
+ * @param elem_size  the size of the objects in bytes
+ * @return           the new pool
+ */
+Pool mkPool(size_t elem_size);
+
+/**
+ * Allocates an object from a pool.
+ *
+ * @param p  a pool
+ * @return   a pointer to the uninitialized object
+ */
+void* poolAlloc(Pool* p);
+
+/**
+ * Returns an object to its pool.
+ *
+ * @param p     the pool the object was allocated from
+ * @param elem  the object
+ */
+void poolFree(Pool* p, void* elem);
@@ -0,0 +1,528 @@
+#include "cdcl.h"
+
+#include <assert.h>
+#include <stdint.h>
+#include <stdlib.h>
+
+#include "trail.h"
+#include "vsids.h"
+#include "watch.h"
+
+#define INIT_LEARNED_SIZE 64
+
+// learned clauses with at most this LBD are never deleted periodically
+#define GLUE_LBD 2
+// number of conflicts before the first reduction, and the growth of the
+// interval between reductions
+#define REDUCE_FIRST 2000
+#define REDUCE_INCREMENT 300
+
+// number of conflicts that correspond to one step of the Luby sequence
+#define LUBY_UNIT 100
+// number of recent LBDs that are compared to the average
+#define GLUCOSE_WINDOW 50
+// restart if the recent LBDs times this factor exceed the average
+#define GLUCOSE_FACTOR 0.8
+
+/**
+ * A learned clause together with its literal block distance.
+ */
+typedef struct Learned {
+    Clause* clause;
+    unsigned lbd;
+} Learned;
+
+/**
+ * State of a CDCL run.
+ */
+typedef struct Solver {
+    VarTable* vt;
+    Watches* watches;
+    Vsids* vsids;  // only for activity-based decisions
+    SolverStats* stats;
+
+    Learned* learned;  // learned clauses, freed at the end
+    unsigned num_learned;
+    unsigned learned_capacity;
+    size_t learned_bytes;           // memory of the learned clauses
+    size_t learned_limit;           // in bytes, 0 means no limit
+    unsigned long next_reduce;      // conflicts at the next reduction
+    unsigned long reduce_interval;  // conflicts between two reductions
+
+    Restart restart;
+    unsigned long restart_conflicts;  // conflicts since the last restart
+    unsigned long luby_index;         // restarts so far, for RESTART_LUBY
+
+    unsigned* recent_lbd;  // ring buffer of the latest LBDs, for glucose
+    unsigned num_recent;
+    unsigned long recent_sum;  // sum of the LBDs in the ring buffer
+    unsigned long lbd_sum;     // sum of the LBDs of all learned clauses
+
+    unsigned* level_stamp;  // marks of decision levels to compute LBDs
+    unsigned stamp;
+
+    Trail* trail;  // all assigned literals with their decision levels
+
+    unsigned* level;   // decision level of every assigned variable
+    Clause** reason;   // implying clause of every assigned variable
+    char* seen;        // marks used during conflict analysis
+    Literal* learnt;   // buffer for the clause under construction
+} Solver;
+
+static void mkSolver(Solver* s, VarTable* vt, CNF* cnf,
+                     const SolverOptions* opts, SolverStats* stats) {
+    unsigned n = getVariableCount(vt) + 1;
+
+    s->vt = vt;
+    s->watches = mkWatches(vt, cnf);
+    s->vsids = opts->decision == DECIDE_VSIDS ? mkVsids(vt, cnf) : NULL;
+    s->stats = stats;
+
+    s->learned_capacity = INIT_LEARNED_SIZE;
+    s->learned = (Learned*)malloc(s->learned_capacity * sizeof(Learned));
+    s->num_learned = 0;
+    s->learned_bytes = 0;
+    s->learned_limit = (size_t)opts->learned_limit * 1024;
+    s->reduce_interval = REDUCE_FIRST;
+    s->next_reduce = REDUCE_FIRST;
+
+    s->restart = opts->restart;
+    s->restart_conflicts = 0;
+    s->luby_index = 0;
+    s->recent_lbd = (unsigned*)malloc(GLUCOSE_WINDOW * sizeof(unsigned));
+    s->num_recent = 0;
+    s->recent_sum = 0;
+    s->lbd_sum = 0;
+    s->level_stamp = (unsigned*)calloc(n, sizeof(unsigned));
+    s->stamp = 0;
+
+    s->trail = mkTrail(vt);
+
+    s->level = (unsigned*)calloc(n, sizeof(unsigned));
+    s->reason = (Clause**)calloc(n, sizeof(Clause*));
+    s->seen = (char*)calloc(n, sizeof(char));
+    s->learnt = (Literal*)malloc(n * sizeof(Literal));
+}
+
+static void freeSolver(Solver* s) {
+    for (unsigned i = 0; i < s->num_learned; i++) {
+        freeClause(s->learned[i].clause);
+    }
+    free(s->learned);
+    free(s->recent_lbd);
+    free(s->level_stamp);
+    freeWatches(s->watches);
+    if (s->vsids != NULL) {
+        freeVsids(s->vsids);
+    }
+    freeTrail(s->trail);
+    free(s->level);
+    free(s->reason);
+    free(s->seen);
+    free(s->learnt);
+}
+
+/**
+ * Records an assigned literal on the trail.
+ */
+static void recordAssignment(void* ctx, Literal l, Clause* reason) {
+    Solver* s = (Solver*)ctx;
+    VarIndex v = abs(l);
+
+    pushImplied(s->trail, l);
+    s->level[v] = s->trail->num_levels;
+    s->reason[v] = reason;
+    if (reason != NULL) {
+        s->stats->propagations++;
+    }
+}
+
+/**
+ * Assigns a literal TRUE, records it and adds it to the propagation queue.
+ */
+static void assignLiteral(Solver* s, Literal l, Clause* reason) {
+    setVariableValue(s->vt, abs(l), l > 0 ? TRUE : FALSE);
+    recordAssignment(s, l, reason);
+    enqueueLiteral(s->watches, l);
+}
+
+/**
+ * Opens a new decision level and assigns its decision literal TRUE.
+ */
+static void decide(Solver* s, Literal l) {
+    VarIndex v = abs(l);
+
+    setVariableValue(s->vt, v, l > 0 ? TRUE : FALSE);
+    pushDecision(s->trail, l);
+    s->level[v] = s->trail->num_levels;
+    s->reason[v] = NULL;
+    enqueueLiteral(s->watches, l);
+}
+
+/**
+ * Undoes all assignments above a decision level.
+ */
+static void backjump(Solver* s, unsigned target) {
+    Trail* t = s->trail;
+    if (t->num_levels <= target) {
+        return;
+    }
+
+    unsigned keep = getLevelStart(t, target + 1);
+    while (t->size > keep) {
+        VarIndex v = abs(popLiteral(t));
+        if (s->vsids != NULL) {
+            releaseVariable(s->vsids, v, getVariableValue(s->vt, v));
+        }
+        setVariableValue(s->vt, v, UNDEFINED);
+        s->reason[v] = NULL;
+    }
+    clearQueue(s->watches);
+}
+
+/**
+ * Derives the first-UIP clause from a conflict.
+ *
+ * The clause is stored in s->learnt. Its first literal is the negation of the
+ * unique implication point, the second one (if any) has the highest decision
+ * level among the remaining literals.
+ *
+ * @param s         the solver state
+ * @param conflict  a FALSE clause
+ * @param size      is set to the size of the learned clause
+ * @return          the decision level to jump back to
+ */
+static unsigned analyze(Solver* s, Clause* conflict, unsigned* size) {
+    unsigned open = 0;  // literals of the current level that are not resolved
+    unsigned n = 1;     // position 0 is reserved for the asserting literal
+    Literal p = 0;
+    unsigned index = s->trail->size;
+    Clause* c = conflict;
+
+    do {
+        assert(c != NULL);
+        for (unsigned i = 0; i < c->size; i++) {
+            Literal q = c->literals[i];
+            VarIndex v = abs(q);
+
+            if (p != 0 && v == (VarIndex)abs(p)) {
+                continue;
+            }
+            if (s->seen[v] || s->level[v] == 0) {
+                continue;
+            }
+
+            s->seen[v] = 1;
+            if (s->vsids != NULL) {
+                bumpActivity(s->vsids, v);
+            }
+            if (s->level[v] == s->trail->num_levels) {
+                open++;
+            } else {
+                s->learnt[n++] = q;
+            }
+        }
+
+        // the next literal to resolve is the latest marked one on the trail
+        do {
+            index--;
+        } while (!s->seen[abs(s->trail->literals[index])]);
+
+        p = s->trail->literals[index];
+        c = s->reason[abs(p)];
+        s->seen[abs(p)] = 0;
+        open--;
+    } while (open > 0);
+
+    s->learnt[0] = -p;
+
+    unsigned target = 0;
+    for (unsigned i = 1; i < n; i++) {
+        VarIndex v = abs(s->learnt[i]);
+        s->seen[v] = 0;
+        if (s->level[v] > target) {
+            target = s->level[v];
+            Literal t = s->learnt[1];
+            s->learnt[1] = s->learnt[i];
+            s->learnt[i] = t;
+        }
+    }
+
+    *size = n;
+    return target;
+}
+
+/**
+ * Computes the number of different decision levels of the literals in
+ * s->learnt.
+ */
+static unsigned computeLBD(Solver* s, unsigned size) {
+    unsigned lbd = 0;
+    s->stamp++;
+    for (unsigned i = 0; i < size; i++) {
+        unsigned level = s->level[abs(s->learnt[i])];
+        if (s->level_stamp[level] != s->stamp) {
+            s->level_stamp[level] = s->stamp;
+            lbd++;
+        }
+    }
+    return lbd;
+}
+
+/**
+ * Updates the LBD averages used by glucose restarts.
+ */
+static void recordLBD(Solver* s, unsigned lbd) {
+    s->lbd_sum += lbd;
+
+    unsigned pos = s->num_recent % GLUCOSE_WINDOW;
+    if (s->num_recent >= GLUCOSE_WINDOW) {
+        s->recent_sum -= s->recent_lbd[pos];
+    }
+    s->recent_lbd[pos] = lbd;
+    s->recent_sum += lbd;
+    s->num_recent++;
+}
+
+static size_t clauseBytes(Clause* c) {
+    return sizeof(Clause) + c->size * sizeof(Literal);
+}
+
+/**
+ * Learns a clause from a conflict, jumps back and asserts the negated UIP.
+ */
+static void learn(Solver* s, Clause* conflict) {
+    unsigned size;
+    unsigned target = analyze(s, conflict, &size);
+    if (s->vsids != NULL) {
+        decayActivities(s->vsids);
+    }
+
+    unsigned lbd = computeLBD(s, size);
+    recordLBD(s, lbd);
+    s->restart_conflicts++;
+
+    backjump(s, target);
+
+    if (size == 1) {
+        assignLiteral(s, s->learnt[0], NULL);
+        return;
+    }
+
+    Clause* c = mkDetachedClause(s->learnt, size);
+    if (s->num_learned == s->learned_capacity) {
+        s->learned_capacity *= 2;
+        s->learned = (Learned*)realloc(
+            s->learned, s->learned_capacity * sizeof(Learned));
+    }
+    s->learned[s->num_learned].clause = c;
+    s->learned[s->num_learned].lbd = lbd;
+    s->num_learned++;
+    s->learned_bytes += clauseBytes(c);
+
+    watchClause(s->watches, c);
+    assignLiteral(s, c->literals[0], c);
+}
+
+/**
+ * Checks whether a learned clause implied a current assignment.
+ */
+static char isLocked(Solver* s, Clause* c) {
+    return s->reason[abs(c->literals[0])] == c;
+}
+
+static int compareLearned(const void* a, const void* b) {
+    const Learned* x = (const Learned*)a;
+    const Learned* y = (const Learned*)b;
+    if (x->lbd != y->lbd) {
+        return x->lbd < y->lbd ? -1 : 1;
+    }
+    return (x->clause->size > y->clause->size) -
+           (x->clause->size < y->clause->size);
+}
+
+static int comparePointers(const void* a, const void* b) {
+    uintptr_t x = (uintptr_t)*(Clause* const*)a;
+    uintptr_t y = (uintptr_t)*(Clause* const*)b;
+    return (x > y) - (x < y);
+}
+
+/**
+ * Sorted array of the clauses deleted by a reduction.
+ */
+typedef struct DeletedClauses {
+    Clause** clauses;
+    unsigned size;
+} DeletedClauses;
+
+static char isDeleted(void* ctx, Clause* c) {
+    DeletedClauses* d = (DeletedClauses*)ctx;
+    return bsearch(&c, d->clauses, d->size, sizeof(Clause*),
+                   comparePointers) != NULL;
+}
+
+/**
+ * Deletes the worse half of the learned clauses, ranked by their LBD. Glue
+ * clauses are kept unless the memory limit is exceeded, clauses that are
+ * reasons are always kept.
+ */
+static void reduceLearned(Solver* s) {
+    qsort(s->learned, s->num_learned, sizeof(Learned), compareLearned);
+
+    char over_limit =
+        s->learned_limit != 0 && s->learned_bytes > s->learned_limit;
+    unsigned half = s->num_learned / 2;
+    DeletedClauses deleted;
+    deleted.clauses = (Clause**)malloc(s->num_learned * sizeof(Clause*));
+    deleted.size = 0;
+
+    // the worst clauses are at the end
+    unsigned keep = s->num_learned;
+    for (unsigned i = s->num_learned; i-- > 0;) {
+        Learned* e = s->learned + i;
+        if (isLocked(s, e->clause)) {
+            continue;
+        }
+        if ((e->lbd > GLUE_LBD && deleted.size < half) ||
+            (over_limit && s->learned_bytes > s->learned_limit / 2)) {
+            s->learned_bytes -= clauseBytes(e->clause);
+            deleted.clauses[deleted.size++] = e->clause;
+            e->clause = NULL;
+            keep--;
+        }
+    }
+
+    qsort(deleted.clauses, deleted.size, sizeof(Clause*), comparePointers);
+    removeWatches(s->watches, isDeleted, &deleted);
+    for (unsigned i = 0; i < deleted.size; i++) {
+        freeClause(deleted.clauses[i]);
+    }
+    free(deleted.clauses);
+
+    unsigned n = 0;
+    for (unsigned i = 0; i < s->num_learned; i++) {
+        if (s->learned[i].clause != NULL) {
+            s->learned[n++] = s->learned[i];
+        }
+    }
+    assert(n == keep);
+    s->num_learned = n;
+
+    s->stats->deleted += deleted.size;
+    s->reduce_interval += REDUCE_INCREMENT;
+    s->next_reduce = s->stats->conflicts + s->reduce_interval;
+}
+
+/**
+ * Returns the i-th element of the Luby sequence 1, 1, 2, 1, 1, 2, 4, ...
+ */
+static unsigned long luby(unsigned long i) {
+    unsigned long size = 1;
+    unsigned seq = 0;
+
+    // find the finite subsequence that contains index i
+    while (size < i + 1) {
+        seq++;
+        size = 2 * size + 1;
+    }
+    while (size - 1 != i) {
+        size = (size - 1) >> 1;
+        seq--;
+        i = i % size;
+    }
+
+    return 1UL << seq;
+}
+
+/**
+ * Checks whether the restart policy asks for a restart.
+ */
+static char shouldRestart(Solver* s) {
+    switch (s->restart) {
+        case RESTART_LUBY:
+            return s->restart_conflicts >= LUBY_UNIT * luby(s->luby_index);
+        case RESTART_GLUCOSE:
+            return s->num_recent >= GLUCOSE_WINDOW &&
+                   (double)s->recent_sum / GLUCOSE_WINDOW * GLUCOSE_FACTOR >
+                       (double)s->lbd_sum / s->stats->conflicts;
+        default:
+            return 0;
+    }
+}
+
+/**
+ * Undoes all decisions, the saved phases and activities are kept.
+ */
+static void restart(Solver* s) {
+    backjump(s, 0);
+    s->stats->restarts++;
+    s->restart_conflicts = 0;
+    s->luby_index++;
+    s->num_recent = 0;
+    s->recent_sum = 0;
+}
+
+/**
+ * Picks the next decision according to the decision strategy.
+ *
+ * @return  the literal to assign TRUE, 0 if all variables are assigned
+ */
+static Literal nextDecision(Solver* s) {
+    if (s->vsids != NULL) {
+        return pickDecision(s->vsids);
+    }
+    return (Literal)getNextUndefinedVariable(s->vt);
+}
+
+SolveResult solveCDCL(VarTable* vt, CNF* cnf, const SolverOptions* opts,
+                      SolverStats* stats) {
+    Solver s;
+    mkSolver(&s, vt, cnf, opts, stats);
+
+    SolveResult res;
+    if (assignUnitClauses(s.watches, recordAssignment, &s) != NULL) {
+        res = SOLVE_UNSAT;
+    } else {
+        while (1) {
+            Clause* conflict = propagate(s.watches, recordAssignment, &s);
+
+            if (conflict != NULL) {
+                stats->conflicts++;
+                clearQueue(s.watches);
+                if (s.trail->num_levels == 0) {
+                    res = SOLVE_UNSAT;
+                    break;
+                }
+                learn(&s, conflict);
+                if (opts->conflict_limit != 0 &&
+                    stats->conflicts >= opts->conflict_limit) {
+                    res = SOLVE_UNKNOWN;
+                    break;
+                }
+                continue;
+            }
+
+            if (shouldRestart(&s)) {
+                restart(&s);
+            }
+            if (s.num_learned > 0 &&
+                (stats->conflicts >= s.next_reduce ||
+                 (s.learned_limit != 0 &&
+                  s.learned_bytes > s.learned_limit))) {
+                reduceLearned(&s);
+            }
+
+            Literal decision = nextDecision(&s);
+            if (decision == 0) {
+                res = SOLVE_SAT;
+                break;
+            }
+
+            stats->decisions++;
+            decide(&s, decision);
+        }
+    }
+
+    freeSolver(&s);
+    return res;
+}
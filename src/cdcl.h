@@ -0,0 +1,40 @@
+#pragma once
+
+/**
+ * In this file, we provide a conflict-driven clause learning (CDCL) solver.
+ *
+ * In contrast to the DPLL algorithm in dpll.c, every implied assignment
+ * remembers the clause that implied it. On a conflict, these reasons are used
+ * to derive a new clause (first unique implication point), which is added to
+ * the formula. The solver then jumps back to the second highest decision level
+ * in the learned clause instead of flipping the most recent decision.
+ *
+ * The quality of a learned clause is measured by its literal block distance
+ * (LBD), the number of different decision levels among its literals when it
+ * was learned. Periodically, and whenever the learned clauses exceed the
+ * memory limit of the options, the worse half of the learned clauses is
+ * deleted. Clauses with an LBD of at most 2 ("glue clauses") and clauses
+ * that are reasons of current assignments are kept. The search restarts
+ * according to the restart policy of the options.
+ */
+
+#include "cnf.h"
+#include "dpll.h"
+#include "variables.h"
+
+/**
+ * Decides whether a formula in CNF is satisfiable using CDCL.
+ *
+ * The CNF itself is not modified, learned clauses are freed before returning.
+ * If the formula is satisfiable, the variable table contains a satisfying
+ * assignment afterwards.
+ *
+ * @param vt     the underlying variable table
+ * @param cnf    a formula to test
+ * @param opts   the solver options
+ * @param stats  is filled with the counters of the run
+ * @return       the result, SOLVE_UNKNOWN if the conflict limit of the
+ *               options was reached
+ */
+SolveResult solveCDCL(VarTable* vt, CNF* cnf, const SolverOptions* opts,
+                      SolverStats* stats);
@@ -4,27 +4,26 @@
 #include <stdio.h>
 #include <stdlib.h>
 
-Clause* mkTernaryClause(VarTable* vt, Literal a, Literal b, Literal c) {
-    assert(a != 0);
+#define INIT_CNF_SIZE 16
 
-    Clause* res = (Clause*)malloc(sizeof(Clause));
-    res->val = UNDEFINED;
-
-    res->literals[0] = a;
-    res->literals[1] = b;
-    res->literals[2] = c;
-
-    // insert the clause into the list of parentClauses of the variables
-    addParentClause(vt, abs(a), res);
-
-    if (b != 0) {
-        addParentClause(vt, abs(b), res);
-    }
-
-    if (c != 0) {
-        addParentClause(vt, abs(c), res);
+/**
+ * Initializes a clause in already allocated memory.
+ */
+static void initClause(Clause* res, const Literal* literals, unsigned size) {
+    // the empty clause cannot be satisfied
+    res->val = size == 0 ? FALSE : UNDEFINED;
+    res->size = size;
+    res->owner = NULL;
+
+    for (unsigned i = 0; i < size; i++) {
+        assert(literals[i] != 0);
+        res->literals[i] = literals[i];
     }
+}
 
+Clause* mkDetachedClause(const Literal* literals, unsigned size) {
+    Clause* res = (Clause*)malloc(sizeof(Clause) + size * sizeof(Literal));
+    initClause(res, literals, size);
     return res;
 }
 
@@ -32,28 +31,49 @@ void freeClause(Clause* c) { free(c); }
 
 CNF* mkCNF(void) {
     CNF* res = (CNF*)malloc(sizeof(CNF));
-    res->clauses = mkList();
+    res->clauses = (Clause**)malloc(INIT_CNF_SIZE * sizeof(Clause*));
+    res->size = 0;
+    res->capacity = INIT_CNF_SIZE;
+    res->num_true = 0;
+    res->num_false = 0;
+    res->storage = mkArena();
     return res;
 }
 
 void freeCNF(CNF* f) {
-    while (!isEmpty(&f->clauses)) {
-        Clause* c = (Clause*)peek(&f->clauses);
-        freeClause(c);
-        pop(&f->clauses);
+    if (f == NULL) {
+        return;
     }
+    freeArena(&f->storage);
+    free(f->clauses);
     free(f);
 }
 
-void addClauseToCNF(CNF* f, Clause* c) { push(&f->clauses, c); }
+Clause* addClause(VarTable* vt, CNF* f, const Literal* literals,
+                  unsigned size) {
+    Clause* res = (Clause*)arenaAlloc(&f->storage,
+                                      sizeof(Clause) + size * sizeof(Literal));
+    initClause(res, literals, size);
+    res->owner = f;
+    if (res->val == FALSE) {
+        f->num_false++;
+    }
+
+    if (f->size == f->capacity) {
+        f->capacity *= 2;
+        f->clauses =
+            (Clause**)realloc(f->clauses, f->capacity * sizeof(Clause*));
+    }
+    f->clauses[f->size++] = res;
+
+    // insert the clause into the parent clauses of the variables
+    for (unsigned i = 0; i < size; i++) {
+        addParentClause(vt, abs(literals[i]), res);
+    }
+
+    return res;
+}
 
-/**
- * Computes the value of a literal.
- *
- * @param vt  the underlying variable table
- * @param l   a literal
- * @return    the truth value of the literal
- */
 TruthValue evalLiteral(VarTable* vt, Literal l) {
     assert(l != 0);
 
@@ -74,36 +94,43 @@ TruthValue evalLiteral(VarTable* vt, Literal l) {
     }
 }
 
+/**
+ * Changes the truth value of a clause and keeps the counters of its CNF
+ * up to date.
+ */
+static void setTruthValue(Clause* c, TruthValue val) {
+    CNF* f = c->owner;
+    if (f != NULL && c->val != val) {
+        f->num_true -= c->val == TRUE;
+        f->num_false -= c->val == FALSE;
+        f->num_true += val == TRUE;
+        f->num_false += val == FALSE;
+    }
+    c->val = val;
+}
+
 void updateTruthValue(VarTable* vt, Clause* c) {
     TruthValue res = FALSE;
 
-    for (int i = 0; i < LITERALS_PER_CLAUSE; i++) {
-        if (c->literals[i] == 0) {
-            continue;
-        }
-
+    for (unsigned i = 0; i < c->size; i++) {
         TruthValue current = evalLiteral(vt, c->literals[i]);
         if (current == UNDEFINED) {
             res = UNDEFINED;
         } else if (current == TRUE) {
-            c->val = TRUE;
+            setTruthValue(c, TRUE);
             return;
         }
     }
 
-    c->val = res;
+    setTruthValue(c, res);
 }
 
 Literal getUnitLiteral(VarTable* vt, Clause* c) {
     Literal res = 0;
 
-    for (int i = 0; i < LITERALS_PER_CLAUSE; i++) {
+    for (unsigned i = 0; i < c->size; i++) {
         Literal current = c->literals[i];
 
-        if (current == 0) {
-            continue;
-        }
-
         TruthValue val = evalLiteral(vt, current);
 
         switch (val) {
@@ -125,20 +152,13 @@ Literal getUnitLiteral(VarTable* vt, Clause* c) {
 }
 
 TruthValue evalCNF(CNF* f) {
-    TruthValue res = TRUE;
-
-    ListIterator it = mkIterator(&f->clauses);
-    while (isValid(&it)) {
-        TruthValue current = ((Clause*)getCurr(&it))->val;
-        if (current == UNDEFINED) {
-            res = UNDEFINED;
-        } else if (current == FALSE) {
-            return FALSE;
-        }
-        next(&it);
+    if (f->num_false > 0) {
+        return FALSE;
     }
-
-    return res;
+    if (f->num_true == f->size) {
+        return TRUE;
+    }
+    return UNDEFINED;
 }
 
 /**
@@ -147,13 +167,9 @@ TruthValue evalCNF(CNF* f) {
  * @param c  the clause to print
  */
 void prettyPrintClause(VarTable* vt, Clause* c) {
-    for (int i = 0; i < LITERALS_PER_CLAUSE; i++) {
+    for (unsigned i = 0; i < c->size; i++) {
         Literal current = c->literals[i];
 
-        if (current == 0) {
-            continue;
-        }
-
         if (i > 0) {
             printf(" || ");
         }
@@ -166,21 +182,15 @@ void prettyPrintClause(VarTable* vt, Clause* c) {
 }
 
 void prettyPrintCNF(VarTable* vt, CNF* f) {
-    ListIterator it = mkIterator(&f->clauses);
-    char first = 1;
-    while (isValid(&it)) {
-        Clause* current = (Clause*)getCurr(&it);
-        if (!first) {
+    for (unsigned i = 0; i < f->size; i++) {
+        if (i > 0) {
             printf(" && ");
         }
         printf("(");
 
-        prettyPrintClause(vt, current);
+        prettyPrintClause(vt, f->clauses[i]);
 
         printf(")");
-
-        first = 0;
-        next(&it);
     }
     printf("\n");
 }
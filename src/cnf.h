@@ -2,12 +2,12 @@
 
 /**
  * In this file, we provide a data structure for representing a formula in
- * conjunctive normal form. Clauses may contain at most 3 literals.
+ * conjunctive normal form.
  *
  * These data structures should only be created using the included functions!
  */
 
-#include "list.h"
+#include "arena.h"
 #include "variables.h"
 
 /**
@@ -20,42 +20,56 @@
  */
 typedef int Literal;
 
-#define LITERALS_PER_CLAUSE 3
-
 /**
- * Struct for representing disjunctions of exactly 3 literals.
+ * Struct for representing disjunctions of literals.
  *
- * If smaller clauses should be represented, 0 values can be inserted as
- * literals.
+ * The literals are stored directly behind the struct, so clauses may have
+ * arbitrary width. All literals are non-zero.
  *
  * Contains a TruthValue field that should be updated by a call to the
  * updateTruthValue() function if the value of a contained literal changes.
  */
 typedef struct Clause {
     TruthValue val;
-    Literal literals[LITERALS_PER_CLAUSE];
+    unsigned size;
+    struct CNF* owner;  // the CNF containing the clause, NULL if detached
+    Literal literals[];
 } Clause;
 
 /**
  * Struct for representing conjunctions of clauses.
+ *
+ * The clauses are kept in an array in insertion order. Their memory is taken
+ * from an arena owned by the CNF, so a CNF is freed in bulk.
+ *
+ * The numbers of TRUE and FALSE clauses are maintained by updateTruthValue(),
+ * so that evalCNF() takes constant time.
  */
 typedef struct CNF {
-    List clauses;
+    Clause** clauses;
+    unsigned size;
+    unsigned capacity;
+    unsigned num_true;
+    unsigned num_false;
+    Arena storage;
 } CNF;
 
 /**
- * Creates a new clause with three literals.
+ * Creates a new clause from an array of literals without adding it to the
+ * parent clauses of its variables.
  *
- * @param vt  the underlying variable table
- * @param a   the first literal
- * @param b   the second literal
- * @param c   the third literal
+ * Intended for clauses that only exist during solving, e.g. learned clauses.
+ * Its truth value is not updated by updateVariableValue(). It has to be freed
+ * with freeClause().
+ *
+ * @param literals  the non-zero literals of the clause
+ * @param size      the number of literals, the empty clause is FALSE
  * @return  the new clause
  */
-Clause* mkTernaryClause(VarTable* vt, Literal a, Literal b, Literal c);
+Clause* mkDetachedClause(const Literal* literals, unsigned size);
 
 /**
- * Frees a clause.
+ * Frees a clause created by mkDetachedClause().
  *
  * @param c  the clause to be freed
  */
@@ -76,15 +90,32 @@ CNF* mkCNF(void);
 void freeCNF(CNF* f);
 
 /**
- * Adds a new clause to a CNF. Duplicates are not removed.
+ * Creates a new clause from an array of literals, adds it to a CNF and to the
+ * parent clauses of its variables. Duplicates are not removed.
+ *
+ * The clause is owned by the CNF and freed together with it.
+ *
+ * @param vt        the underlying variable table
+ * @param f         the CNF
+ * @param literals  the non-zero literals of the clause
+ * @param size      the number of literals, the empty clause is FALSE
+ * @return  the new clause
+ */
+Clause* addClause(VarTable* vt, CNF* f, const Literal* literals,
+                  unsigned size);
+
+/**
+ * Computes the value of a literal.
  *
- * @param f  the CNF
- * @param c  the clause to be added
+ * @param vt  the underlying variable table
+ * @param l   a literal
+ * @return    the truth value of the literal
  */
-void addClauseToCNF(CNF* f, Clause* c);
+TruthValue evalLiteral(VarTable* vt, Literal l);
 
 /**
- * Evaluates a clause and stores the result in it.
+ * Evaluates a clause and stores the result in it. Also updates the clause
+ * counters of the containing CNF.
  *
  * @param vt  the underlying variable table
  * @param c   the clause to be evaluated
@@ -102,7 +133,7 @@ void updateTruthValue(VarTable* vt, Clause* c);
 Literal getUnitLiteral(VarTable* vt, Clause* c);
 
 /**
- * Evaluates a CNF.
+ * Evaluates a CNF in constant time.
  *
  * Based on the values stored in the clauses!
  *
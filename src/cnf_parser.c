@@ -1,39 +1,181 @@
 #include "cnf_parser.h"
 
+#include <ctype.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
 
 #include "cnf.h"
+#include "err.h"
 #include "variables.h"
 
+#define INIT_LINE_SIZE 256
+#define INIT_CLAUSE_SIZE 16
+
+/**
+ * Growable buffer for the literals of the clause under construction.
+ */
+typedef struct LiteralBuffer {
+    Literal* literals;
+    unsigned size;
+    unsigned capacity;
+} LiteralBuffer;
+
+static void appendLiteral(LiteralBuffer* buf, Literal l) {
+    if (buf->size == buf->capacity) {
+        buf->capacity = buf->capacity == 0 ? INIT_CLAUSE_SIZE
+                                           : 2 * buf->capacity;
+        buf->literals = (Literal*)realloc(buf->literals,
+                                          buf->capacity * sizeof(Literal));
+    }
+    buf->literals[buf->size++] = l;
+}
+
+/**
+ * Reads a complete line of arbitrary length.
+ *
+ * @param input  the input stream
+ * @param line   a buffer allocated with malloc, grown as needed
+ * @param cap    the size of the buffer
+ * @return       0 if the end of the input was reached before any character
+ */
+static char readLine(FILE* input, char** line, size_t* cap) {
+    size_t len = 0;
+
+    while (fgets(*line + len, *cap - len, input)) {
+        len += strlen(*line + len);
+        if (len > 0 && (*line)[len - 1] == '\n') {
+            return 1;
+        }
+        *cap *= 2;
+        *line = (char*)realloc(*line, *cap);
+    }
+
+    return len > 0;
+}
+
 CNF* parseCNF(FILE* input, VarTable* vt) {
     CNF* cnf = mkCNF();
-    char line[4096];
+    size_t cap = INIT_LINE_SIZE;
+    char* line = (char*)malloc(cap);
+    LiteralBuffer clause = {NULL, 0, 0};
 
-    while (fgets(line, sizeof(line), input)) {
-        Literal a = 0, b = 0, c = 0;
-        int count = 0;
+    while (readLine(input, &line, &cap)) {
+        clause.size = 0;
 
-        char* tok = strtok(line, " \n");
-        while (tok && count < 3) {
+        char* tok = strtok(line, " \t\r\n");
+        while (tok) {
             int neg = (tok[0] == '-');
             char* name = neg ? tok + 1 : tok;
 
             VarIndex v = mkVariable(vt, strdup(name));
-            Literal lit = neg ? -v : v;
+            appendLiteral(&clause, neg ? -(Literal)v : (Literal)v);
 
-            if (count == 0) a = lit;
-            if (count == 1) b = lit;
-            if (count == 2) c = lit;
+            tok = strtok(NULL, " \t\r\n");
+        }
 
-            count++;
-            tok = strtok(NULL, " \n");
+        // blank lines do not contain a clause
+        if (clause.size > 0) {
+            addClause(vt, cnf, clause.literals, clause.size);
         }
+    }
+
+    free(clause.literals);
+    free(line);
+    return cnf;
+}
+
+/**
+ * Skips whitespace and comment lines.
+ *
+ * @param input  the input stream
+ * @return       the next character, which is not consumed, or EOF
+ */
+static int skipToToken(FILE* input) {
+    int c;
 
-        Clause* cl = mkTernaryClause(vt, a, b, c);
-        addClauseToCNF(cnf, cl);
+    while ((c = fgetc(input)) != EOF) {
+        if (c == 'c') {
+            while (c != '\n' && c != EOF) {
+                c = fgetc(input);
+            }
+        } else if (!isspace(c)) {
+            ungetc(c, input);
+            break;
+        }
     }
 
+    return c;
+}
+
+/**
+ * Frees the CNF and the clause under construction, then reports a malformed
+ * input. With an error jump (server mode, shared library) err() jumps back to
+ * the caller, which would leak them otherwise.
+ *
+ * @param cnf     the CNF parsed so far
+ * @param clause  the buffer of the clause under construction
+ * @param msg     the error message
+ */
+static void dimacsError(CNF* cnf, LiteralBuffer* clause, const char* msg) {
+    free(clause->literals);
+    freeCNF(cnf);
+    err(msg);
+}
+
+CNF* parseDIMACS(FILE* input, VarTable* vt) {
+    int num_vars;
+    int num_clauses;
+
+    // signed, since %u would silently wrap a negative count around
+    if (skipToToken(input) != 'p' ||
+        fscanf(input, "p cnf %d %d", &num_vars, &num_clauses) != 2) {
+        err("DIMACS: Missing problem line");
+    }
+    if (num_vars < 0 || num_clauses < 0) {
+        err("DIMACS: Negative count in the problem line");
+    }
+
+    // variable i of the input gets the index i in the table
+    for (int i = 1; i <= num_vars; i++) {
+        char buf[16];
+        sprintf(buf, "%d", i);
+        mkVariable(vt, strdup(buf));
+    }
+
+    CNF* cnf = mkCNF();
+    LiteralBuffer clause = {NULL, 0, 0};
+    long num_read = 0;
+    long lit;
+    int c;
+
+    // some benchmark sets end with a line containing only '%'
+    while ((c = skipToToken(input)) != EOF && c != '%') {
+        if (fscanf(input, "%ld", &lit) != 1) {
+            dimacsError(cnf, &clause, "DIMACS: Invalid literal");
+        }
+        if (labs(lit) > (long)num_vars) {
+            dimacsError(cnf, &clause, "DIMACS: Literal exceeds the number of variables");
+        }
+
+        if (lit == 0) {
+            addClause(vt, cnf, clause.literals, clause.size);
+            clause.size = 0;
+            num_read++;
+        } else {
+            appendLiteral(&clause, (Literal)lit);
+        }
+    }
+
+    // tolerate a missing 0 after the last clause
+    if (clause.size > 0) {
+        addClause(vt, cnf, clause.literals, clause.size);
+        num_read++;
+    }
+
+    if (num_read != num_clauses) {
+        dimacsError(cnf, &clause, "DIMACS: Number of clauses does not match the problem line");
+    }
+    free(clause.literals);
     return cnf;
 }
@@ -4,4 +4,31 @@
 #include "cnf.h"
 #include "variables.h"
 
+/**
+ * Reads a CNF with one clause per line.
+ *
+ * Literals are variable names separated by whitespace, negative literals are
+ * prefixed with '-'. Lines may have any length, blank lines are ignored.
+ *
+ * @param input  the input stream
+ * @param vt     the variable table to add the variables to
+ * @return       the CNF
+ */
 CNF* parseCNF(FILE* input, VarTable* vt);
+
+/**
+ * Reads a CNF in DIMACS format.
+ *
+ * The input starts with the problem line "p cnf <variables> <clauses>",
+ * followed by clauses of non-zero integers terminated by 0. Clauses may span
+ * several lines, lines starting with 'c' are comments. Variable i is named
+ * "i" and has index i in the variable table.
+ *
+ * Exits the program via err() on malformed input, which includes negative
+ * counts and a number of clauses other than the one of the problem line.
+ *
+ * @param input  the input stream
+ * @param vt     an empty variable table
+ * @return       the CNF
+ */
+CNF* parseDIMACS(FILE* input, VarTable* vt);
@@ -1,46 +1,12 @@
 #include "dpll.h"
 
+#include "cdcl.h"
 #include "cnf.h"
-#include "err.h"
-#include "list.h"
+#include "trail.h"
 #include "util.h"
 #include "variables.h"
-
-typedef enum Reason { CHOSEN, IMPLIED } Reason;
-
-/**
- * Struct to represent an entry in the assignment stack. Should only be created
- * and freed by pushAssignment and popAssignment.
- */
-typedef struct Assignment {
-    VarIndex var;
-    Reason reason;
-} Assignment;
-
-/**
- * Adds a new assignment to the assignment stack.
- *
- * @param stack  an assignment stack
- * @param var    the variable to assign
- * @param r      the reason for the assignment
- */
-void pushAssignment(List* stack, VarIndex var, Reason r) {
-    Assignment* a = (Assignment*)malloc(sizeof(Assignment));
-    a->var = var;
-    a->reason = r;
-    push(stack, a);
-}
-
-/**
- * Removes the head element of an assignment stack and frees it.
- *
- * @param stack  an assignment stack
- */
-void popAssignment(List* stack) {
-    Assignment* a = (Assignment*)peek(stack);
-    free(a);
-    pop(stack);
-}
+#include "vsids.h"
+#include "watch.h"
 
 /**
  * Führt eine Iteration des DPLL Algorithmus aus.
@@ -55,75 +21,116 @@ void popAssignment(List* stack) {
 /**
  * Performs one iteration of the DPLL algorithm.
  *
- * @param vt       the underlying variable table
- * @param stack    an assignment stack
+ * @param s        the DPLL state
  * @param cnf      the formula to check
  * @return         1 if the algorithm should terminate with SAT,
  *                 0 if the algorithm should continue,
  *                -1 if the algorithm should terminate with UNSAT
  */
 
-void Backtrack(List* s, VarTable* vt) {
-    while (!isEmpty(s)) {
-        Assignment* topE = peek(s);
-        switch (topE->reason) {
-            case CHOSEN:  // CHOSEN CASE
-            {             // to false, then the reason to false
-                updateVariableValue(vt, topE->var,
-                                    FALSE);  // update variable ->true
-                topE->reason = IMPLIED;
-                return;
-            }
-            case IMPLIED:  // IMPLIED CASE
-            {
-                updateVariableValue(vt, topE->var, UNDEFINED);  // false
-                //  variable update
-                popAssignment(s);
-                continue;
-            }
-            default:
-                err("Backtrack algorithm, default case");  // case where reason
-                                                            // is not
-                                                            // IMPLIED/CHOSEN,
-                                                            // prolly won't
-                                                            // execute but
-                                                            // default needed
-                break;
-        }
+/**
+ * State of a DPLL run.
+ *
+ * The trail serves as the assignment stack: the decision of every level is
+ * CHOSEN, all other literals are IMPLIED.
+ */
+typedef struct Dpll {
+    VarTable* vt;
+    Trail* trail;        // the assignment stack
+    Propagation mode;    // the propagation strategy in use
+    Watches* watches;    // only for watched propagation
+    Vsids* vsids;        // only for activity-based decisions
+    SolverStats* stats;  // never NULL
+} Dpll;
+
+/**
+ * Assigns a value to a variable. Scan propagation relies on the truth values
+ * of the parent clauses, watched propagation does not need them.
+ *
+ * @param s     the DPLL state
+ * @param vi    a variable
+ * @param val   the new truth value
+ */
+static void assignVariable(Dpll* s, VarIndex vi, TruthValue val) {
+    if (s->mode == PROPAGATE_SCAN) {
+        updateVariableValue(s->vt, vi, val);
+    } else {
+        setVariableValue(s->vt, vi, val);
     }
 }
-static char hasChosen(List* s) {
-    ListIterator it = mkIterator(s);
-    while (isValid(&it)) {
-        Assignment* a = (Assignment*)getCurr(&it);
-        if (a->reason == CHOSEN) {
-            return 1;
+
+/**
+ * Undoes all IMPLIED assignments up to the most recent CHOSEN one and flips
+ * the value of that one. The flipped literal becomes IMPLIED on the level
+ * below.
+ *
+ * @param s     the DPLL state
+ * @return      the literal that is TRUE after the flip, 0 if there was no
+ *              CHOSEN assignment
+ */
+Literal Backtrack(Dpll* s) {
+    Trail* t = s->trail;
+    if (t->num_levels == 0) {
+        return 0;
+    }
+
+    unsigned decision_pos = getLevelStart(t, t->num_levels);
+    while (t->size > decision_pos + 1) {
+        VarIndex v = abs(popLiteral(t));
+        if (s->vsids != NULL) {
+            releaseVariable(s->vsids, v, getVariableValue(s->vt, v));
         }
-        next(&it);
+        assignVariable(s, v, UNDEFINED);
     }
-    return 0;
+
+    Literal flipped = -popLiteral(t);
+    assignVariable(s, abs(flipped), flipped > 0 ? TRUE : FALSE);
+    pushImplied(t, flipped);
+    return flipped;
+}
+
+/**
+ * Picks the next decision according to the decision strategy.
+ *
+ * @param s  the DPLL state
+ * @return   the literal to assign TRUE, 0 if all variables are assigned
+ */
+static Literal nextDecision(Dpll* s) {
+    if (s->vsids != NULL) {
+        return pickDecision(s->vsids);
+    }
+    return (Literal)getNextUndefinedVariable(s->vt);
+}
+
+/**
+ * Assigns a decision literal TRUE and pushes it as CHOSEN.
+ */
+static void decide(Dpll* s, Literal l) {
+    s->stats->decisions++;
+    assignVariable(s, abs(l), l > 0 ? TRUE : FALSE);
+    pushDecision(s->trail, l);
 }
-int iterate(VarTable* vt, List* stack, CNF* cnf) {
+
+int iterate(Dpll* s, CNF* cnf) {
+    VarTable* vt = s->vt;
     switch (evalCNF(cnf)) {
         case TRUE: {
             return 1;
             break;
         }
         case FALSE: {
+            s->stats->conflicts++;
             //  if reset is possible
-            if (hasChosen(stack)) {
-                Backtrack(stack, vt);
+            if (s->trail->num_levels > 0) {
+                Backtrack(s);
                 return 0;
             } else {
                 return -1;
             }
         }
         default: {
-            // following code sort of sturcture comes from list.h, it was
-            // commented is being used here
-            ListIterator it = mkIterator(&cnf->clauses);
-            while (isValid(&it)) {
-                Clause* current = (Clause*)getCurr(&it);
+            for (unsigned i = 0; i < cnf->size; i++) {
+                Clause* current = cnf->clauses[i];
                 Literal u_lit;
                 //= getUnitLiteral(vt, current);  // the unit gets lit ;)
                 if ((u_lit = getUnitLiteral(vt, current)) != 0) {
@@ -143,19 +150,16 @@ int iterate(VarTable* vt, List* stack, CNF* cnf) {
 
                     // an entry in the assignment stack, we pushing the
                     // reason and the truthvalue
-                    pushAssignment(stack, abs(u_lit), IMPLIED);  //
+                    pushImplied(s->trail, u_lit);  //
+                    s->stats->propagations++;
                     return 0;
                 }
-                next(&it);
             }
 
-            VarIndex unkown_variable = getNextUndefinedVariable(vt);
-
-            if (unkown_variable != 0) {
-                updateVariableValue(vt, unkown_variable, TRUE);
-
-                pushAssignment(stack, unkown_variable, CHOSEN);
+            Literal decision = nextDecision(s);
 
+            if (decision != 0) {
+                decide(s, decision);
                 return 0;
             }
             return 0;
@@ -164,17 +168,134 @@ int iterate(VarTable* vt, List* stack, CNF* cnf) {
     return 0;
 }
 
+/**
+ * Records an assignment found by watched propagation on the assignment stack.
+ */
+static void recordImplied(void* ctx, Literal l, Clause* reason) {
+    (void)reason;
+    Dpll* s = (Dpll*)ctx;
+    pushImplied(s->trail, l);
+    s->stats->propagations++;
+}
+
+/**
+ * Performs one iteration of the DPLL algorithm with watched propagation.
+ *
+ * Instead of evaluating the whole CNF, the literals in the propagation queue
+ * are propagated. If no conflict occurs and there is no undefined variable
+ * left, all clauses are satisfied.
+ *
+ * @param s        the DPLL state
+ * @return         1 if the algorithm should terminate with SAT,
+ *                 0 if the algorithm should continue,
+ *                -1 if the algorithm should terminate with UNSAT
+ */
+static int iterateWatched(Dpll* s) {
+    Clause* conflict = propagate(s->watches, recordImplied, s);
+    if (conflict != NULL) {
+        s->stats->conflicts++;
+        clearQueue(s->watches);
+        if (s->trail->num_levels == 0) {
+            return -1;
+        }
+        if (s->vsids != NULL) {
+            for (unsigned i = 0; i < conflict->size; i++) {
+                bumpActivity(s->vsids, abs(conflict->literals[i]));
+            }
+            decayActivities(s->vsids);
+        }
+        enqueueLiteral(s->watches, Backtrack(s));
+        return 0;
+    }
+
+    Literal decision = nextDecision(s);
+    if (decision == 0) {
+        return 1;
+    }
+
+    decide(s, decision);
+    enqueueLiteral(s->watches, decision);
+
+    return 0;
+}
+
+SolverOptions defaultSolverOptions(void) {
+    SolverOptions opts;
+    opts.algorithm = ALGORITHM_DPLL;
+    opts.propagation = PROPAGATE_WATCHED;
+    opts.decision = DECIDE_FIRST;
+    opts.restart = RESTART_NONE;
+    opts.learned_limit = 256 * 1024;
+    opts.conflict_limit = 0;
+    return opts;
+}
+
 char isSatisfiable(VarTable* vt, CNF* cnf) {
-    List stack = mkList();
+    SolverOptions opts = defaultSolverOptions();
+    return isSatisfiableWithOptions(vt, cnf, &opts, NULL);
+}
+
+/**
+ * Tests whether the conflict limit of the options has been reached.
+ */
+static char exhausted(const SolverOptions* opts, const SolverStats* stats) {
+    return opts->conflict_limit != 0 &&
+           stats->conflicts >= opts->conflict_limit;
+}
+
+char isSatisfiableWithOptions(VarTable* vt, CNF* cnf,
+                              const SolverOptions* opts, SolverStats* stats) {
+    return solveWithOptions(vt, cnf, opts, stats) == SOLVE_SAT;
+}
+
+SolveResult solveWithOptions(VarTable* vt, CNF* cnf, const SolverOptions* opts,
+                             SolverStats* stats) {
+    SolverStats local_stats;
+    if (stats == NULL) {
+        stats = &local_stats;
+    }
+    stats->decisions = 0;
+    stats->conflicts = 0;
+    stats->propagations = 0;
+    stats->restarts = 0;
+    stats->deleted = 0;
+
+    if (opts->algorithm == ALGORITHM_CDCL) {
+        return solveCDCL(vt, cnf, opts, stats);
+    }
+
+    Dpll s;
+    s.vt = vt;
+    s.trail = mkTrail(vt);
+    s.mode = opts->propagation;
+    s.watches = NULL;
+    s.vsids = opts->decision == DECIDE_VSIDS ? mkVsids(vt, cnf) : NULL;
+    s.stats = stats;
 
     int res;
-    do {
-        res = iterate(vt, &stack, cnf);
-    } while (res == 0);
+    if (s.mode == PROPAGATE_WATCHED) {
+        s.watches = mkWatches(vt, cnf);
+        if (assignUnitClauses(s.watches, recordImplied, &s) != NULL) {
+            res = -1;
+        } else {
+            do {
+                res = iterateWatched(&s);
+            } while (res == 0 && !exhausted(opts, stats));
+        }
+        freeWatches(s.watches);
+    } else {
+        do {
+            res = iterate(&s, cnf);
+        } while (res == 0 && !exhausted(opts, stats));
+    }
 
-    while (!isEmpty(&stack)) {
-        popAssignment(&stack);
+    freeTrail(s.trail);
+    if (s.vsids != NULL) {
+        freeVsids(s.vsids);
     }
 
-    return (res < 0) ? 0 : 1;
+    if (res == 0) {
+        return SOLVE_UNKNOWN;
+    }
+    return (res < 0) ? SOLVE_UNSAT : SOLVE_SAT;
 }
@@ -3,6 +3,84 @@
 #include "cnf.h"
 #include "variables.h"
 
+/**
+ * Strategies for finding unit clauses and conflicts.
+ *
+ * PROPAGATE_SCAN evaluates the whole CNF and looks for a unit clause in every
+ * iteration, PROPAGATE_WATCHED uses two watched literals per clause (see
+ * watch.h).
+ */
+typedef enum Propagation { PROPAGATE_SCAN, PROPAGATE_WATCHED } Propagation;
+
+/**
+ * Search algorithms.
+ *
+ * ALGORITHM_DPLL backtracks chronologically to the most recent decision,
+ * ALGORITHM_CDCL learns clauses from conflicts and jumps back
+ * non-chronologically (see cdcl.h). CDCL always uses watched propagation.
+ */
+typedef enum Algorithm { ALGORITHM_DPLL, ALGORITHM_CDCL } Algorithm;
+
+/**
+ * Strategies for picking the next decision variable.
+ *
+ * DECIDE_FIRST picks the undefined variable with the lowest index and assigns
+ * it TRUE, DECIDE_VSIDS picks the most active variable with its saved phase
+ * (see vsids.h). DECIDE_FIRST is the default, VSIDS is opt-in.
+ */
+typedef enum Decision { DECIDE_FIRST, DECIDE_VSIDS } Decision;
+
+/**
+ * Restart policies of the CDCL solver.
+ *
+ * RESTART_LUBY restarts after a number of conflicts following the Luby
+ * sequence, RESTART_GLUCOSE restarts when the recently learned clauses are
+ * worse than the average (measured by their LBD, see cdcl.h). Saved phases
+ * and activities are kept across restarts.
+ */
+typedef enum Restart { RESTART_NONE, RESTART_LUBY, RESTART_GLUCOSE } Restart;
+
+/**
+ * Options to configure the solver.
+ *
+ * Should be initialized with defaultSolverOptions and then adjusted.
+ */
+typedef struct SolverOptions {
+    Algorithm algorithm;
+    Propagation propagation;
+    Decision decision;
+    Restart restart;
+    // memory for learned clauses in KiB before they are reduced, 0 means
+    // no limit (CDCL only)
+    unsigned long learned_limit;
+    // number of conflicts after which the search gives up, 0 means no limit
+    unsigned long conflict_limit;
+} SolverOptions;
+
+/**
+ * Results of a solver run. SOLVE_UNKNOWN means that the conflict limit was
+ * reached before the formula was decided.
+ */
+typedef enum SolveResult { SOLVE_UNSAT, SOLVE_SAT, SOLVE_UNKNOWN } SolveResult;
+
+/**
+ * Counters collected during a solver run.
+ */
+typedef struct SolverStats {
+    unsigned long decisions;
+    unsigned long conflicts;
+    unsigned long propagations;  // implied assignments
+    unsigned long restarts;
+    unsigned long deleted;  // learned clauses removed by reductions
+} SolverStats;
+
+/**
+ * Returns the default solver options.
+ *
+ * @return  the default options
+ */
+SolverOptions defaultSolverOptions(void);
+
 /**
  * Tests whether a formula in CNF is satisfiable.
  *
@@ -11,3 +89,29 @@
  * @return         1 if the formula is satisfiable, 0 otherwise
  */
 char isSatisfiable(VarTable *vt, CNF *cnf);
+
+/**
+ * Decides whether a formula in CNF is satisfiable within the conflict limit
+ * of the options.
+ *
+ * @param vt       the underlying variable table
+ * @param cnf      a formula to test
+ * @param opts     the solver options
+ * @param stats    is filled with the counters of the run, may be NULL
+ * @return         the result, the variable table contains a satisfying
+ *                 assignment for SOLVE_SAT
+ */
+SolveResult solveWithOptions(VarTable *vt, CNF *cnf, const SolverOptions *opts,
+                             SolverStats *stats);
+
+/**
+ * Tests whether a formula in CNF is satisfiable using the given options.
+ *
+ * @param vt       the underlying variable table
+ * @param cnf      a formula to test
+ * @param opts     the solver options
+ * @param stats    is filled with the counters of the run, may be NULL
+ * @return         1 if the formula is satisfiable, 0 otherwise
+ */
+char isSatisfiableWithOptions(VarTable *vt, CNF *cnf,
+                              const SolverOptions *opts, SolverStats *stats);
@@ -1,9 +1,23 @@
 #include "err.h"
 
+#include <setjmp.h>
 #include <stdio.h>
 #include <stdlib.h>
 
+#define ERR_MSG_LEN 256
+
+static _Thread_local jmp_buf* error_jump = NULL;
+static _Thread_local char error_msg[ERR_MSG_LEN];
+
 void err(const char* msg) {
+    if (error_jump != NULL) {
+        snprintf(error_msg, ERR_MSG_LEN, "Error: %s!", msg);
+        longjmp(*error_jump, 1);
+    }
     fprintf(stderr, "Error: %s!\n", msg);
     exit(30);
 }
+
+void setErrorJump(jmp_buf* env) { error_jump = env; }
+
+const char* getErrorMessage(void) { return error_msg; }
@@ -1,13 +1,33 @@
 #ifndef ERR_H
 #define ERR_H
 
+#include <setjmp.h>
 #include <stdio.h>
 
 /**
  * Prints an error message and exits the program.
  *
+ * If a jump buffer was installed with setErrorJump, the message is stored
+ * instead and err jumps to the buffer.
+ *
  * @param msg  an error message
  */
 void err(const char* msg);
 
+/**
+ * Installs a jump buffer of the calling thread that err returns to instead of
+ * exiting, so that a long-running process can recover from invalid inputs.
+ *
+ * @param env  a buffer initialized by setjmp, or NULL to exit on errors again
+ */
+void setErrorJump(jmp_buf* env);
+
+/**
+ * Returns the message of the last error of the calling thread that jumped to
+ * an installed buffer.
+ *
+ * @return  the formatted error message
+ */
+const char* getErrorMessage(void);
+
 #endif /* ERR_H */
@@ -35,9 +35,9 @@ int stripWhiteSpaces(FILE* input) {
 }
 
 char* nextToken(FILE* input) {
-    static char reachedEOF = 0;
-
-    if (reachedEOF) {
+    // the end of file indicator is kept per stream, so that several inputs
+    // can be tokenized one after another
+    if (feof(input)) {
         return NULL;
     }
 
@@ -46,7 +46,6 @@ char* nextToken(FILE* input) {
     int t = stripWhiteSpaces(input);
 
     if (t == EOF) {
-        reachedEOF = 1;
         return NULL;
     }
 
@@ -65,7 +64,6 @@ char* nextToken(FILE* input) {
         int t = getc(input);
 
         if (t == EOF) {
-            reachedEOF = 1;
             break;
         }
         c = (char)t;
@@ -3,6 +3,7 @@
 #include <assert.h>
 #include <stdlib.h>
 
+#include "arena.h"
 #include "err.h"
 #include "util.h"
 
@@ -14,6 +15,11 @@ typedef struct ListItem {
     void* data;             // pointer to the data
 } ListItem;
 
+/**
+ * All list elements of a thread are allocated from one pool.
+ */
+static _Thread_local Pool item_pool = POOL_INIT(sizeof(ListItem));
+
 List mkList(void) {
     List res;
     res.head = NULL;
@@ -26,7 +32,7 @@ void clearList(List* s) {
 
     while (current != NULL) {  // Top element is not null
         next = current->next;  // next has the next element
-        free(current);         // free current element
+        poolFree(&item_pool, current);  // free current element
         current = next;        // change current to next to move to next element
     }
 
@@ -34,7 +40,7 @@ void clearList(List* s) {
 }
 
 void push(List* s, void* data) {
-    ListItem* newitem = malloc(sizeof(ListItem));  // allocation
+    ListItem* newitem = (ListItem*)poolAlloc(&item_pool);  // allocation
 
     newitem->data = data;     // data we recieve to newitem data
     newitem->next = s->head;  // our current head gets shifted to next
@@ -58,7 +64,7 @@ void pop(List* s) {
         next = current->next;  // current element assigned to head, thereby
                                // deletion of an element
         s->head = next;
-        free(current);
+        poolFree(&item_pool, current);
     }
 }
 
@@ -1,21 +1,51 @@
+#include <setjmp.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <sys/resource.h>
+#include <time.h>
 
 #include "cnf_parser.h"
 #include "dpll.h"
+#include "err.h"
 #include "parser.h"
+#include "preprocess.h"
 #include "propformula.h"
 #include "tseitin.h"
 #include "variables.h"
 
+#define SERVER_HEADER_LEN 1024
+
 void printUsage(char* bin) {
     printf(
         "Usage: %s [options] [file]\n\n"
         "If no file is specified, input from stdin is expected.\n\n"
         "Options:\n"
-        "  --cnf              Read CNF directly (fast mode)\n"
+        "  --cnf               Read a CNF with one clause per line (fast "
+        "mode).\n"
+        "  --dimacs            Read a CNF in DIMACS format.\n"
+        "  --cdcl              Use conflict-driven clause learning.\n"
+        "  --decision=MODE     Decision heuristic: 'first' (default) or "
+        "'vsids'.\n"
+        "  --restart=MODE      CDCL restarts: 'none' (default), 'luby' or "
+        "'glucose'.\n"
+        "  --learned-limit=KIB Memory for learned clauses before they are "
+        "reduced,\n"
+        "                      0 for no limit (default 262144).\n"
+        "  --propagation=MODE  Unit propagation: 'watched' (default) or "
+        "'scan'.\n"
+        "  --preprocess        Simplify the CNF before solving it.\n"
+        "  --encoding=MODE     CNF encoding of formulas: 'tseitin' (default) "
+        "or\n"
+        "                      'compact'.\n"
+        "  --output=FORMAT     Result format: 'text' (default) or 'compact' "
+        "with\n"
+        "                      's' and 'v' lines like DIMACS solvers.\n"
+        "  --server            Answer length-prefixed requests on stdin until "
+        "it is\n"
+        "                      closed.\n"
         "  -v, --verbose       Print additional data.\n"
+        "  -s, --stats         Print timing and search statistics.\n"
         "  -p, --printformula  Only parse the propositional formula and print "
         "it.\n"
         "  -c, --printcnf      Only construct the CNF for the formula and "
@@ -24,23 +54,303 @@ void printUsage(char* bin) {
         bin);
 }
 
+/**
+ * Returns the processor time in seconds that passed since a given clock value.
+ */
+static double secondsSince(clock_t start) {
+    return (double)(clock() - start) / CLOCKS_PER_SEC;
+}
+
+/**
+ * Returns the peak resident set size of the process in KiB.
+ *
+ * Prefers the high water mark of the current image from /proc, since the
+ * value of getrusage also covers the process before exec.
+ */
+static long peakMemory(void) {
+    long res = -1;
+    char line[128];
+
+    FILE* status = fopen("/proc/self/status", "r");
+    if (status != NULL) {
+        while (res < 0 && fgets(line, sizeof(line), status)) {
+            if (sscanf(line, "VmHWM: %ld kB", &res) != 1) {
+                res = -1;
+            }
+        }
+        fclose(status);
+    }
+
+    struct rusage usage;
+    if (res < 0 && getrusage(RUSAGE_SELF, &usage) == 0) {
+        res = usage.ru_maxrss;
+    }
+
+    return res;
+}
+
+/**
+ * Options of a solver run that can be given on the command line and, in
+ * server mode, for every request.
+ */
+typedef struct RunOptions {
+    char cnf_mode;
+    char dimacs_mode;
+    char preprocessing;
+    char compact_output;
+    Encoding encoding;
+    SolverOptions solver;
+} RunOptions;
+
+static RunOptions defaultRunOptions(void) {
+    RunOptions res;
+    res.cnf_mode = 0;
+    res.dimacs_mode = 0;
+    res.preprocessing = 0;
+    res.compact_output = 0;
+    res.encoding = ENCODE_TSEITIN;
+    res.solver = defaultSolverOptions();
+    return res;
+}
+
+/**
+ * Applies a single run option.
+ *
+ * @param arg   a command line argument
+ * @param run   the options to update
+ * @return      1 if arg is a valid run option, 0 otherwise
+ */
+static char parseRunOption(const char* arg, RunOptions* run) {
+    if (strcmp(arg, "--cnf") == 0) {
+        run->cnf_mode = 1;
+    } else if (strcmp(arg, "--dimacs") == 0) {
+        run->dimacs_mode = 1;
+    } else if (strcmp(arg, "--cdcl") == 0) {
+        run->solver.algorithm = ALGORITHM_CDCL;
+    } else if (strcmp(arg, "--decision=first") == 0) {
+        run->solver.decision = DECIDE_FIRST;
+    } else if (strcmp(arg, "--decision=vsids") == 0) {
+        run->solver.decision = DECIDE_VSIDS;
+    } else if (strcmp(arg, "--restart=luby") == 0) {
+        run->solver.restart = RESTART_LUBY;
+    } else if (strcmp(arg, "--restart=glucose") == 0) {
+        run->solver.restart = RESTART_GLUCOSE;
+    } else if (strcmp(arg, "--restart=none") == 0) {
+        run->solver.restart = RESTART_NONE;
+    } else if (strncmp(arg, "--learned-limit=", 16) == 0) {
+        char* end;
+        unsigned long limit = strtoul(arg + 16, &end, 10);
+        if (arg[16] == '\0' || *end != '\0') {
+            return 0;
+        }
+        run->solver.learned_limit = limit;
+    } else if (strcmp(arg, "--propagation=scan") == 0) {
+        run->solver.propagation = PROPAGATE_SCAN;
+    } else if (strcmp(arg, "--propagation=watched") == 0) {
+        run->solver.propagation = PROPAGATE_WATCHED;
+    } else if (strcmp(arg, "--encoding=tseitin") == 0) {
+        run->encoding = ENCODE_TSEITIN;
+    } else if (strcmp(arg, "--encoding=compact") == 0) {
+        run->encoding = ENCODE_COMPACT;
+    } else if (strcmp(arg, "--preprocess") == 0) {
+        run->preprocessing = 1;
+    } else if (strcmp(arg, "--output=text") == 0) {
+        run->compact_output = 0;
+    } else if (strcmp(arg, "--output=compact") == 0) {
+        run->compact_output = 1;
+    } else {
+        return 0;
+    }
+    return 1;
+}
+
+/**
+ * Writes the result of a run in the output format of the options.
+ *
+ * @param vt    the variable table, holds the model for SAT results
+ * @param sat   1 for SAT, 0 for UNSAT
+ * @param run   the options of the run
+ * @param out   the stream to write to
+ */
+static void writeResult(VarTable* vt, char sat, const RunOptions* run,
+                        FILE* out) {
+    if (run->compact_output) {
+        if (sat) {
+            fputs("s SATISFIABLE\n", out);
+            writeCompactAssignment(vt, out);
+        } else {
+            fputs("s UNSATISFIABLE\n", out);
+        }
+    } else if (sat) {
+        fputs("SAT: Assignment is\n", out);
+        writeSatisfyingAssignment(vt, out);
+    } else {
+        fputs("UNSAT\n", out);
+    }
+}
+
+/**
+ * Solves a single input of the server mode and writes what a normal run would
+ * print on stdout, or the error message for an invalid input, to out.
+ *
+ * All memory of valid inputs is released again. Invalid inputs may leave
+ * parts of the partially parsed formula behind, so clients should replace a
+ * server after too many of them.
+ *
+ * @param input  the input to solve
+ * @param run    the options for this input
+ * @param out    the stream for the output
+ * @return       the exit code of a normal run: 10 for SAT, 20 for UNSAT and
+ *               30 for invalid inputs
+ */
+static int solveRequest(FILE* input, const RunOptions* run, FILE* out) {
+    VarTable* vt = mkVarTable();
+    CNF* cnf = NULL;
+    PropFormula* pf = NULL;
+
+    jmp_buf on_error;
+    if (setjmp(on_error) != 0) {
+        setErrorJump(NULL);
+        freeVarTable(vt);
+        fprintf(out, "%s\n", getErrorMessage());
+        return 30;
+    }
+    setErrorJump(&on_error);
+
+    if (run->dimacs_mode) {
+        cnf = parseDIMACS(input, vt);
+    } else if (run->cnf_mode) {
+        cnf = parseCNF(input, vt);
+    } else {
+        pf = parseFormula(input, vt);
+        cnf = getCNFWithEncoding(vt, pf, run->encoding);
+    }
+
+    setErrorJump(NULL);
+
+    ModelExtension* ext = NULL;
+    PreprocessStats pp_stats;
+    if (run->preprocessing) {
+        cnf = preprocess(vt, cnf, &ext, &pp_stats);
+    }
+
+    char sat = isSatisfiableWithOptions(vt, cnf, &run->solver, NULL);
+    if (sat && ext != NULL) {
+        extendModel(vt, ext);
+    }
+    writeResult(vt, sat, run, out);
+
+    freeFormula(pf);
+    freeCNF(cnf);
+    if (ext != NULL) {
+        freeModelExtension(ext);
+    }
+    freeVarTable(vt);
+
+    return sat ? 10 : 20;
+}
+
+/**
+ * Answers requests on stdin until it is closed, so that a single process can
+ * solve many inputs without paying for its start-up every time.
+ *
+ * A request is a header line with the length of the input in bytes,
+ * optionally followed by run options separated by spaces, e.g.
+ * "42 --cdcl --encoding=compact", and then the input itself. The options of
+ * the command line apply to every request. The response is a header line with
+ * the exit code of a normal run and the length of the output in bytes,
+ * followed by the output: what a normal run prints on stdout, or the error
+ * message for invalid inputs. Invalid options are answered with exit code 2.
+ *
+ * @param defaults  the options of the command line
+ * @return          0 when stdin was closed, 2 for a malformed request
+ */
+static int runServer(const RunOptions* defaults) {
+    char header[SERVER_HEADER_LEN];
+
+    while (fgets(header, SERVER_HEADER_LEN, stdin) != NULL) {
+        size_t header_len = strlen(header);
+        char* end;
+        unsigned long long size = strtoull(header, &end, 10);
+
+        if (header[header_len - 1] != '\n' || end == header ||
+            (*end != ' ' && *end != '\n')) {
+            fputs("Error: malformed request header!\n", stderr);
+            return 2;
+        }
+        header[header_len - 1] = '\0';
+
+        // the input is terminated by a line break that is not part of the
+        // request, so that empty requests are valid streams as well
+        char* buf = (char*)malloc(size + 1);
+        if (buf == NULL) {
+            fputs("Error: request too large!\n", stderr);
+            return 2;
+        }
+        if (fread(buf, 1, size, stdin) != size) {
+            free(buf);
+            fputs("Error: truncated request!\n", stderr);
+            return 2;
+        }
+        buf[size] = '\n';
+
+        char* out_buf = NULL;
+        size_t out_size = 0;
+        FILE* out = open_memstream(&out_buf, &out_size);
+
+        RunOptions run = *defaults;
+        int res = 0;
+        for (char* opt = strtok(end, " "); opt != NULL;
+             opt = strtok(NULL, " ")) {
+            if (!parseRunOption(opt, &run)) {
+                fprintf(out, "Error: invalid option '%s'!\n", opt);
+                res = 2;
+                break;
+            }
+        }
+
+        if (res == 0) {
+            FILE* input = fmemopen(buf, size + 1, "r");
+            res = solveRequest(input, &run, out);
+            fclose(input);
+        }
+
+        fclose(out);
+        free(buf);
+
+        printf("%d %zu\n", res, out_size);
+        fwrite(out_buf, 1, out_size, stdout);
+        fflush(stdout);
+        free(out_buf);
+    }
+
+    return 0;
+}
+
 int main(int argc, char* argv[]) {
     FILE* input = stdin;
 
     char has_file = 0;
     char verbose = 0;
+    char print_stats = 0;
     char formula_only = 0;
     char cnf_only = 0;
-    char cnf_mode = 0;
+    char server = 0;
+    RunOptions run = defaultRunOptions();
 
     for (int i = 1; i < argc; i++) {
-        if (strcmp(argv[i], "--cnf") == 0) {
-            cnf_mode = 1;
+        if (parseRunOption(argv[i], &run)) {
+            continue;
+        } else if (strcmp(argv[i], "--server") == 0) {
+            server = 1;
         } else if (argv[i][0] == '-') {
             switch (argv[i][1]) {
                 case 'v':
                     verbose = 1;
                     break;
+                case 's':
+                    print_stats = 1;
+                    break;
                 case 'p':
                     formula_only = 1;
                     break;
@@ -58,6 +368,8 @@ int main(int argc, char* argv[]) {
                         cnf_only = 1;
                     } else if (0 == strncmp(argv[i], "--verbose", 10)) {
                         verbose = 1;
+                    } else if (0 == strncmp(argv[i], "--stats", 8)) {
+                        print_stats = 1;
                     } else if (0 == strncmp(argv[i], "--help", 7)) {
                         printUsage(argv[0]);
                         exit(0);
@@ -84,15 +396,27 @@ int main(int argc, char* argv[]) {
         }
     }
 
+    if (server) {
+        return runServer(&run);
+    }
+
     // Check options and flags for mode selection
     VarTable* vt = mkVarTable();
     CNF* cnf = NULL;
     PropFormula* pf = NULL;
+    double parse_time = 0;
+    double encode_time = 0;
+    clock_t start = clock();
 
-    if (cnf_mode) {
+    if (run.dimacs_mode) {
+        cnf = parseDIMACS(input, vt);
+        parse_time = secondsSince(start);
+    } else if (run.cnf_mode) {
         cnf = parseCNF(input, vt);
+        parse_time = secondsSince(start);
     } else {
         pf = parseFormula(input, vt);
+        parse_time = secondsSince(start);
 
         if (formula_only) {
             printf("Propositional formula:\n  ");
@@ -111,11 +435,13 @@ int main(int argc, char* argv[]) {
             return 0;
         }
 
-        cnf = getCNF(vt, pf);
+        start = clock();
+        cnf = getCNFWithEncoding(vt, pf, run.encoding);
+        encode_time = secondsSince(start);
     }
 
     // PRINTING VERBOSE OR CNF ONLY
-    if (verbose && !cnf_mode) {
+    if (verbose && pf != NULL) {
         printf("Propositional formula:\n  ");
         prettyPrintFormula(vt, pf);
         printf("\n\n");
@@ -140,6 +466,12 @@ int main(int argc, char* argv[]) {
         return 0;
     }
 
+    ModelExtension* ext = NULL;
+    PreprocessStats pp_stats;
+    if (run.preprocessing) {
+        cnf = preprocess(vt, cnf, &ext, &pp_stats);
+    }
+
     if (verbose) {
         printf("Conjunctive Normal Form:\n  ");
         prettyPrintCNF(vt, cnf);
@@ -148,14 +480,46 @@ int main(int argc, char* argv[]) {
     }
 
     char sat = 0;
+    SolverStats stats;
+    start = clock();
+
+    char result = isSatisfiableWithOptions(vt, cnf, &run.solver, &stats);
+    double solve_time = secondsSince(start);
 
-    if (isSatisfiable(vt, cnf)) {
-        printf("SAT: Assignment is\n");
-        printSatisfyingAssignmentEval(vt);
+    if (result) {
+        if (ext != NULL) {
+            extendModel(vt, ext);
+        }
         sat = 1;
-    } else {
-        printf("UNSAT\n");
-        sat = 0;
+    }
+    writeResult(vt, sat, &run, stdout);
+
+    if (verbose || print_stats) {
+        printf("\nStatistics:\n");
+        printf("  variables: %u\n", getVariableCount(vt));
+        printf("  parse time: %.3f s\n", parse_time);
+        printf("  encode time: %.3f s\n", encode_time);
+        if (run.preprocessing) {
+            printf("  preprocessing: %u clauses reduced to %u\n",
+                   pp_stats.clauses_before, pp_stats.clauses_after);
+            printf("    units: %lu fixed, %.3f s\n", pp_stats.fixed,
+                   pp_stats.unit_time);
+            printf("    pure literals: %lu removed, %.3f s\n", pp_stats.pure,
+                   pp_stats.pure_time);
+            printf("    subsumption: %lu subsumed, %lu strengthened, %.3f s\n",
+                   pp_stats.subsumed, pp_stats.strengthened,
+                   pp_stats.subsumption_time);
+            printf("    elimination: %lu eliminated, %.3f s\n",
+                   pp_stats.eliminated, pp_stats.elimination_time);
+        }
+        printf("  solve time: %.3f s\n", solve_time);
+
+        printf("  peak memory: %ld KiB\n", peakMemory());
+        printf("  decisions: %lu\n", stats.decisions);
+        printf("  conflicts: %lu\n", stats.conflicts);
+        printf("  propagations: %lu\n", stats.propagations);
+        printf("  restarts: %lu\n", stats.restarts);
+        printf("  deleted clauses: %lu\n", stats.deleted);
     }
 
     freeFormula(pf);
@@ -164,6 +528,10 @@ int main(int argc, char* argv[]) {
     freeCNF(cnf);
     cnf = NULL;
 
+    if (ext != NULL) {
+        freeModelExtension(ext);
+    }
+
     freeVarTable(vt);
 
     if (input != stdin) {
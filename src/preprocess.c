@@ -0,0 +1,675 @@
+#include "preprocess.h"
+
+#include <assert.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+#include "arena.h"
+
+#define INIT_CAPACITY 16
+
+// the passes are repeated at most this often
+#define MAX_ROUNDS 8
+// clauses longer than this are not used to subsume or strengthen others
+#define SUBSUME_SIZE_LIMIT 32
+// variables occurring more often in one polarity are not eliminated
+#define ELIM_OCC_LIMIT 16
+// variables are not eliminated if a resolvent would be longer than this
+#define ELIM_RESOLVENT_LIMIT 24
+
+/**
+ * States of a variable during preprocessing.
+ */
+typedef enum VarState { ACTIVE, FIXED, PURE, ELIMINATED } VarState;
+
+/**
+ * Mutable copy of a clause. Literals are only ever removed from a clause.
+ */
+typedef struct PClause {
+    Literal* literals;
+    unsigned size;
+    char removed;
+} PClause;
+
+/**
+ * Indices of the clauses containing a literal. Removed clauses are only
+ * dropped from the list when it is compacted by occurrences, count is always
+ * exact.
+ */
+typedef struct OccList {
+    unsigned* clauses;
+    unsigned size;
+    unsigned capacity;
+    unsigned count;  // number of clauses that are not removed
+} OccList;
+
+struct ModelExtension {
+    // entries of the form witness, other literals..., 0
+    Literal* literals;
+    unsigned size;
+    unsigned capacity;
+};
+
+typedef struct Simplifier {
+    unsigned num_vars;
+    PClause* clauses;
+    unsigned num_clauses;
+    unsigned clauses_capacity;
+    OccList* occs;        // indexed by litIndex
+    char* marks;          // indexed by litIndex, used for subset checks
+    VarState* state;      // indexed by variable
+    TruthValue* value;    // values of the FIXED variables
+    Literal* units;       // literals of unit clauses still to propagate
+    unsigned units_head;  // next unit to propagate
+    unsigned num_units;
+    unsigned units_capacity;
+    Literal* buffer;  // resolvent under construction
+    unsigned buffer_capacity;
+    char unsat;       // the empty clause was derived
+    ModelExtension* ext;
+    PreprocessStats* stats;
+    Arena storage;  // literal arrays and occurrence lists
+} Simplifier;
+
+/**
+ * Maps a literal to the position of its occurrence list and mark.
+ */
+static unsigned litIndex(Literal l) {
+    return l > 0 ? 2 * (unsigned)l : 2 * (unsigned)(-l) + 1;
+}
+
+static double secondsSince(clock_t start) {
+    return (double)(clock() - start) / CLOCKS_PER_SEC;
+}
+
+static void addOccurrence(Simplifier* s, Literal l, unsigned ci) {
+    OccList* ol = s->occs + litIndex(l);
+    if (ol->size == ol->capacity) {
+        ol->capacity = ol->capacity == 0 ? 4 : 2 * ol->capacity;
+        // an outgrown list is left behind in the arena
+        unsigned* grown = (unsigned*)arenaAlloc(
+            &s->storage, ol->capacity * sizeof(unsigned));
+        if (ol->size > 0) {
+            memcpy(grown, ol->clauses, ol->size * sizeof(unsigned));
+        }
+        ol->clauses = grown;
+    }
+    ol->clauses[ol->size++] = ci;
+    ol->count++;
+}
+
+/**
+ * Returns the occurrence list of a literal after dropping removed clauses.
+ */
+static OccList* occurrences(Simplifier* s, Literal l) {
+    OccList* ol = s->occs + litIndex(l);
+    unsigned keep = 0;
+    for (unsigned i = 0; i < ol->size; i++) {
+        if (!s->clauses[ol->clauses[i]].removed) {
+            ol->clauses[keep++] = ol->clauses[i];
+        }
+    }
+    ol->size = keep;
+    assert(ol->size == ol->count);
+    return ol;
+}
+
+static void enqueueUnit(Simplifier* s, Literal l) {
+    if (s->num_units == s->units_capacity) {
+        s->units_capacity = 2 * s->units_capacity;
+        s->units = (Literal*)realloc(s->units,
+                                     s->units_capacity * sizeof(Literal));
+    }
+    s->units[s->num_units++] = l;
+}
+
+/**
+ * Adds a clause to the simplifier. Duplicate literals are dropped and
+ * tautologies are ignored.
+ */
+static void addSimplifierClause(Simplifier* s, const Literal* literals,
+                                unsigned size) {
+    Literal* lits = (Literal*)arenaAlloc(&s->storage,
+                                         (size + 1) * sizeof(Literal));
+    unsigned n = 0;
+    char tautology = 0;
+
+    for (unsigned i = 0; i < size; i++) {
+        Literal l = literals[i];
+        if (s->marks[litIndex(-l)]) {
+            tautology = 1;
+            break;
+        }
+        if (!s->marks[litIndex(l)]) {
+            s->marks[litIndex(l)] = 1;
+            lits[n++] = l;
+        }
+    }
+    for (unsigned i = 0; i < n; i++) {
+        s->marks[litIndex(lits[i])] = 0;
+    }
+    if (tautology) {
+        return;
+    }
+
+    if (n == 0) {
+        s->unsat = 1;
+        return;
+    }
+    if (n == 1) {
+        enqueueUnit(s, lits[0]);
+    }
+
+    if (s->num_clauses == s->clauses_capacity) {
+        s->clauses_capacity = 2 * s->clauses_capacity;
+        s->clauses = (PClause*)realloc(
+            s->clauses, s->clauses_capacity * sizeof(PClause));
+    }
+    unsigned ci = s->num_clauses++;
+    s->clauses[ci].literals = lits;
+    s->clauses[ci].size = n;
+    s->clauses[ci].removed = 0;
+
+    for (unsigned i = 0; i < n; i++) {
+        addOccurrence(s, lits[i], ci);
+    }
+}
+
+static void removeClause(Simplifier* s, unsigned ci) {
+    PClause* c = s->clauses + ci;
+    assert(!c->removed);
+    c->removed = 1;
+    for (unsigned i = 0; i < c->size; i++) {
+        s->occs[litIndex(c->literals[i])].count--;
+    }
+}
+
+/**
+ * Removes a literal from a clause. The caller is responsible for removing
+ * the clause from the occurrence list of the literal.
+ */
+static void strengthenClause(Simplifier* s, unsigned ci, Literal l) {
+    PClause* c = s->clauses + ci;
+    for (unsigned i = 0; i < c->size; i++) {
+        if (c->literals[i] == l) {
+            c->literals[i] = c->literals[--c->size];
+            break;
+        }
+    }
+    s->occs[litIndex(l)].count--;
+
+    if (c->size == 0) {
+        s->unsat = 1;
+    } else if (c->size == 1) {
+        enqueueUnit(s, c->literals[0]);
+    }
+}
+
+/**
+ * Pushes a removed clause onto the model extension. The witness is made TRUE
+ * during reconstruction if the clause is not satisfied.
+ */
+static void pushExtension(Simplifier* s, const Literal* literals,
+                          unsigned size, Literal witness) {
+    ModelExtension* ext = s->ext;
+    while (ext->size + size + 1 > ext->capacity) {
+        ext->capacity = 2 * ext->capacity;
+        ext->literals = (Literal*)realloc(ext->literals,
+                                          ext->capacity * sizeof(Literal));
+    }
+    ext->literals[ext->size++] = witness;
+    for (unsigned i = 0; i < size; i++) {
+        if (literals[i] != witness) {
+            ext->literals[ext->size++] = literals[i];
+        }
+    }
+    ext->literals[ext->size++] = 0;
+}
+
+/**
+ * Removes all clauses containing a literal.
+ */
+static void removeOccurrences(Simplifier* s, Literal l) {
+    OccList* ol = occurrences(s, l);
+    for (unsigned i = 0; i < ol->size; i++) {
+        removeClause(s, ol->clauses[i]);
+    }
+    ol->size = 0;
+}
+
+/**
+ * Assigns the literals of unit clauses and simplifies the clauses
+ * accordingly, until no unit clauses are left.
+ */
+static void propagateUnits(Simplifier* s) {
+    while (s->units_head < s->num_units && !s->unsat) {
+        Literal l = s->units[s->units_head++];
+        VarIndex v = (VarIndex)abs(l);
+
+        if (s->state[v] == FIXED) {
+            // a unit with the opposite value became the empty clause before
+            assert(s->value[v] == (l > 0 ? TRUE : FALSE));
+            continue;
+        }
+        if (s->state[v] != ACTIVE) {
+            // the unit clause was removed together with its variable
+            continue;
+        }
+
+        s->state[v] = FIXED;
+        s->value[v] = l > 0 ? TRUE : FALSE;
+        s->stats->fixed++;
+        pushExtension(s, &l, 1, l);
+
+        removeOccurrences(s, l);
+
+        OccList* ol = occurrences(s, -l);
+        for (unsigned i = 0; i < ol->size && !s->unsat; i++) {
+            strengthenClause(s, ol->clauses[i], -l);
+        }
+        ol->size = 0;
+    }
+}
+
+/**
+ * Removes the clauses of variables that only occur in one polarity.
+ *
+ * @return  1 if a variable was removed
+ */
+static char eliminatePureLiterals(Simplifier* s) {
+    char any = 0;
+    char changed = 1;
+
+    while (changed) {
+        changed = 0;
+        for (VarIndex v = 1; v <= (VarIndex)s->num_vars; v++) {
+            if (s->state[v] != ACTIVE) {
+                continue;
+            }
+            unsigned pos = s->occs[litIndex(v)].count;
+            unsigned neg = s->occs[litIndex(-v)].count;
+            // unused variables are left to the solver
+            if ((pos == 0) == (neg == 0)) {
+                continue;
+            }
+
+            Literal l = pos > 0 ? v : -v;
+            s->state[v] = PURE;
+            s->stats->pure++;
+            pushExtension(s, &l, 1, l);
+            removeOccurrences(s, l);
+            changed = 1;
+            any = 1;
+        }
+    }
+
+    return any;
+}
+
+static void markClause(Simplifier* s, PClause* c, char mark) {
+    for (unsigned i = 0; i < c->size; i++) {
+        s->marks[litIndex(c->literals[i])] = mark;
+    }
+}
+
+static unsigned countMarked(Simplifier* s, PClause* c) {
+    unsigned n = 0;
+    for (unsigned i = 0; i < c->size; i++) {
+        n += s->marks[litIndex(c->literals[i])];
+    }
+    return n;
+}
+
+/**
+ * Uses every clause C to remove the clauses it subsumes, and to strengthen
+ * clauses D that contain -l for some literal l of C and all other literals of
+ * C, since resolving C and D on l yields a subset of D.
+ *
+ * @return  1 if a clause was removed or strengthened
+ */
+static char subsumeClauses(Simplifier* s) {
+    unsigned long before = s->stats->subsumed + s->stats->strengthened;
+
+    for (unsigned ci = 0; ci < s->num_clauses && !s->unsat; ci++) {
+        PClause* c = s->clauses + ci;
+        if (c->removed || c->size > SUBSUME_SIZE_LIMIT) {
+            continue;
+        }
+        markClause(s, c, 1);
+
+        // every clause that contains C also contains its rarest literal
+        Literal rarest = c->literals[0];
+        for (unsigned i = 1; i < c->size; i++) {
+            if (s->occs[litIndex(c->literals[i])].count <
+                s->occs[litIndex(rarest)].count) {
+                rarest = c->literals[i];
+            }
+        }
+        OccList* ol = occurrences(s, rarest);
+        for (unsigned i = 0; i < ol->size; i++) {
+            unsigned di = ol->clauses[i];
+            PClause* d = s->clauses + di;
+            if (di != ci && !d->removed && d->size >= c->size &&
+                countMarked(s, d) == c->size) {
+                removeClause(s, di);
+                s->stats->subsumed++;
+            }
+        }
+
+        for (unsigned i = 0; i < c->size && !s->unsat; i++) {
+            Literal l = c->literals[i];
+            ol = occurrences(s, -l);
+            for (unsigned k = 0; k < ol->size && !s->unsat;) {
+                unsigned di = ol->clauses[k];
+                PClause* d = s->clauses + di;
+                // D cannot contain l, so it contains all other literals of C
+                if (d->size >= c->size && countMarked(s, d) == c->size - 1) {
+                    strengthenClause(s, di, -l);
+                    s->stats->strengthened++;
+                    ol->clauses[k] = ol->clauses[--ol->size];
+                } else {
+                    k++;
+                }
+            }
+        }
+
+        markClause(s, c, 0);
+    }
+
+    return s->stats->subsumed + s->stats->strengthened != before;
+}
+
+/**
+ * Computes the resolvent of a marked clause containing v and a clause D
+ * containing -v.
+ *
+ * @param s     the simplifier, with the literals of the first clause marked
+ * @param v     the variable to resolve on
+ * @param d     the clause D
+ * @param out   is filled with the literals of D that are added, may be NULL
+ * @return      the number of literals of D that are added, or -1 if the
+ *              resolvent is a tautology
+ */
+static int resolve(Simplifier* s, VarIndex v, PClause* d, Literal* out) {
+    int n = 0;
+    for (unsigned i = 0; i < d->size; i++) {
+        Literal l = d->literals[i];
+        if (l == -(Literal)v || s->marks[litIndex(l)]) {
+            continue;
+        }
+        if (s->marks[litIndex(-l)]) {
+            return -1;
+        }
+        if (out) {
+            out[n] = l;
+        }
+        n++;
+    }
+    return n;
+}
+
+/**
+ * Replaces all clauses containing a variable by their resolvents on the
+ * variable, if there are not more resolvents than clauses.
+ *
+ * @return  1 if the variable was eliminated
+ */
+static char eliminateVariable(Simplifier* s, VarIndex v) {
+    OccList* pos = occurrences(s, v);
+    OccList* neg = occurrences(s, -v);
+
+    if (pos->size + neg->size == 0 || pos->size > ELIM_OCC_LIMIT ||
+        neg->size > ELIM_OCC_LIMIT) {
+        return 0;
+    }
+
+    unsigned limit = pos->size + neg->size;
+    unsigned num_resolvents = 0;
+    for (unsigned i = 0; i < pos->size; i++) {
+        PClause* c = s->clauses + pos->clauses[i];
+        markClause(s, c, 1);
+        for (unsigned k = 0; k < neg->size; k++) {
+            int n = resolve(s, v, s->clauses + neg->clauses[k], NULL);
+            if (n < 0) {
+                continue;
+            }
+            if (c->size - 1 + (unsigned)n > ELIM_RESOLVENT_LIMIT ||
+                ++num_resolvents > limit) {
+                markClause(s, c, 0);
+                return 0;
+            }
+        }
+        markClause(s, c, 0);
+    }
+
+    for (unsigned i = 0; i < pos->size; i++) {
+        PClause* c = s->clauses + pos->clauses[i];
+        pushExtension(s, c->literals, c->size, v);
+    }
+    for (unsigned k = 0; k < neg->size; k++) {
+        PClause* d = s->clauses + neg->clauses[k];
+        pushExtension(s, d->literals, d->size, -v);
+    }
+
+    // resolvents never contain v, so pos and neg are not changed below
+    for (unsigned i = 0; i < pos->size && !s->unsat; i++) {
+        // the clauses may move when resolvents are added
+        PClause* c = s->clauses + pos->clauses[i];
+        for (unsigned k = 0; k < neg->size; k++) {
+            unsigned size = c->size + s->clauses[neg->clauses[k]].size;
+            if (size > s->buffer_capacity) {
+                s->buffer_capacity = size;
+                s->buffer = (Literal*)realloc(
+                    s->buffer, s->buffer_capacity * sizeof(Literal));
+            }
+        }
+
+        unsigned n = 0;
+        for (unsigned j = 0; j < c->size; j++) {
+            if (c->literals[j] != (Literal)v) {
+                s->buffer[n++] = c->literals[j];
+            }
+        }
+
+        for (unsigned k = 0; k < neg->size && !s->unsat; k++) {
+            // addSimplifierClause uses the marks itself
+            c = s->clauses + pos->clauses[i];
+            markClause(s, c, 1);
+            int m = resolve(s, v, s->clauses + neg->clauses[k],
+                            s->buffer + n);
+            markClause(s, c, 0);
+            if (m >= 0) {
+                addSimplifierClause(s, s->buffer, n + (unsigned)m);
+            }
+        }
+    }
+
+    removeOccurrences(s, v);
+    removeOccurrences(s, -v);
+    s->state[v] = ELIMINATED;
+    s->stats->eliminated++;
+    return 1;
+}
+
+typedef struct Candidate {
+    unsigned long cost;
+    VarIndex var;
+} Candidate;
+
+static int compareCandidates(const void* a, const void* b) {
+    unsigned long x = ((const Candidate*)a)->cost;
+    unsigned long y = ((const Candidate*)b)->cost;
+    return (x > y) - (x < y);
+}
+
+/**
+ * Tries to eliminate all variables, cheapest first.
+ *
+ * @return  1 if a variable was eliminated
+ */
+static char eliminateVariables(Simplifier* s) {
+    Candidate* candidates =
+        (Candidate*)malloc((s->num_vars + 1) * sizeof(Candidate));
+    unsigned n = 0;
+
+    for (VarIndex v = 1; v <= (VarIndex)s->num_vars; v++) {
+        unsigned pos = s->occs[litIndex(v)].count;
+        unsigned neg = s->occs[litIndex(-v)].count;
+        if (s->state[v] == ACTIVE && pos <= ELIM_OCC_LIMIT &&
+            neg <= ELIM_OCC_LIMIT && pos + neg > 0) {
+            candidates[n].cost = (unsigned long)pos * neg;
+            candidates[n].var = v;
+            n++;
+        }
+    }
+    qsort(candidates, n, sizeof(Candidate), compareCandidates);
+
+    char any = 0;
+    for (unsigned i = 0; i < n && !s->unsat; i++) {
+        if (s->state[candidates[i].var] == ACTIVE &&
+            eliminateVariable(s, candidates[i].var)) {
+            any = 1;
+            propagateUnits(s);
+        }
+    }
+
+    free(candidates);
+    return any;
+}
+
+CNF* preprocess(VarTable* vt, CNF* cnf, ModelExtension** ext,
+                PreprocessStats* stats) {
+    PreprocessStats local_stats;
+    if (!stats) {
+        stats = &local_stats;
+    }
+    memset(stats, 0, sizeof(PreprocessStats));
+    stats->clauses_before = cnf->size;
+
+    Simplifier s;
+    unsigned num_lits = 2 * (getVariableCount(vt) + 1);
+    s.num_vars = getVariableCount(vt);
+    s.clauses_capacity = cnf->size > 0 ? cnf->size : INIT_CAPACITY;
+    s.clauses = (PClause*)malloc(s.clauses_capacity * sizeof(PClause));
+    s.num_clauses = 0;
+    s.occs = (OccList*)calloc(num_lits, sizeof(OccList));
+    s.marks = (char*)calloc(num_lits, sizeof(char));
+    s.state = (VarState*)calloc(s.num_vars + 1, sizeof(VarState));
+    s.value = (TruthValue*)malloc((s.num_vars + 1) * sizeof(TruthValue));
+    s.units_capacity = INIT_CAPACITY;
+    s.units = (Literal*)malloc(s.units_capacity * sizeof(Literal));
+    s.units_head = 0;
+    s.num_units = 0;
+    s.buffer_capacity = 2 * ELIM_RESOLVENT_LIMIT;
+    s.buffer = (Literal*)malloc(s.buffer_capacity * sizeof(Literal));
+    s.unsat = 0;
+    s.stats = stats;
+    s.storage = mkArena();
+
+    s.ext = (ModelExtension*)malloc(sizeof(ModelExtension));
+    s.ext->capacity = INIT_CAPACITY;
+    s.ext->literals = (Literal*)malloc(s.ext->capacity * sizeof(Literal));
+    s.ext->size = 0;
+
+    for (unsigned i = 0; i < cnf->size; i++) {
+        Clause* c = cnf->clauses[i];
+        addSimplifierClause(&s, c->literals, c->size);
+    }
+
+    for (unsigned round = 0; round < MAX_ROUNDS && !s.unsat; round++) {
+        char changed = 0;
+        clock_t start = clock();
+        unsigned long fixed = stats->fixed;
+        propagateUnits(&s);
+        changed |= stats->fixed != fixed;
+        stats->unit_time += secondsSince(start);
+
+        if (!s.unsat) {
+            start = clock();
+            changed |= eliminatePureLiterals(&s);
+            stats->pure_time += secondsSince(start);
+        }
+        if (!s.unsat) {
+            start = clock();
+            changed |= subsumeClauses(&s);
+            propagateUnits(&s);
+            stats->subsumption_time += secondsSince(start);
+        }
+        if (!s.unsat) {
+            start = clock();
+            changed |= eliminateVariables(&s);
+            stats->elimination_time += secondsSince(start);
+        }
+
+        if (!changed) {
+            break;
+        }
+    }
+
+    // the clauses of the old CNF are freed together with it
+    clearParentClauses(vt);
+    freeCNF(cnf);
+
+    CNF* res = mkCNF();
+    if (s.unsat) {
+        addClause(vt, res, NULL, 0);
+    } else {
+        for (unsigned i = 0; i < s.num_clauses; i++) {
+            PClause* c = s.clauses + i;
+            if (!c->removed) {
+                addClause(vt, res, c->literals, c->size);
+            }
+        }
+    }
+    stats->clauses_after = res->size;
+
+    *ext = s.ext;
+
+    freeArena(&s.storage);
+    free(s.clauses);
+    free(s.occs);
+    free(s.marks);
+    free(s.state);
+    free(s.value);
+    free(s.units);
+    free(s.buffer);
+
+    return res;
+}
+
+void extendModel(VarTable* vt, ModelExtension* ext) {
+    for (VarIndex v = 1; v <= (VarIndex)getVariableCount(vt); v++) {
+        if (getVariableValue(vt, v) == UNDEFINED) {
+            setVariableValue(vt, v, TRUE);
+        }
+    }
+
+    // later entries have to be processed first
+    unsigned end = ext->size;
+    while (end > 0) {
+        unsigned start = end - 1;
+        while (start > 0 && ext->literals[start - 1] != 0) {
+            start--;
+        }
+
+        char satisfied = 0;
+        for (unsigned i = start; i < end - 1; i++) {
+            if (evalLiteral(vt, ext->literals[i]) == TRUE) {
+                satisfied = 1;
+                break;
+            }
+        }
+        if (!satisfied) {
+            Literal w = ext->literals[start];
+            setVariableValue(vt, abs(w), w > 0 ? TRUE : FALSE);
+        }
+
+        end = start;
+    }
+}
+
+void freeModelExtension(ModelExtension* ext) {
+    free(ext->literals);
+    free(ext);
+}
@@ -0,0 +1,82 @@
+#pragma once
+
+/**
+ * In this file, we provide a preprocessor that simplifies a CNF before it is
+ * solved.
+ *
+ * The following techniques are applied until nothing changes anymore:
+ *  - unit propagation without decisions (level 0),
+ *  - pure literal elimination,
+ *  - subsumption and self-subsuming resolution (strengthening),
+ *  - bounded variable elimination: a variable is removed by replacing all
+ *    clauses containing it by their resolvents, if this does not increase the
+ *    number of clauses.
+ *
+ * Removed variables do not occur in the simplified CNF anymore. The clauses
+ * that were removed together with them are kept in a model extension, which
+ * turns a model of the simplified CNF into a model of the original one.
+ */
+
+#include "cnf.h"
+#include "variables.h"
+
+/**
+ * Counters and timings of the preprocessing passes, times are in seconds.
+ */
+typedef struct PreprocessStats {
+    unsigned clauses_before;
+    unsigned clauses_after;
+
+    unsigned long fixed;  // variables assigned by unit propagation
+    double unit_time;
+
+    unsigned long pure;  // variables removed as pure literals
+    double pure_time;
+
+    unsigned long subsumed;      // clauses removed by subsumption
+    unsigned long strengthened;  // literals removed by self-subsumption
+    double subsumption_time;
+
+    unsigned long eliminated;  // variables removed by variable elimination
+    double elimination_time;
+} PreprocessStats;
+
+/**
+ * Stack of removed clauses that are needed to reconstruct a model.
+ *
+ * Should only be created by preprocess.
+ */
+typedef struct ModelExtension ModelExtension;
+
+/**
+ * Simplifies a CNF.
+ *
+ * The given CNF is freed and replaced by the returned one. The parent
+ * clauses of all variables are reset to the clauses of the new CNF. If the
+ * CNF is found to be unsatisfiable, the result contains the empty clause.
+ *
+ * @param vt     the underlying variable table, all variables UNDEFINED
+ * @param cnf    the CNF to simplify
+ * @param ext    is set to the model extension for extendModel
+ * @param stats  is filled with the counters of the passes, may be NULL
+ * @return       the simplified CNF
+ */
+CNF* preprocess(VarTable* vt, CNF* cnf, ModelExtension** ext,
+                PreprocessStats* stats);
+
+/**
+ * Turns a model of the simplified CNF into a model of the original CNF.
+ *
+ * Variables that are still UNDEFINED are set to TRUE first.
+ *
+ * @param vt   the variable table containing a model of the simplified CNF
+ * @param ext  the model extension returned by preprocess
+ */
+void extendModel(VarTable* vt, ModelExtension* ext);
+
+/**
+ * Frees a model extension.
+ *
+ * @param ext  the model extension to be freed
+ */
+void freeModelExtension(ModelExtension* ext);
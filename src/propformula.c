@@ -3,11 +3,18 @@
 #include <stdio.h>
 #include <stdlib.h>
 
+#include "arena.h"
 #include "err.h"
 #include "util.h"
 
+/**
+ * All formula nodes of a thread are allocated from one pool, which is
+ * released as a whole when the last formula is freed.
+ */
+static _Thread_local Pool formula_pool = POOL_INIT(sizeof(PropFormula));
+
 PropFormula* mkVarFormula(VarTable* vt, char* name) {
-    PropFormula* res = (PropFormula*)malloc(sizeof(PropFormula));
+    PropFormula* res = (PropFormula*)poolAlloc(&formula_pool);
 
     res->kind = VAR;
     res->data.var = mkVariable(vt, name);
@@ -17,7 +24,7 @@ PropFormula* mkVarFormula(VarTable* vt, char* name) {
 
 PropFormula* mkBinaryFormula(FormulaKind kind, PropFormula* left_op,
                              PropFormula* right_op) {
-    PropFormula* res = (PropFormula*)malloc(sizeof(PropFormula));
+    PropFormula* res = (PropFormula*)poolAlloc(&formula_pool);
 
     res->kind = kind;
     res->data.operands[0] = left_op;
@@ -27,7 +34,7 @@ PropFormula* mkBinaryFormula(FormulaKind kind, PropFormula* left_op,
 }
 
 PropFormula* mkUnaryFormula(FormulaKind kind, PropFormula* operand) {
-    PropFormula* res = (PropFormula*)malloc(sizeof(PropFormula));
+    PropFormula* res = (PropFormula*)poolAlloc(&formula_pool);
 
     res->kind = kind;
     res->data.single_op = operand;
@@ -57,7 +64,7 @@ void freeFormula(PropFormula* pf) {
         default:
             break;
     }
-    free(pf);
+    poolFree(&formula_pool, pf);
 }
 
 void prettyPrintFormula_impl(FILE* f, VarTable* vt, PropFormula* pf) {
@@ -34,8 +34,8 @@ typedef struct PropFormula {
 
 /**
  * Creates a new variable formula and adds the variable to the variable table
- * if necessary. The given string for the name will be freed automatically
- * when the variable table is freed.
+ * if necessary. The given string for the name is owned by the variable table
+ * afterwards (see mkVariable).
  *
  * @param vt    a variable table
  * @param name  a name for the variable
@@ -0,0 +1,170 @@
+#include "satsolver.h"
+
+#include <setjmp.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#include "cnf.h"
+#include "cnf_parser.h"
+#include "dpll.h"
+#include "err.h"
+#include "parser.h"
+#include "preprocess.h"
+#include "propformula.h"
+#include "tseitin.h"
+#include "variables.h"
+
+#define SAT_MSG_LEN 256
+
+struct SatSolver {
+    VarTable* vt;  // NULL if no input is loaded
+    CNF* cnf;
+    char solved;
+    char msg[SAT_MSG_LEN];
+};
+
+/**
+ * Frees the loaded input.
+ */
+static void unload(SatSolver* s) {
+    if (s->vt != NULL) {
+        freeCNF(s->cnf);
+        freeVarTable(s->vt);
+    }
+    s->vt = NULL;
+    s->cnf = NULL;
+    s->solved = 0;
+}
+
+static void setMessage(SatSolver* s, const char* msg) {
+    strncpy(s->msg, msg, SAT_MSG_LEN - 1);
+    s->msg[SAT_MSG_LEN - 1] = '\0';
+}
+
+int satApiVersion(void) { return SAT_API_VERSION; }
+
+SatSolver* mkSatSolver(void) {
+    SatSolver* res = (SatSolver*)malloc(sizeof(SatSolver));
+    res->vt = NULL;
+    res->cnf = NULL;
+    res->solved = 0;
+    res->msg[0] = '\0';
+    return res;
+}
+
+void freeSatSolver(SatSolver* s) {
+    unload(s);
+    free(s);
+}
+
+int satLoad(SatSolver* s, const char* input, size_t length, unsigned flags) {
+    unload(s);
+    s->msg[0] = '\0';
+
+    // the parsers read from streams, the line break terminates the last token
+    // and keeps empty inputs valid streams
+    char* buf = (char*)malloc(length + 1);
+    memcpy(buf, input, length);
+    buf[length] = '\n';
+    FILE* stream = fmemopen(buf, length + 1, "r");
+
+    VarTable* vt = mkVarTable();
+    CNF* cnf = NULL;
+
+    jmp_buf on_error;
+    if (setjmp(on_error) != 0) {
+        setErrorJump(NULL);
+        setMessage(s, getErrorMessage());
+        freeVarTable(vt);
+        fclose(stream);
+        free(buf);
+        return SAT_RESULT_ERROR;
+    }
+    setErrorJump(&on_error);
+
+    if (flags & SAT_FLAG_DIMACS) {
+        cnf = parseDIMACS(stream, vt);
+    } else if (flags & SAT_FLAG_CNF) {
+        cnf = parseCNF(stream, vt);
+    } else {
+        PropFormula* pf = parseFormula(stream, vt);
+        Encoding encoding =
+            (flags & SAT_FLAG_COMPACT) ? ENCODE_COMPACT : ENCODE_TSEITIN;
+        cnf = getCNFWithEncoding(vt, pf, encoding);
+        freeFormula(pf);
+    }
+
+    setErrorJump(NULL);
+    fclose(stream);
+    free(buf);
+
+    s->vt = vt;
+    s->cnf = cnf;
+    return 0;
+}
+
+int satSolve(SatSolver* s, unsigned flags, unsigned long conflict_limit) {
+    if (s->vt == NULL) {
+        setMessage(s, "Error: no input loaded!");
+        return SAT_RESULT_ERROR;
+    }
+    if (s->solved) {
+        setMessage(s, "Error: input solved already!");
+        return SAT_RESULT_ERROR;
+    }
+    s->solved = 1;
+
+    SolverOptions opts = defaultSolverOptions();
+    if (flags & SAT_FLAG_CDCL) {
+        opts.algorithm = ALGORITHM_CDCL;
+    }
+    opts.conflict_limit = conflict_limit;
+
+    ModelExtension* ext = NULL;
+    if (flags & SAT_FLAG_PREPROCESS) {
+        PreprocessStats stats;
+        s->cnf = preprocess(s->vt, s->cnf, &ext, &stats);
+    }
+
+    SolveResult res = solveWithOptions(s->vt, s->cnf, &opts, NULL);
+
+    if (ext != NULL) {
+        if (res == SOLVE_SAT) {
+            extendModel(s->vt, ext);
+        }
+        freeModelExtension(ext);
+    }
+
+    switch (res) {
+        case SOLVE_SAT:
+            return SAT_RESULT_SAT;
+        case SOLVE_UNSAT:
+            return SAT_RESULT_UNSAT;
+        default:
+            return SAT_RESULT_UNKNOWN;
+    }
+}
+
+const char* satErrorMessage(const SatSolver* s) { return s->msg; }
+
+unsigned satVariableCount(const SatSolver* s) {
+    return s->vt == NULL ? 0 : getVariableCount(s->vt);
+}
+
+const char* satVariableName(const SatSolver* s, unsigned var) {
+    return getVariableName(s->vt, var);
+}
+
+unsigned satModel(const SatSolver* s, int* model, unsigned size) {
+    unsigned count = satVariableCount(s);
+    if (count > size) {
+        count = size;
+    }
+    for (unsigned i = 1; i <= count; i++) {
+        // undefined variables can be assigned arbitrarily
+        model[i - 1] =
+            getVariableValue(s->vt, i) == FALSE ? -(int)i : (int)i;
+    }
+    return count;
+}
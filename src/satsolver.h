@@ -0,0 +1,125 @@
+#pragma once
+
+#include <stddef.h>
+
+/**
+ * The stable C API of libsatsolver.so, for solving formulas in-process.
+ *
+ * A SatSolver holds one input at a time. Load an input with satLoadFormula
+ * or satLoadCNF, solve it with satSolve and read back the model with
+ * satModel. Loading another input replaces the previous one. Different
+ * solvers may be used from different threads at the same time, a single
+ * solver must not.
+ *
+ * Results are the exit codes of the command line solver. The API only
+ * changes in compatible ways as long as satApiVersion returns the same value.
+ */
+
+#if defined(__GNUC__)
+#define SAT_API __attribute__((visibility("default")))
+#else
+#define SAT_API
+#endif
+
+#define SAT_API_VERSION 1
+
+#define SAT_RESULT_UNKNOWN 0  // the conflict limit was reached
+#define SAT_RESULT_SAT 10
+#define SAT_RESULT_UNSAT 20
+#define SAT_RESULT_ERROR 30  // invalid input, see satErrorMessage
+
+#define SAT_FLAG_CNF 1         // input with one clause per line
+#define SAT_FLAG_DIMACS 2      // input in DIMACS format
+#define SAT_FLAG_COMPACT 4     // compact encoding of formulas (see tseitin.h)
+#define SAT_FLAG_CDCL 8        // conflict-driven clause learning
+#define SAT_FLAG_PREPROCESS 16  // simplify the CNF before solving it
+
+typedef struct SatSolver SatSolver;
+
+/**
+ * Returns the version of the API implemented by the library.
+ *
+ * @return  SAT_API_VERSION of the library
+ */
+SAT_API int satApiVersion(void);
+
+/**
+ * Creates a solver without an input.
+ *
+ * @return  the new solver
+ */
+SAT_API SatSolver* mkSatSolver(void);
+
+/**
+ * Frees a solver and its input.
+ *
+ * @param s  the solver to free
+ */
+SAT_API void freeSatSolver(SatSolver* s);
+
+/**
+ * Loads an input from memory.
+ *
+ * Without SAT_FLAG_CNF or SAT_FLAG_DIMACS, the input is a propositional
+ * formula in reverse Polish notation. Invalid inputs may leave parts of the
+ * partially parsed formula behind.
+ *
+ * @param s       the solver
+ * @param input   the input, does not need to be terminated
+ * @param length  the length of the input in bytes
+ * @param flags   SAT_FLAG_CNF, SAT_FLAG_DIMACS and SAT_FLAG_COMPACT
+ * @return        0 on success, SAT_RESULT_ERROR for invalid inputs
+ */
+SAT_API int satLoad(SatSolver* s, const char* input, size_t length,
+                    unsigned flags);
+
+/**
+ * Solves the loaded input.
+ *
+ * @param s               the solver
+ * @param flags           SAT_FLAG_CDCL and SAT_FLAG_PREPROCESS
+ * @param conflict_limit  number of conflicts after which the search gives
+ *                        up, 0 means no limit
+ * @return                SAT_RESULT_SAT, SAT_RESULT_UNSAT, SAT_RESULT_UNKNOWN
+ *                        or SAT_RESULT_ERROR if no input was loaded or it
+ *                        was solved already
+ */
+SAT_API int satSolve(SatSolver* s, unsigned flags,
+                     unsigned long conflict_limit);
+
+/**
+ * Returns the message of the last error.
+ *
+ * @param s  the solver
+ * @return   the error message, empty if there was no error
+ */
+SAT_API const char* satErrorMessage(const SatSolver* s);
+
+/**
+ * Returns the number of variables of the loaded input, including the fresh
+ * variables of the encoding.
+ *
+ * @param s  the solver
+ * @return   the number of variables
+ */
+SAT_API unsigned satVariableCount(const SatSolver* s);
+
+/**
+ * Returns the name of a variable. Names of fresh variables start with '$'.
+ *
+ * @param s    the solver
+ * @param var  a variable between 1 and satVariableCount
+ * @return     the name of the variable
+ */
+SAT_API const char* satVariableName(const SatSolver* s, unsigned var);
+
+/**
+ * Writes the model of a SAT result: model[i] is i + 1 if variable i + 1 is
+ * TRUE and -(i + 1) if it is FALSE.
+ *
+ * @param s     the solver after a SAT result
+ * @param model the array to write to
+ * @param size  the length of the array
+ * @return      the number of values written
+ */
+SAT_API unsigned satModel(const SatSolver* s, int* model, unsigned size);
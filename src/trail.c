@@ -0,0 +1,50 @@
+#include "trail.h"
+
+#include <assert.h>
+#include <stdlib.h>
+
+Trail* mkTrail(VarTable* vt) {
+    unsigned n = getVariableCount(vt) + 1;
+    Trail* t = (Trail*)malloc(sizeof(Trail));
+
+    t->literals = (Literal*)malloc(n * sizeof(Literal));
+    t->size = 0;
+    t->level_start = (unsigned*)malloc(n * sizeof(unsigned));
+    t->num_levels = 0;
+
+    return t;
+}
+
+void freeTrail(Trail* t) {
+    free(t->literals);
+    free(t->level_start);
+    free(t);
+}
+
+void pushDecision(Trail* t, Literal l) {
+    t->level_start[t->num_levels++] = t->size;
+    t->literals[t->size++] = l;
+}
+
+void pushImplied(Trail* t, Literal l) { t->literals[t->size++] = l; }
+
+Literal popLiteral(Trail* t) {
+    assert(t->size > 0);
+    Literal l = t->literals[--t->size];
+
+    if (t->num_levels > 0 && t->level_start[t->num_levels - 1] == t->size) {
+        t->num_levels--;
+    }
+
+    return l;
+}
+
+unsigned getLevelStart(Trail* t, unsigned level) {
+    assert(level <= t->num_levels);
+    return level == 0 ? 0 : t->level_start[level - 1];
+}
+
+Literal getDecision(Trail* t, unsigned level) {
+    assert(0 < level && level <= t->num_levels);
+    return t->literals[t->level_start[level - 1]];
+}
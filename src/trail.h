@@ -0,0 +1,84 @@
+#pragma once
+
+/**
+ * In this file, we provide the assignment trail shared by the solvers.
+ *
+ * The trail contains all assigned literals in assignment order. Every
+ * decision opens a new decision level, and the position where each level
+ * starts is recorded. This way, finding the most recent decision or the
+ * start of any level takes constant time.
+ *
+ * The trail is preallocated for all variables of a table, since every
+ * variable is assigned at most once, so pushing and popping never allocates.
+ */
+
+#include "cnf.h"
+#include "variables.h"
+
+/**
+ * Struct for the assignment trail. Should only be created by mkTrail and
+ * modified by the functions below, but may be read directly.
+ */
+typedef struct Trail {
+    Literal* literals;      // the TRUE literals in assignment order
+    unsigned size;          // number of assigned literals
+    unsigned* level_start;  // level i > 0 starts at literals[level_start[i-1]]
+    unsigned num_levels;    // the current decision level
+} Trail;
+
+/**
+ * Creates an empty trail for all variables of a table.
+ *
+ * @param vt  the underlying variable table
+ * @return    the new trail
+ */
+Trail* mkTrail(VarTable* vt);
+
+/**
+ * Frees a trail.
+ *
+ * @param t  the trail to be freed
+ */
+void freeTrail(Trail* t);
+
+/**
+ * Opens a new decision level and adds its decision literal.
+ *
+ * @param t  the trail
+ * @param l  the decision literal
+ */
+void pushDecision(Trail* t, Literal l);
+
+/**
+ * Adds an implied literal to the current decision level.
+ *
+ * @param t  the trail
+ * @param l  the implied literal
+ */
+void pushImplied(Trail* t, Literal l);
+
+/**
+ * Removes the most recent literal. If it is a decision, its level is closed.
+ *
+ * @param t  a non-empty trail
+ * @return   the removed literal
+ */
+Literal popLiteral(Trail* t);
+
+/**
+ * Returns the position of the first literal of a decision level.
+ *
+ * @param t      the trail
+ * @param level  a decision level, at most the current one
+ * @return       the position of the decision of the level, 0 for level 0
+ */
+unsigned getLevelStart(Trail* t, unsigned level);
+
+/**
+ * Returns the decision literal of a decision level.
+ *
+ * @param t      the trail
+ * @param level  a decision level between 1 and the current one
+ * @return       the decision literal
+ */
+Literal getDecision(Trail* t, unsigned level);
@@ -1,7 +1,11 @@
 #include "tseitin.h"
 
+#include <assert.h>
 #include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
 
+#include "arena.h"
 #include "err.h"
 #include "propformula.h"
 #include "util.h"
@@ -15,8 +19,7 @@
  * @param a    a literal
  */
 void addUnaryClause(VarTable* vt, CNF* cnf, Literal a) {
-    Clause* clause = mkTernaryClause(vt, a, 0, 0);
-    addClauseToCNF(cnf, clause);
+    addClause(vt, cnf, &a, 1);
 }
 
 /**
@@ -28,8 +31,8 @@ void addUnaryClause(VarTable* vt, CNF* cnf, Literal a) {
  * @param b    the second literal
  */
 void addBinaryClause(VarTable* vt, CNF* cnf, Literal a, Literal b) {
-    Clause* clause = mkTernaryClause(vt, a, b, 0);
-    addClauseToCNF(cnf, clause);
+    Literal literals[] = {a, b};
+    addClause(vt, cnf, literals, 2);
 }
 
 /**
@@ -42,8 +45,8 @@ void addBinaryClause(VarTable* vt, CNF* cnf, Literal a, Literal b) {
  * @param c    the third literal
  */
 void addTernaryClause(VarTable* vt, CNF* cnf, Literal a, Literal b, Literal c) {
-    Clause* clause = mkTernaryClause(vt, a, b, c);
-    addClauseToCNF(cnf, clause);
+    Literal literals[] = {a, b, c};
+    addClause(vt, cnf, literals, 3);
 }
 
 /**
@@ -124,3 +127,466 @@ CNF* getCNF(VarTable* vt, const PropFormula* f) {
 
     return res;
 }
+
+/*
+ * Compact encoding
+ *
+ * The formula is first turned into a graph of gates. A gate literal is the
+ * index of a gate, negated if the gate is used negated, so disjunctions are
+ * negated conjunctions and negations do not need gates at all. Identical
+ * gates are only created once.
+ *
+ * Afterwards, it is determined in which polarities the gates are used. A gate
+ * x for a subformula f that is only used positively only needs the clauses
+ * for x => f, one that is only used negatively only needs those for f => x.
+ */
+
+#define INIT_GATES_SIZE 64
+#define INIT_LIST_SIZE 8
+
+#define POLARITY_POS 1  // the gate literal implies its subformula
+#define POLARITY_NEG 2  // the subformula implies the gate literal
+#define POLARITY_BOTH 3
+
+typedef enum GateKind { GATE_INPUT, GATE_AND, GATE_EQUIV } GateKind;
+
+typedef struct Gate {
+    GateKind kind;
+    unsigned num_inputs;
+    Literal* inputs;  // sorted gate literals of the operands
+    VarIndex var;     // the variable of the gate, 0 if it has none yet
+    unsigned refs;    // number of gates that use this gate as an operand
+    char polarity;
+} Gate;
+
+/**
+ * Growable list of gate literals.
+ */
+typedef struct LiteralList {
+    Literal* literals;
+    unsigned size;
+    unsigned capacity;
+} LiteralList;
+
+typedef struct Encoder {
+    VarTable* vt;
+    Gate* gates;  // gate i is at position i, position 0 is unused
+    unsigned num_gates;
+    unsigned capacity;
+    unsigned* input_gates;  // gate of every variable of the formula
+    unsigned* table;        // hash index of the AND and EQUIV gates
+    unsigned table_capacity;
+    unsigned table_size;
+    LiteralList top;     // top-level clauses, each terminated by 0
+    LiteralList clause;  // clause under construction
+    Arena storage;       // operands of the gates
+} Encoder;
+
+static void appendToList(LiteralList* list, Literal l) {
+    if (list->size == list->capacity) {
+        list->capacity =
+            list->capacity == 0 ? INIT_LIST_SIZE : 2 * list->capacity;
+        list->literals = (Literal*)realloc(list->literals,
+                                           list->capacity * sizeof(Literal));
+    }
+    list->literals[list->size++] = l;
+}
+
+static int compareLiterals(const void* a, const void* b) {
+    Literal x = *(const Literal*)a;
+    Literal y = *(const Literal*)b;
+    return (x > y) - (x < y);
+}
+
+static unsigned hashGate(GateKind kind, const Literal* inputs, unsigned n) {
+    unsigned h = 2166136261u ^ (unsigned)kind;
+    for (unsigned i = 0; i < n; i++) {
+        h ^= (unsigned)inputs[i];
+        h *= 16777619u;
+    }
+    return h;
+}
+
+/**
+ * Finds the slot of a gate in the hash index.
+ *
+ * @return  the slot containing the gate, or the empty slot where it belongs
+ */
+static unsigned* findGate(Encoder* e, GateKind kind, const Literal* inputs,
+                          unsigned n) {
+    unsigned mask = e->table_capacity - 1;
+    unsigned pos = hashGate(kind, inputs, n) & mask;
+
+    while (e->table[pos] != 0) {
+        Gate* g = e->gates + e->table[pos];
+        if (g->kind == kind && g->num_inputs == n &&
+            memcmp(g->inputs, inputs, n * sizeof(Literal)) == 0) {
+            break;
+        }
+        pos = (pos + 1) & mask;
+    }
+
+    return e->table + pos;
+}
+
+static void growTable(Encoder* e) {
+    unsigned* old = e->table;
+    unsigned old_capacity = e->table_capacity;
+
+    e->table_capacity *= 2;
+    e->table = (unsigned*)calloc(e->table_capacity, sizeof(unsigned));
+
+    for (unsigned i = 0; i < old_capacity; i++) {
+        if (old[i] != 0) {
+            Gate* g = e->gates + old[i];
+            *findGate(e, g->kind, g->inputs, g->num_inputs) = old[i];
+        }
+    }
+
+    free(old);
+}
+
+static unsigned appendGate(Encoder* e, GateKind kind) {
+    if (e->num_gates + 1 == e->capacity) {
+        e->capacity *= 2;
+        e->gates = (Gate*)realloc(e->gates, e->capacity * sizeof(Gate));
+    }
+
+    unsigned id = ++e->num_gates;
+    Gate* g = e->gates + id;
+    g->kind = kind;
+    g->num_inputs = 0;
+    g->inputs = NULL;
+    g->var = 0;
+    g->refs = 0;
+    g->polarity = 0;
+    return id;
+}
+
+/**
+ * Returns the gate literal of a variable of the formula.
+ */
+static Literal mkInput(Encoder* e, VarIndex var) {
+    if (e->input_gates[var] == 0) {
+        unsigned id = appendGate(e, GATE_INPUT);
+        e->gates[id].var = var;
+        e->input_gates[var] = id;
+    }
+    return (Literal)e->input_gates[var];
+}
+
+/**
+ * Returns the gate for the given kind and operands, creating it only if no
+ * identical gate exists.
+ *
+ * @param e       the encoder
+ * @param kind    GATE_AND or GATE_EQUIV
+ * @param inputs  the sorted gate literals of the operands
+ * @param n       the number of operands
+ * @return        the index of the gate
+ */
+static unsigned mkGate(Encoder* e, GateKind kind, const Literal* inputs,
+                       unsigned n) {
+    unsigned* slot = findGate(e, kind, inputs, n);
+    if (*slot != 0) {
+        return *slot;
+    }
+
+    unsigned id = appendGate(e, kind);
+    Gate* g = e->gates + id;
+    g->num_inputs = n;
+    g->inputs = (Literal*)arenaAlloc(&e->storage, n * sizeof(Literal));
+    memcpy(g->inputs, inputs, n * sizeof(Literal));
+    for (unsigned i = 0; i < n; i++) {
+        e->gates[abs(inputs[i])].refs++;
+    }
+
+    *slot = id;
+    if (++e->table_size * 2 > e->table_capacity) {
+        growTable(e);
+    }
+    return id;
+}
+
+/**
+ * Returns the gate literal for the conjunction of the given gate literals.
+ * The list is sorted and duplicates are removed.
+ */
+static Literal mkAnd(Encoder* e, LiteralList* list) {
+    qsort(list->literals, list->size, sizeof(Literal), compareLiterals);
+    unsigned n = 0;
+    for (unsigned i = 0; i < list->size; i++) {
+        if (n == 0 || list->literals[n - 1] != list->literals[i]) {
+            list->literals[n++] = list->literals[i];
+        }
+    }
+
+    if (n == 1) {
+        return list->literals[0];
+    }
+    return (Literal)mkGate(e, GATE_AND, list->literals, n);
+}
+
+/**
+ * Returns the gate literal for the equivalence of two gate literals. Both
+ * operands are made positive, which negates the equivalence for every
+ * negated operand.
+ */
+static Literal mkEquiv(Encoder* e, Literal a, Literal b) {
+    char negated = (a < 0) != (b < 0);
+    Literal inputs[] = {abs(a), abs(b)};
+    if (inputs[0] > inputs[1]) {
+        inputs[0] = abs(b);
+        inputs[1] = abs(a);
+    }
+
+    Literal x = (Literal)mkGate(e, GATE_EQUIV, inputs, 2);
+    return negated ? -x : x;
+}
+
+/**
+ * Checks whether a formula is a conjunction, taking a surrounding negation
+ * into account.
+ */
+static char isConjunction(const PropFormula* pf, char negated) {
+    switch (pf->kind) {
+        case AND:
+            return !negated;
+        case OR:
+        case IMPLIES:
+            return negated;
+        default:
+            return 0;
+    }
+}
+
+static Literal buildGates(Encoder* e, const PropFormula* pf, char negated);
+
+/**
+ * Collects the operands of nested conjunctions in a list.
+ *
+ * @param e        the encoder
+ * @param pf       a conjunction (see isConjunction)
+ * @param negated  whether the formula is negated
+ * @param list     the list of the gate literals of the operands
+ */
+static void collectConjuncts(Encoder* e, const PropFormula* pf, char negated,
+                             LiteralList* list) {
+    if (pf->kind == NOT) {
+        collectConjuncts(e, pf->data.single_op, !negated, list);
+    } else if (isConjunction(pf, negated)) {
+        for (unsigned i = 0; i < 2; i++) {
+            // !(a => b) is a && !b
+            char op_negated = (pf->kind == IMPLIES && i == 0) ? 0 : negated;
+            collectConjuncts(e, pf->data.operands[i], op_negated, list);
+        }
+    } else {
+        appendToList(list, buildGates(e, pf, negated));
+    }
+}
+
+/**
+ * Creates the gates for a formula.
+ *
+ * @param e        the encoder
+ * @param pf       a formula
+ * @param negated  whether the negation of the formula should be encoded
+ * @return         the gate literal of the (negated) formula
+ */
+static Literal buildGates(Encoder* e, const PropFormula* pf, char negated) {
+    Literal res;
+
+    switch (pf->kind) {
+        case VAR:
+            res = mkInput(e, pf->data.var);
+            return negated ? -res : res;
+        case NOT:
+            return buildGates(e, pf->data.single_op, !negated);
+        case EQUIV: {
+            Literal a = buildGates(e, pf->data.operands[0], 0);
+            Literal b = buildGates(e, pf->data.operands[1], 0);
+            res = mkEquiv(e, a, b);
+            return negated ? -res : res;
+        }
+        case AND:
+        case OR:
+        case IMPLIES: {
+            // a disjunction is the negated conjunction of the negations
+            char conjunction = isConjunction(pf, negated);
+            LiteralList list = {NULL, 0, 0};
+            collectConjuncts(e, pf, conjunction ? negated : !negated, &list);
+            res = mkAnd(e, &list);
+            free(list.literals);
+            return conjunction ? res : -res;
+        }
+        default:
+            err("Default case");
+            return 0;
+    }
+}
+
+static char flipPolarity(char polarity) {
+    return (char)(((polarity & POLARITY_POS) << 1) |
+                  ((polarity & POLARITY_NEG) >> 1));
+}
+
+/**
+ * Records that a gate literal is used in the given polarity.
+ */
+static void requirePolarity(Encoder* e, Literal l, char polarity) {
+    e->gates[abs(l)].polarity |= l > 0 ? polarity : flipPolarity(polarity);
+}
+
+/**
+ * Adds a gate literal as a top-level constraint. Conjunctions that are not
+ * used elsewhere are split into their operands, and negated ones become a
+ * single clause, so they do not need a variable.
+ */
+static void assertLiteral(Encoder* e, Literal l) {
+    Gate* g = e->gates + abs(l);
+
+    if (g->kind != GATE_AND || g->refs > 0) {
+        requirePolarity(e, l, POLARITY_POS);
+        appendToList(&e->top, l);
+        appendToList(&e->top, 0);
+        return;
+    }
+
+    for (unsigned i = 0; i < g->num_inputs; i++) {
+        e->gates[abs(g->inputs[i])].refs--;
+    }
+    for (unsigned i = 0; i < g->num_inputs; i++) {
+        if (l > 0) {
+            assertLiteral(e, g->inputs[i]);
+        } else {
+            requirePolarity(e, -g->inputs[i], POLARITY_POS);
+            appendToList(&e->top, -g->inputs[i]);
+        }
+    }
+    if (l < 0) {
+        appendToList(&e->top, 0);
+    }
+}
+
+/**
+ * Maps a gate literal to a literal of the CNF.
+ */
+static Literal cnfLiteral(Encoder* e, Literal l) {
+    VarIndex var = e->gates[abs(l)].var;
+    assert(var != 0);
+    return l > 0 ? (Literal)var : -(Literal)var;
+}
+
+/**
+ * Adds the clause under construction to the CNF.
+ */
+static void emitClause(Encoder* e, CNF* cnf) {
+    addClause(e->vt, cnf, e->clause.literals, e->clause.size);
+    e->clause.size = 0;
+}
+
+/**
+ * Adds the clauses of a gate for the polarities in which it is used.
+ */
+static void encodeGate(Encoder* e, CNF* cnf, Gate* g) {
+    Literal x = (Literal)g->var;
+
+    if (g->kind == GATE_AND) {
+        if (g->polarity & POLARITY_POS) {
+            for (unsigned i = 0; i < g->num_inputs; i++) {
+                appendToList(&e->clause, -x);
+                appendToList(&e->clause, cnfLiteral(e, g->inputs[i]));
+                emitClause(e, cnf);
+            }
+        }
+        if (g->polarity & POLARITY_NEG) {
+            appendToList(&e->clause, x);
+            for (unsigned i = 0; i < g->num_inputs; i++) {
+                appendToList(&e->clause, -cnfLiteral(e, g->inputs[i]));
+            }
+            emitClause(e, cnf);
+        }
+    } else {
+        Literal a = cnfLiteral(e, g->inputs[0]);
+        Literal b = cnfLiteral(e, g->inputs[1]);
+        if (g->polarity & POLARITY_POS) {
+            addTernaryClause(e->vt, cnf, -x, -a, b);
+            addTernaryClause(e->vt, cnf, -x, a, -b);
+        }
+        if (g->polarity & POLARITY_NEG) {
+            addTernaryClause(e->vt, cnf, x, a, b);
+            addTernaryClause(e->vt, cnf, x, -a, -b);
+        }
+    }
+}
+
+/**
+ * Converts a formula to CNF with the compact encoding.
+ */
+static CNF* getCompactCNF(VarTable* vt, const PropFormula* pf) {
+    Encoder e;
+    e.vt = vt;
+    e.capacity = INIT_GATES_SIZE;
+    e.gates = (Gate*)malloc(e.capacity * sizeof(Gate));
+    e.num_gates = 0;
+    e.input_gates =
+        (unsigned*)calloc(getVariableCount(vt) + 1, sizeof(unsigned));
+    e.table_capacity = INIT_GATES_SIZE;
+    e.table = (unsigned*)calloc(e.table_capacity, sizeof(unsigned));
+    e.table_size = 0;
+    e.top = (LiteralList){NULL, 0, 0};
+    e.clause = (LiteralList){NULL, 0, 0};
+    e.storage = mkArena();
+
+    assertLiteral(&e, buildGates(&e, pf, 0));
+
+    // operands are created before the gates using them
+    for (unsigned id = e.num_gates; id > 0; id--) {
+        Gate* g = e.gates + id;
+        if (g->kind == GATE_INPUT || g->polarity == 0) {
+            continue;
+        }
+        for (unsigned i = 0; i < g->num_inputs; i++) {
+            requirePolarity(&e, g->inputs[i],
+                            g->kind == GATE_EQUIV ? POLARITY_BOTH
+                                                  : g->polarity);
+        }
+    }
+
+    CNF* res = mkCNF();
+
+    for (unsigned id = 1; id <= e.num_gates; id++) {
+        Gate* g = e.gates + id;
+        if (g->kind != GATE_INPUT && g->polarity != 0) {
+            g->var = mkFreshVariable(vt);
+            encodeGate(&e, res, g);
+        }
+    }
+
+    for (unsigned i = 0; i < e.top.size; i++) {
+        if (e.top.literals[i] == 0) {
+            emitClause(&e, res);
+        } else {
+            appendToList(&e.clause, cnfLiteral(&e, e.top.literals[i]));
+        }
+    }
+
+    freeArena(&e.storage);
+    free(e.gates);
+    free(e.input_gates);
+    free(e.table);
+    free(e.top.literals);
+    free(e.clause.literals);
+
+    return res;
+}
+
+CNF* getCNFWithEncoding(VarTable* vt, const PropFormula* pf,
+                        Encoding encoding) {
+    switch (encoding) {
+        case ENCODE_COMPACT:
+            return getCompactCNF(vt, pf);
+        default:
+            return getCNF(vt, pf);
+    }
+}
@@ -4,6 +4,18 @@
 #include "propformula.h"
 #include "variables.h"
 
+/**
+ * Encodings of propositional formulas into CNF.
+ *
+ * ENCODE_TSEITIN introduces a fresh variable for every operator and adds the
+ * clauses of a full equivalence. ENCODE_COMPACT flattens nested conjunctions
+ * and disjunctions into n-ary gates, shares identical subformulas through
+ * structural hashing and only adds the clauses of the implication directions
+ * that are needed for the polarity of a subformula (Plaisted-Greenbaum).
+ * Top-level conjunctions and disjunctions are added as clauses directly.
+ */
+typedef enum Encoding { ENCODE_TSEITIN, ENCODE_COMPACT } Encoding;
+
 /**
  * Converts a propositional formula F to CNF, such that F is satisfiable iff
  * the resulting CNF is satisfiable.
@@ -13,3 +25,16 @@
  * @return    the resulting CNF
  */
 CNF* getCNF(VarTable* vt, const PropFormula* pf);
+
+/**
+ * Converts a propositional formula F to CNF with the given encoding, such that
+ * F is satisfiable iff the resulting CNF is satisfiable. Every model of the
+ * CNF is a model of F when restricted to the variables of F.
+ *
+ * @param vt        the underlying variable table
+ * @param pf        a propositional formula
+ * @param encoding  the encoding to use
+ * @return          the resulting CNF
+ */
+CNF* getCNFWithEncoding(VarTable* vt, const PropFormula* pf,
+                        Encoding encoding);
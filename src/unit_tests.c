@@ -1,22 +1,24 @@
 #include <assert.h>
+#include <stdint.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
 
+#include "arena.h"
 #include "cnf.h"
+#include "cnf_parser.h"
+#include "dpll.h"
+#include "list.h"
+#include "preprocess.h"
 #include "propformula.h"
 #include "test_common.h"
+#include "trail.h"
 #include "tseitin.h"
 #include "variables.h"
+#include "vsids.h"
+#include "watch.h"
 
-unsigned cnf_size(CNF* cnf) {
-    unsigned res = 0;
-    for (ListIterator it = mkIterator(&cnf->clauses); isValid(&it); next(&it)) {
-        res++;
-    }
-
-    return res;
-}
+unsigned cnf_size(CNF* cnf) { return cnf->size; }
 
 char literal_eq(VarTable* vt, Literal l, char* x) {
     if (x == NULL) {
@@ -38,15 +40,19 @@ char literal_eq(VarTable* vt, Literal l, char* x) {
     return 0 == strcmp(t, (x + 1));
 }
 
+Literal clause_literal(Clause* cl, unsigned i) {
+    return i < cl->size ? cl->literals[i] : 0;
+}
+
 char clause_eq(VarTable* vt, Clause* cl, char* a, char* b, char* c) {
-    return literal_eq(vt, cl->literals[0], a) &&
-           literal_eq(vt, cl->literals[1], b) &&
-           literal_eq(vt, cl->literals[2], c);
+    return cl->size <= 3 && literal_eq(vt, clause_literal(cl, 0), a) &&
+           literal_eq(vt, clause_literal(cl, 1), b) &&
+           literal_eq(vt, clause_literal(cl, 2), c);
 }
 
 char cnf_contains(VarTable* vt, CNF* cnf, char* a, char* b, char* c) {
-    for (ListIterator it = mkIterator(&cnf->clauses); isValid(&it); next(&it)) {
-        Clause* cl = (Clause*)getCurr(&it);
+    for (unsigned i = 0; i < cnf->size; i++) {
+        Clause* cl = cnf->clauses[i];
         if (clause_eq(vt, cl, a, b, c) || clause_eq(vt, cl, a, c, b) ||
             clause_eq(vt, cl, b, a, c) || clause_eq(vt, cl, b, c, a) ||
             clause_eq(vt, cl, c, a, b) || clause_eq(vt, cl, c, b, a)) {
@@ -135,6 +141,528 @@ result_t check_tseitin01(const char* test) {
     return SUCCESS;
 }
 
+result_t check_compact_encoding(const char* test) {
+    (void)test;
+    VarTable* vt = mkVarTable();
+
+    char* names[] = {"c", "d", "c", "d", "e"};
+    PropFormula* vars[5];
+    for (unsigned i = 0; i < 5; i++) {
+        char* name = malloc((strlen(names[i]) + 1) * sizeof(char));
+        strcpy(name, names[i]);
+        vars[i] = mkVarFormula(vt, name);
+    }
+
+    /* "c d && c d && || e ||" */
+    PropFormula* pf = mkBinaryFormula(
+        OR,
+        mkBinaryFormula(OR, mkBinaryFormula(AND, vars[0], vars[1]),
+                        mkBinaryFormula(AND, vars[2], vars[3])),
+        vars[4]);
+
+    CNF* cnf = getCNFWithEncoding(vt, pf, ENCODE_COMPACT);
+
+#define CHECK(v)              \
+    {                         \
+        if (!(v)) {           \
+            freeFormula(pf);  \
+            freeCNF(cnf);     \
+            freeVarTable(vt); \
+            return FAILURE;   \
+        }                     \
+    }
+
+    // the disjunction is a single clause and both conjunctions share $0,
+    // which only has to imply the conjunction
+    CHECK(cnf_size(cnf) == 3);
+    CHECK(getVariableCount(vt) == 4);
+    CHECK(cnf_contains(vt, cnf, "+$0", "+e", NULL));
+    CHECK(cnf_contains(vt, cnf, "-$0", "+c", NULL));
+    CHECK(cnf_contains(vt, cnf, "-$0", "+d", NULL));
+
+    freeFormula(pf);
+    freeCNF(cnf);
+    freeVarTable(vt);
+
+#undef CHECK
+
+    return SUCCESS;
+}
+
+/**
+ * Adds a clause with up to three literals, 0 values are left out.
+ */
+void add_clause(VarTable* vt, CNF* cnf, Literal a, Literal b, Literal c) {
+    Literal literals[3];
+    unsigned size = 0;
+    Literal given[] = {a, b, c};
+    for (unsigned i = 0; i < 3; i++) {
+        if (given[i] != 0) {
+            literals[size++] = given[i];
+        }
+    }
+    addClause(vt, cnf, literals, size);
+}
+
+VarIndex mk_named_variable(VarTable* vt, const char* name) {
+    char* copy = malloc((strlen(name) + 1) * sizeof(char));
+    strcpy(copy, name);
+    return mkVariable(vt, copy);
+}
+
+result_t check_variable_lookup(const char* test) {
+    (void)test;
+    VarTable* vt = mkVarTable();
+    char name[16];
+    result_t res = SUCCESS;
+
+    // enough names to grow the name index several times
+    for (unsigned i = 0; i < 1000; i++) {
+        sprintf(name, "v%u", i);
+        if (mk_named_variable(vt, name) != i + 1) {
+            res = FAILURE;
+        }
+    }
+
+    VarIndex fresh = mkFreshVariable(vt);
+    if (fresh != 1001 || getVariableName(vt, fresh)[0] != '$') {
+        res = FAILURE;
+    }
+
+    for (unsigned i = 0; i < 1000; i += 7) {
+        sprintf(name, "v%u", i);
+        if (mk_named_variable(vt, name) != i + 1) {
+            res = FAILURE;
+        }
+    }
+
+    if (getVariableCount(vt) != 1001) {
+        res = FAILURE;
+    }
+
+    freeVarTable(vt);
+    return res;
+}
+
+result_t check_parse_wide(const char* test) {
+    (void)test;
+    // one clause that is much longer than a typical line buffer
+    char* input = malloc(8192 * sizeof(char));
+    char* end = input;
+    for (unsigned i = 0; i < 1000; i++) {
+        end += sprintf(end, "%sx%u", i % 2 ? " -" : " ", i);
+    }
+    strcpy(end, "\n\ny -x0\n");
+
+    FILE* f = fmemopen(input, strlen(input), "r");
+    VarTable* vt = mkVarTable();
+    CNF* cnf = parseCNF(f, vt);
+    fclose(f);
+
+    result_t res = SUCCESS;
+    if (cnf_size(cnf) != 2 || getVariableCount(vt) != 1001) {
+        res = FAILURE;
+    }
+
+    for (unsigned i = 0; i < cnf->size; i++) {
+        unsigned size = cnf->clauses[i]->size;
+        if (size != 1000 && size != 2) {
+            res = FAILURE;
+        }
+    }
+
+    freeCNF(cnf);
+    freeVarTable(vt);
+    free(input);
+    return res;
+}
+
+void count_implied(void* ctx, Literal l, Clause* reason) {
+    (void)l;
+    (void)reason;
+    (*(unsigned*)ctx)++;
+}
+
+result_t check_cnf_counters(const char* test) {
+    (void)test;
+    VarTable* vt = mkVarTable();
+
+    VarIndex a = mk_named_variable(vt, "a");
+    VarIndex b = mk_named_variable(vt, "b");
+
+    /* (a || b) && (!a || b) */
+    CNF* cnf = mkCNF();
+    add_clause(vt, cnf, a, b, 0);
+    add_clause(vt, cnf, -a, b, 0);
+
+#define CHECK(v)              \
+    {                         \
+        if (!(v)) {           \
+            freeCNF(cnf);     \
+            freeVarTable(vt); \
+            return FAILURE;   \
+        }                     \
+    }
+
+    CHECK(evalCNF(cnf) == UNDEFINED);
+    updateVariableValue(vt, a, TRUE);
+    CHECK(evalCNF(cnf) == UNDEFINED);
+    CHECK(cnf->num_true == 1 && cnf->num_false == 0);
+    updateVariableValue(vt, b, FALSE);
+    CHECK(evalCNF(cnf) == FALSE);
+    updateVariableValue(vt, b, TRUE);
+    CHECK(evalCNF(cnf) == TRUE);
+    updateVariableValue(vt, a, UNDEFINED);
+    updateVariableValue(vt, b, UNDEFINED);
+    CHECK(evalCNF(cnf) == UNDEFINED);
+    CHECK(cnf->num_true == 0 && cnf->num_false == 0);
+
+    freeCNF(cnf);
+    freeVarTable(vt);
+
+#undef CHECK
+
+    return SUCCESS;
+}
+
+result_t check_watch_propagate(const char* test) {
+    (void)test;
+    VarTable* vt = mkVarTable();
+
+    VarIndex a = mk_named_variable(vt, "a");
+    VarIndex b = mk_named_variable(vt, "b");
+    VarIndex c = mk_named_variable(vt, "c");
+    VarIndex d = mk_named_variable(vt, "d");
+
+    /* (a) && (!a || b) && (!b || !c || d) && (!d || !c) */
+    CNF* cnf = mkCNF();
+    add_clause(vt, cnf, a, 0, 0);
+    add_clause(vt, cnf, -a, b, 0);
+    add_clause(vt, cnf, -b, -c, d);
+    add_clause(vt, cnf, -d, -c, 0);
+
+    Watches* w = mkWatches(vt, cnf);
+    unsigned implied = 0;
+
+#define CHECK(v)              \
+    {                         \
+        if (!(v)) {           \
+            freeWatches(w);   \
+            freeCNF(cnf);     \
+            freeVarTable(vt); \
+            return FAILURE;   \
+        }                     \
+    }
+
+    CHECK(assignUnitClauses(w, count_implied, &implied) == NULL);
+    CHECK(propagate(w, count_implied, &implied) == NULL);
+    CHECK(implied == 2);
+    CHECK(getVariableValue(vt, a) == TRUE);
+    CHECK(getVariableValue(vt, b) == TRUE);
+    CHECK(getVariableValue(vt, c) == UNDEFINED);
+    CHECK(getVariableValue(vt, d) == UNDEFINED);
+
+    // deciding c implies d through one clause and !d through the other
+    setVariableValue(vt, c, TRUE);
+    enqueueLiteral(w, c);
+    Clause* conflict = propagate(w, count_implied, &implied);
+    CHECK(conflict != NULL);
+    CHECK(implied == 3);
+    CHECK(getVariableValue(vt, d) != UNDEFINED);
+    for (unsigned i = 0; i < conflict->size; i++) {
+        CHECK(evalLiteral(vt, conflict->literals[i]) == FALSE);
+    }
+
+    freeWatches(w);
+    freeCNF(cnf);
+    freeVarTable(vt);
+
+#undef CHECK
+
+    return SUCCESS;
+}
+
+result_t check_watch_solve(const char* test) {
+    (void)test;
+    VarTable* vt = mkVarTable();
+
+    VarIndex a = mk_named_variable(vt, "a");
+    VarIndex b = mk_named_variable(vt, "b");
+    VarIndex c = mk_named_variable(vt, "c");
+
+    /* all clauses over a, b, c except (!a || !b || !c) */
+    CNF* cnf = mkCNF();
+    for (int i = 0; i < 7; i++) {
+        Literal la = (i & 1) ? -(Literal)a : (Literal)a;
+        Literal lb = (i & 2) ? -(Literal)b : (Literal)b;
+        Literal lc = (i & 4) ? -(Literal)c : (Literal)c;
+        add_clause(vt, cnf, la, lb, lc);
+    }
+
+    SolverOptions opts = defaultSolverOptions();
+    opts.propagation = PROPAGATE_WATCHED;
+
+    char sat = isSatisfiableWithOptions(vt, cnf, &opts, NULL);
+    char model_ok = getVariableValue(vt, a) == TRUE &&
+                    getVariableValue(vt, b) == TRUE &&
+                    getVariableValue(vt, c) == TRUE;
+
+    freeCNF(cnf);
+    freeVarTable(vt);
+
+    return (sat && model_ok) ? SUCCESS : FAILURE;
+}
+
+result_t check_cdcl_pigeonhole(const char* test) {
+    (void)test;
+    VarTable* vt = mkVarTable();
+    CNF* cnf = mkCNF();
+
+    // 4 pigeons in 3 holes, p[i][j] means pigeon i sits in hole j
+    VarIndex p[4][3];
+    char name[8];
+    for (int i = 0; i < 4; i++) {
+        for (int j = 0; j < 3; j++) {
+            sprintf(name, "p%d%d", i, j);
+            p[i][j] = mk_named_variable(vt, name);
+        }
+        add_clause(vt, cnf, p[i][0], p[i][1], p[i][2]);
+    }
+    for (int j = 0; j < 3; j++) {
+        for (int i = 0; i < 4; i++) {
+            for (int k = i + 1; k < 4; k++) {
+                add_clause(vt, cnf, -(Literal)p[i][j], -(Literal)p[k][j], 0);
+            }
+        }
+    }
+
+    SolverOptions opts = defaultSolverOptions();
+    opts.algorithm = ALGORITHM_CDCL;
+    char sat = isSatisfiableWithOptions(vt, cnf, &opts, NULL);
+
+    freeCNF(cnf);
+    freeVarTable(vt);
+
+    return sat ? FAILURE : SUCCESS;
+}
+
+result_t check_cdcl_reduce(const char* test) {
+    (void)test;
+    VarTable* vt = mkVarTable();
+    CNF* cnf = mkCNF();
+
+    // 7 pigeons in 6 holes
+    VarIndex p[7][6];
+    char name[8];
+    for (int i = 0; i < 7; i++) {
+        Literal holes[6];
+        for (int j = 0; j < 6; j++) {
+            sprintf(name, "p%d%d", i, j);
+            p[i][j] = mk_named_variable(vt, name);
+            holes[j] = p[i][j];
+        }
+        addClause(vt, cnf, holes, 6);
+    }
+    for (int j = 0; j < 6; j++) {
+        for (int i = 0; i < 7; i++) {
+            for (int k = i + 1; k < 7; k++) {
+                add_clause(vt, cnf, -(Literal)p[i][j], -(Literal)p[k][j], 0);
+            }
+        }
+    }
+
+    // a tiny memory limit forces a reduction at almost every decision
+    SolverOptions opts = defaultSolverOptions();
+    opts.algorithm = ALGORITHM_CDCL;
+    opts.restart = RESTART_LUBY;
+    opts.learned_limit = 1;
+    SolverStats stats;
+    char sat = isSatisfiableWithOptions(vt, cnf, &opts, &stats);
+
+    freeCNF(cnf);
+    freeVarTable(vt);
+
+    return !sat && stats.restarts > 0 && stats.deleted > 0 ? SUCCESS
+                                                           : FAILURE;
+}
+
+result_t check_vsids_order(const char* test) {
+    (void)test;
+    VarTable* vt = mkVarTable();
+
+    VarIndex a = mk_named_variable(vt, "a");
+    VarIndex b = mk_named_variable(vt, "b");
+    VarIndex c = mk_named_variable(vt, "c");
+
+    /* c occurs most often, so it starts with the highest activity */
+    CNF* cnf = mkCNF();
+    add_clause(vt, cnf, a, b, c);
+    add_clause(vt, cnf, -c, b, 0);
+    add_clause(vt, cnf, c, 0, 0);
+
+    Vsids* h = mkVsids(vt, cnf);
+    result_t res = SUCCESS;
+
+    if (pickDecision(h) != (Literal)c) {
+        res = FAILURE;
+    }
+    setVariableValue(vt, c, TRUE);
+
+    // bumped variables overtake variables with more occurrences
+    bumpActivity(h, a);
+    decayActivities(h);
+    if (pickDecision(h) != (Literal)a) {
+        res = FAILURE;
+    }
+    setVariableValue(vt, a, TRUE);
+
+    // a released variable comes back with its saved phase
+    releaseVariable(h, c, FALSE);
+    setVariableValue(vt, c, UNDEFINED);
+    if (pickDecision(h) != -(Literal)c) {
+        res = FAILURE;
+    }
+    setVariableValue(vt, c, FALSE);
+
+    if (pickDecision(h) != (Literal)b || pickDecision(h) != 0) {
+        res = FAILURE;
+    }
+
+    freeVsids(h);
+    freeCNF(cnf);
+    freeVarTable(vt);
+
+    return res;
+}
+
+result_t check_arena(const char* test) {
+    (void)test;
+    Arena a = mkArena();
+    result_t res = SUCCESS;
+
+    // small and large objects are aligned and do not overlap
+    char* prev = NULL;
+    for (unsigned i = 1; i < 2000; i++) {
+        size_t size = i % 7 == 0 ? 10000 : i % 13 + 1;
+        char* p = (char*)arenaAlloc(&a, size);
+        if ((uintptr_t)p % sizeof(void*) != 0) {
+            res = FAILURE;
+        }
+        memset(p, (int)(i & 0xff), size);
+        if (prev != NULL && prev[0] != (char)((i - 1) & 0xff)) {
+            res = FAILURE;
+        }
+        prev = p;
+    }
+    freeArena(&a);
+
+    // freed objects are reused
+    Pool pool = mkPool(sizeof(int));
+    void* x = poolAlloc(&pool);
+    void* y = poolAlloc(&pool);
+    poolFree(&pool, x);
+    if (poolAlloc(&pool) != x || x == y) {
+        res = FAILURE;
+    }
+    poolFree(&pool, x);
+    poolFree(&pool, y);
+    if (pool.live != 0 || pool.arena.chunks != NULL) {
+        res = FAILURE;
+    }
+
+    return res;
+}
+
+result_t check_trail(const char* test) {
+    (void)test;
+    VarTable* vt = mkVarTable();
+    for (unsigned i = 0; i < 5; i++) {
+        mkFreshVariable(vt);
+    }
+
+    Trail* t = mkTrail(vt);
+    result_t res = SUCCESS;
+
+    pushImplied(t, 1);
+    pushDecision(t, -2);
+    pushImplied(t, 3);
+    pushDecision(t, 4);
+    pushImplied(t, -5);
+
+    if (t->num_levels != 2 || getLevelStart(t, 0) != 0 ||
+        getLevelStart(t, 1) != 1 || getLevelStart(t, 2) != 3 ||
+        getDecision(t, 1) != -2 || getDecision(t, 2) != 4) {
+        res = FAILURE;
+    }
+
+    // popping a decision closes its level
+    if (popLiteral(t) != -5 || t->num_levels != 2 || popLiteral(t) != 4 ||
+        t->num_levels != 1 || t->size != 3) {
+        res = FAILURE;
+    }
+
+    freeTrail(t);
+    freeVarTable(vt);
+    return res;
+}
+
+result_t check_preprocess(const char* test) {
+    (void)test;
+    VarTable* vt = mkVarTable();
+    CNF* cnf = mkCNF();
+
+    VarIndex a = mk_named_variable(vt, "a");
+    VarIndex b = mk_named_variable(vt, "b");
+    VarIndex c = mk_named_variable(vt, "c");
+    VarIndex d = mk_named_variable(vt, "d");
+    VarIndex e = mk_named_variable(vt, "e");
+
+    // a is a unit, (b || c || d) is subsumed and e is pure
+    Literal clauses[][3] = {
+        {a, 0, 0},
+        {-(Literal)a, b, 0},
+        {b, c, d},
+        {b, c, 0},
+        {-(Literal)b, -(Literal)c, d},
+        {c, -(Literal)d, e},
+        {-(Literal)c, e, 0},
+    };
+    unsigned num_clauses = sizeof(clauses) / sizeof(clauses[0]);
+    for (unsigned i = 0; i < num_clauses; i++) {
+        add_clause(vt, cnf, clauses[i][0], clauses[i][1], clauses[i][2]);
+    }
+
+    ModelExtension* ext;
+    PreprocessStats stats;
+    cnf = preprocess(vt, cnf, &ext, &stats);
+
+    result_t res = SUCCESS;
+    if (stats.fixed == 0 || stats.clauses_after >= num_clauses) {
+        res = FAILURE;
+    }
+
+    if (!isSatisfiable(vt, cnf)) {
+        res = FAILURE;
+    } else {
+        // the extended model satisfies the original clauses
+        extendModel(vt, ext);
+        for (unsigned i = 0; i < num_clauses; i++) {
+            char satisfied = 0;
+            for (unsigned k = 0; k < 3 && clauses[i][k] != 0; k++) {
+                satisfied |= evalLiteral(vt, clauses[i][k]) == TRUE;
+            }
+            if (!satisfied) {
+                res = FAILURE;
+            }
+        }
+    }
+
+    freeModelExtension(ext);
+    freeCNF(cnf);
+    freeVarTable(vt);
+    return res;
+}
+
 result_t check_array_equal(unsigned size, int* A, int* B) {
     for (unsigned i = 0; i < size; i++) {
         if (A[i] != B[i]) {
@@ -246,6 +774,19 @@ result_t check_single_element_pop(const char* test) {
 test_fun_t get_test(const char* test) {
     TEST("public.cnf.variable", check_variable);
     TEST("public.cnf.tseitin01", check_tseitin01);
+    TEST("public.cnf.compact01", check_compact_encoding);
+    TEST("public.cnf.variablelookup", check_variable_lookup);
+    TEST("public.cnf.parsewide", check_parse_wide);
+    TEST("public.cnf.counters", check_cnf_counters);
+    TEST("public.cnf.watchpropagate", check_watch_propagate);
+    TEST("public.cnf.watchsolve", check_watch_solve);
+    TEST("public.cnf.cdclpigeonhole", check_cdcl_pigeonhole);
+    TEST("public.cnf.cdclreduce", check_cdcl_reduce);
+    TEST("public.cnf.vsidsorder", check_vsids_order);
+    TEST("public.cnf.preprocess", check_preprocess);
+
+    TEST("public.unit.arena", check_arena);
+    TEST("public.unit.trail", check_trail);
 
     TEST("public.stack.empty", check_empty);
     TEST("public.stack.emptyclear", check_empty_clear);
@@ -5,30 +5,63 @@
 #include <stdlib.h>
 #include <string.h>
 
+#include "arena.h"
 #include "cnf.h"
-#include "list.h"
 
 #define VAR_MAX_LEN 32
+#define COMPACT_LINE_LEN 80
 
 #define INIT_SIZE 8
+#define INIT_INDEX_SIZE 16
+#define INIT_PARENTS_SIZE 4
 
 /**
  * Struct for representing a named variable.
  *
- * Contains a list of parent clauses that contain a literal with this variable.
+ * Contains an array of parent clauses that contain a literal with this
+ * variable.
  */
 typedef struct Variable {
     char* name;
     TruthValue val;
-    List parentClauses;
+    Clause** parents;
+    unsigned num_parents;
+    unsigned parents_capacity;
 } Variable;
 
+/**
+ * The variables are stored in insertion order in content, their names and
+ * parent arrays are taken from an arena. In addition, the
+ * indices of all named (non-fresh) variables are stored in an open addressing
+ * hash table with linear probing (index), so that lookups by name take
+ * constant time on average.
+ */
 struct VarTable {
     Variable* content;
     unsigned size;
     unsigned capacity;
+
+    VarIndex* index;          // 0 marks an empty slot
+    unsigned index_capacity;  // always a power of two
+    unsigned index_size;
+
+    unsigned fresh_count;  // number of fresh variables created so far
+
+    Arena storage;  // names and parent arrays of all variables
 };
 
+/**
+ * FNV-1a hash of a variable name.
+ */
+static unsigned hashName(const char* name) {
+    unsigned h = 2166136261u;
+    for (const char* c = name; *c != '\0'; c++) {
+        h ^= (unsigned char)*c;
+        h *= 16777619u;
+    }
+    return h;
+}
+
 Variable* getVariableForIndex(VarTable* vt, VarIndex i) {
     assert(0 < i);
     assert(i <= vt->size);
@@ -48,7 +81,27 @@ char* getVariableName(VarTable* vt, VarIndex vi) {
 
 void addParentClause(VarTable* vt, VarIndex vi, Clause* c) {
     Variable* var = getVariableForIndex(vt, vi);
-    push(&var->parentClauses, c);
+
+    if (var->num_parents == var->parents_capacity) {
+        var->parents_capacity = var->parents_capacity == 0
+                                    ? INIT_PARENTS_SIZE
+                                    : 2 * var->parents_capacity;
+        // an outgrown array is left behind in the arena
+        Clause** grown = (Clause**)arenaAlloc(
+            &vt->storage, var->parents_capacity * sizeof(Clause*));
+        if (var->num_parents > 0) {
+            memcpy(grown, var->parents, var->num_parents * sizeof(Clause*));
+        }
+        var->parents = grown;
+    }
+    var->parents[var->num_parents++] = c;
+}
+
+void clearParentClauses(VarTable* vt) {
+    // the arrays stay in the arena and are reused by addParentClause
+    for (unsigned i = 1; i <= vt->size; i++) {
+        getVariableForIndex(vt, i)->num_parents = 0;
+    }
 }
 
 void updateVariableValue(VarTable* vt, VarIndex vi, TruthValue val) {
@@ -56,15 +109,16 @@ void updateVariableValue(VarTable* vt, VarIndex vi, TruthValue val) {
 
     var->val = val;
 
-    ListIterator it = mkIterator(&var->parentClauses);
-
-    while (isValid(&it)) {
-        Clause* c = (Clause*)getCurr(&it);
-        updateTruthValue(vt, c);
-        next(&it);
+    for (unsigned i = 0; i < var->num_parents; i++) {
+        updateTruthValue(vt, var->parents[i]);
     }
 }
 
+void setVariableValue(VarTable* vt, VarIndex vi, TruthValue val) {
+    Variable* var = getVariableForIndex(vt, vi);
+    var->val = val;
+}
+
 VarIndex getNextUndefinedVariable(VarTable* vt) {
     for (unsigned i = 1; i <= vt->size; i++) {
         Variable* current = getVariableForIndex(vt, i);
@@ -77,6 +131,8 @@ VarIndex getNextUndefinedVariable(VarTable* vt) {
     return 0;
 }
 
+unsigned getVariableCount(VarTable* vt) { return vt->size; }
+
 VarTable* mkVarTable(void) {
     VarTable* res = (VarTable*)malloc(sizeof(VarTable));
 
@@ -84,24 +140,62 @@ VarTable* mkVarTable(void) {
     res->size = 0;
     res->capacity = INIT_SIZE;
 
+    res->index = (VarIndex*)calloc(INIT_INDEX_SIZE, sizeof(VarIndex));
+    res->index_capacity = INIT_INDEX_SIZE;
+    res->index_size = 0;
+
+    res->fresh_count = 0;
+
+    res->storage = mkArena();
+
     return res;
 }
 
-VarIndex mkVariable(VarTable* vt, char* name) {
-    // first check if a variable with this name already exists
-    for (unsigned i = 1; i <= vt->size; i++) {
-        Variable* v = getVariableForIndex(vt, i);
+/**
+ * Finds the slot of a name in the hash index. This is either the slot that
+ * contains the variable with this name or the empty slot where it belongs.
+ */
+static VarIndex* findSlot(VarTable* vt, const char* name) {
+    unsigned mask = vt->index_capacity - 1;
+    unsigned pos = hashName(name) & mask;
+
+    while (vt->index[pos] != 0) {
+        Variable* v = getVariableForIndex(vt, vt->index[pos]);
+        if (strcmp(v->name, name) == 0) {
+            break;
+        }
+        pos = (pos + 1) & mask;
+    }
 
-        int cmp = strcmp(v->name, name);
+    return vt->index + pos;
+}
 
-        if (cmp == 0) {
-            free(name);
-            return i;
+/**
+ * Doubles the size of the hash index and reinserts all entries.
+ */
+static void growIndex(VarTable* vt) {
+    VarIndex* old = vt->index;
+    unsigned old_capacity = vt->index_capacity;
+
+    vt->index_capacity *= 2;
+    vt->index = (VarIndex*)calloc(vt->index_capacity, sizeof(VarIndex));
+
+    for (unsigned i = 0; i < old_capacity; i++) {
+        if (old[i] != 0) {
+            *findSlot(vt, getVariableForIndex(vt, old[i])->name) = old[i];
         }
     }
 
-    // if not, insert a new one into the table
+    free(old);
+}
 
+/**
+ * Appends a new variable to the table without checking for duplicates.
+ *
+ * @param vt    the variable table
+ * @param name  the name, allocated from the arena of the table
+ */
+static VarIndex appendVariable(VarTable* vt, char* name) {
     if (vt->size == vt->capacity) {  // increase capacity if necessary
         vt->capacity *= 2;
         vt->content =
@@ -115,42 +209,61 @@ VarIndex mkVariable(VarTable* vt, char* name) {
 
     var->name = name;
     var->val = UNDEFINED;
-    var->parentClauses = mkList();
+    var->parents = NULL;
+    var->num_parents = 0;
+    var->parents_capacity = 0;
 
     return idx;
 }
 
-/**
- * Frees the data contained in a variable (but not the variable itself!).
- */
-void clearVariable(Variable* var) {
-    clearList(&var->parentClauses);
-    free(var->name);
+VarIndex mkVariable(VarTable* vt, char* name) {
+    // first check if a variable with this name already exists
+    VarIndex* slot = findSlot(vt, name);
+
+    if (*slot != 0) {
+        free(name);
+        return *slot;
+    }
+
+    // if not, insert a new one into the table and the index
+    size_t len = strlen(name) + 1;
+    char* copy = (char*)arenaAlloc(&vt->storage, len);
+    memcpy(copy, name, len);
+    free(name);
+
+    VarIndex idx = appendVariable(vt, copy);
+    *slot = idx;
+    vt->index_size++;
+
+    // keep the load factor of the index at most 1/2
+    if (2 * vt->index_size > vt->index_capacity) {
+        growIndex(vt);
+    }
+
+    return idx;
 }
 
 void freeVarTable(VarTable* varTable) {
-    for (unsigned i = 1; i <= varTable->size; i++) {
-        clearVariable(getVariableForIndex(varTable, i));
-    }
     free(varTable->content);
+    free(varTable->index);
+    freeArena(&varTable->storage);
     free(varTable);
 }
 
 VarIndex mkFreshVariable(VarTable* vt) {
-    static unsigned index = 0;
-
     char buf[VAR_MAX_LEN];
 
-    sprintf(buf, "$%d", index);
+    sprintf(buf, "$%u", vt->fresh_count);
     buf[VAR_MAX_LEN - 1] = '\0';
 
-    char* name = (char*)malloc(sizeof(char) * (strlen(buf) + 1));
+    char* name = (char*)arenaAlloc(&vt->storage, strlen(buf) + 1);
 
     strcpy(name, buf);
 
-    index++;
+    vt->fresh_count++;
 
-    return mkVariable(vt, name);
+    // fresh names cannot clash with existing ones, so no lookup is necessary
+    return appendVariable(vt, name);
 }
 
 void printVarTable(VarTable* vt) {
@@ -196,7 +309,7 @@ int var_cmp(const void* a, const void* b) {
     return strcmp(var_a->name, var_b->name);
 }
 
-void printSatisfyingAssignmentEval(VarTable* vt) {
+void writeSatisfyingAssignment(VarTable* vt, FILE* out) {
     // copy the variables into a new buffer and sort them there
     unsigned size = vt->size * sizeof(Variable);
     Variable* buf = (Variable*)malloc(size);
@@ -204,7 +317,7 @@ void printSatisfyingAssignmentEval(VarTable* vt) {
     qsort(buf, vt->size, sizeof(Variable), var_cmp);
 
     char first = 1;
-    printf("  ");
+    fprintf(out, "  ");
     for (unsigned i = 0; i < vt->size; i++) {
         Variable* current = buf + i;
 
@@ -214,7 +327,7 @@ void printSatisfyingAssignmentEval(VarTable* vt) {
         }
 
         if (!first) {
-            printf("\n  ");
+            fprintf(out, "\n  ");
         }
 
         const char* val = NULL;
@@ -230,10 +343,47 @@ void printSatisfyingAssignmentEval(VarTable* vt) {
                 break;
         }
 
-        printf("%s -> %s", current->name, val);
+        fprintf(out, "%s -> %s", current->name, val);
 
         first = 0;
     }
-    printf("\n");
+    fprintf(out, "\n");
     free(buf);
 }
+
+void printSatisfyingAssignmentEval(VarTable* vt) {
+    writeSatisfyingAssignment(vt, stdout);
+}
+
+void writeCompactAssignment(VarTable* vt, FILE* out) {
+    unsigned line_len = 0;
+    for (unsigned i = 0; i < vt->size; i++) {
+        Variable* current = vt->content + i;
+
+        // do not create assignments for tseitin variables
+        if (current->name[0] == '$') {
+            continue;
+        }
+
+        unsigned len = strlen(current->name) + (current->val == FALSE);
+        if (line_len > 0 && line_len + len + 1 > COMPACT_LINE_LEN) {
+            fputc('\n', out);
+            line_len = 0;
+        }
+        if (line_len == 0) {
+            fputc('v', out);
+            line_len = 1;
+        }
+
+        // undefined variables can be assigned arbitrarily
+        fputc(' ', out);
+        if (current->val == FALSE) {
+            fputc('-', out);
+        }
+        fputs(current->name, out);
+        line_len += len + 1;
+    }
+    if (line_len > 0) {
+        fputc('\n', out);
+    }
+}
@@ -1,5 +1,6 @@
 #pragma once
 
+#include <stdio.h>
 #include <stdlib.h>
 
 /**
@@ -51,6 +52,14 @@ typedef struct Clause Clause;
  */
 void addParentClause(VarTable* vt, VarIndex vi, Clause* c);
 
+/**
+ * Removes all parent clauses of all variables, e.g. before the clauses are
+ * replaced by a new CNF.
+ *
+ * @param vt  the underlying variable table
+ */
+void clearParentClauses(VarTable* vt);
+
 /**
  * Updates the value of a variable.
  *
@@ -62,6 +71,18 @@ void addParentClause(VarTable* vt, VarIndex vi, Clause* c);
  */
 void updateVariableValue(VarTable* vt, VarIndex vi, TruthValue val);
 
+/**
+ * Sets the value of a variable without updating its parent clauses.
+ *
+ * The truth values stored in the parent clauses become stale, so this should
+ * only be used by propagation algorithms that do not rely on them.
+ *
+ * @param vt   the underlying variable table
+ * @param vi   a variable
+ * @param val  the new truth value
+ */
+void setVariableValue(VarTable* vt, VarIndex vi, TruthValue val);
+
 /**
  * Retrieves the next undefined variable.
  *
@@ -70,6 +91,16 @@ void updateVariableValue(VarTable* vt, VarIndex vi, TruthValue val);
  */
 VarIndex getNextUndefinedVariable(VarTable* vt);
 
+/**
+ * Retrieves the number of variables in a variable table.
+ *
+ * Valid variable indices range from 1 to this number.
+ *
+ * @param vt  the underlying variable table
+ * @return    the number of variables
+ */
+unsigned getVariableCount(VarTable* vt);
+
 /**
  * Creates a new variable table.
  *
@@ -91,7 +122,8 @@ void freeVarTable(VarTable* vt);
  * Names may only consist of letters and digits.
  *
  * The name should be a NULL-terminated string in a memory region obtained from
- * malloc. It will be freed when the variable table is freed.
+ * malloc. The table takes ownership of it: the string is copied into the
+ * storage of the table and freed.
  *
  * @param vt    the variable table
  * @param name  a name for the variable
@@ -104,6 +136,9 @@ VarIndex mkVariable(VarTable* vt, char* name);
  *
  * Names should conform to "$(0|[1-9][0-9]*)" (e.g. $0, $1, ...).
  *
+ * Since these names are unique, they are neither checked for duplicates nor
+ * added to the name index, i.e. mkVariable never returns a fresh variable.
+ *
  * @param vt  the variable table
  * @return    the index of the variable
  */
@@ -127,3 +162,23 @@ void printVarTable(VarTable* vt);
  * @param vt  a variable table after a SAT execution
  */
 void printSatisfyingAssignmentEval(VarTable* vt);
+
+/**
+ * Writes the satisfying assignment of printSatisfyingAssignmentEval to a
+ * stream instead of stdout.
+ *
+ * @param vt   a variable table after a SAT execution
+ * @param out  the stream to write to
+ */
+void writeSatisfyingAssignment(VarTable* vt, FILE* out);
+
+/**
+ * Writes a satisfying assignment for all non-Tseitin variables in a compact
+ * format: lines starting with "v " followed by the literals of the model,
+ * i.e. the variable names prefixed with '-' if the variable is FALSE.
+ * Variables are written in the order of the variable table.
+ *
+ * @param vt   a variable table after a SAT execution
+ * @param out  the stream to write to
+ */
+void writeCompactAssignment(VarTable* vt, FILE* out);
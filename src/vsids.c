@@ -0,0 +1,152 @@
+#include "vsids.h"
+
+#include <stdlib.h>
+
+#define VAR_DECAY 0.95
+#define RESCALE_LIMIT 1e100
+#define INITIAL_OCCURRENCE_WEIGHT 1e-6
+
+struct Vsids {
+    VarTable* vt;
+    double* activity;  // indexed by variable
+    double increment;
+    TruthValue* phase;  // saved phases, indexed by variable
+
+    VarIndex* heap;    // max-heap of variables ordered by activity
+    unsigned size;     // number of variables in the heap
+    unsigned* pos;     // position of a variable in the heap + 1, 0 if absent
+};
+
+static char higher(Vsids* h, VarIndex a, VarIndex b) {
+    return h->activity[a] > h->activity[b] ||
+           (h->activity[a] == h->activity[b] && a < b);
+}
+
+static void place(Vsids* h, unsigned i, VarIndex v) {
+    h->heap[i] = v;
+    h->pos[v] = i + 1;
+}
+
+static void siftUp(Vsids* h, unsigned i) {
+    VarIndex v = h->heap[i];
+    while (i > 0) {
+        unsigned parent = (i - 1) / 2;
+        if (!higher(h, v, h->heap[parent])) {
+            break;
+        }
+        place(h, i, h->heap[parent]);
+        i = parent;
+    }
+    place(h, i, v);
+}
+
+static void siftDown(Vsids* h, unsigned i) {
+    VarIndex v = h->heap[i];
+    while (1) {
+        unsigned child = 2 * i + 1;
+        if (child >= h->size) {
+            break;
+        }
+        if (child + 1 < h->size &&
+            higher(h, h->heap[child + 1], h->heap[child])) {
+            child++;
+        }
+        if (!higher(h, h->heap[child], v)) {
+            break;
+        }
+        place(h, i, h->heap[child]);
+        i = child;
+    }
+    place(h, i, v);
+}
+
+static void insert(Vsids* h, VarIndex v) {
+    if (h->pos[v] != 0) {
+        return;
+    }
+    place(h, h->size, v);
+    h->size++;
+    siftUp(h, h->size - 1);
+}
+
+static VarIndex removeMax(Vsids* h) {
+    VarIndex top = h->heap[0];
+    h->pos[top] = 0;
+    h->size--;
+    if (h->size > 0) {
+        place(h, 0, h->heap[h->size]);
+        siftDown(h, 0);
+    }
+    return top;
+}
+
+Vsids* mkVsids(VarTable* vt, CNF* f) {
+    Vsids* h = (Vsids*)malloc(sizeof(Vsids));
+    unsigned n = getVariableCount(vt);
+
+    h->vt = vt;
+    h->activity = (double*)calloc(n + 1, sizeof(double));
+    h->increment = 1.0;
+    h->phase = (TruthValue*)malloc((n + 1) * sizeof(TruthValue));
+    h->heap = (VarIndex*)malloc((n + 1) * sizeof(VarIndex));
+    h->size = 0;
+    h->pos = (unsigned*)calloc(n + 1, sizeof(unsigned));
+
+    // start with frequently occurring variables, without outweighing bumps
+    for (unsigned i = 0; i < f->size; i++) {
+        Clause* c = f->clauses[i];
+        for (unsigned j = 0; j < c->size; j++) {
+            h->activity[abs(c->literals[j])] += INITIAL_OCCURRENCE_WEIGHT;
+        }
+    }
+
+    for (VarIndex v = 1; v <= n; v++) {
+        h->phase[v] = TRUE;
+        insert(h, v);
+    }
+
+    return h;
+}
+
+void freeVsids(Vsids* h) {
+    free(h->activity);
+    free(h->phase);
+    free(h->heap);
+    free(h->pos);
+    free(h);
+}
+
+void bumpActivity(Vsids* h, VarIndex vi) {
+    h->activity[vi] += h->increment;
+
+    if (h->activity[vi] > RESCALE_LIMIT) {
+        unsigned n = getVariableCount(h->vt);
+        for (VarIndex v = 1; v <= n; v++) {
+            h->activity[v] /= RESCALE_LIMIT;
+        }
+        h->increment /= RESCALE_LIMIT;
+    }
+
+    if (h->pos[vi] != 0) {
+        siftUp(h, h->pos[vi] - 1);
+    }
+}
+
+void decayActivities(Vsids* h) { h->increment /= VAR_DECAY; }
+
+void releaseVariable(Vsids* h, VarIndex vi, TruthValue val) {
+    if (val != UNDEFINED) {
+        h->phase[vi] = val;
+    }
+    insert(h, vi);
+}
+
+Literal pickDecision(Vsids* h) {
+    while (h->size > 0) {
+        VarIndex v = removeMax(h);
+        if (getVariableValue(h->vt, v) == UNDEFINED) {
+            return h->phase[v] == FALSE ? -(Literal)v : (Literal)v;
+        }
+    }
+    return 0;
+}
@@ -0,0 +1,80 @@
+#pragma once
+
+/**
+ * In this file, we provide an activity-based decision heuristic (EVSIDS) with
+ * phase saving.
+ *
+ * Every variable has an activity. Variables that take part in conflicts are
+ * bumped, and all activities decay over time by growing the bump increment
+ * instead of scaling every activity. Undefined variables are kept in a binary
+ * max-heap ordered by activity, so picking a decision variable takes
+ * logarithmic time.
+ *
+ * The value a variable had when it was unassigned is saved and used as its
+ * polarity for the next decision (phase saving).
+ */
+
+#include "cnf.h"
+#include "variables.h"
+
+/**
+ * Struct to manage activities, saved phases and the variable heap.
+ *
+ * Should only be created by calling mkVsids.
+ */
+typedef struct Vsids Vsids;
+
+/**
+ * Creates the heuristic for all variables of a table.
+ *
+ * The initial activity of a variable is derived from the number of its
+ * occurrences in the CNF, all saved phases are TRUE.
+ *
+ * @param vt  the underlying variable table
+ * @param f   the formula to be solved
+ * @return    the new heuristic
+ */
+Vsids* mkVsids(VarTable* vt, CNF* f);
+
+/**
+ * Frees the heuristic.
+ *
+ * @param h  the heuristic to be freed
+ */
+void freeVsids(Vsids* h);
+
+/**
+ * Increases the activity of a variable by the current increment.
+ *
+ * @param h   the heuristic
+ * @param vi  a variable
+ */
+void bumpActivity(Vsids* h, VarIndex vi);
+
+/**
+ * Decays all activities, should be called once per conflict.
+ *
+ * @param h  the heuristic
+ */
+void decayActivities(Vsids* h);
+
+/**
+ * Notifies the heuristic that a variable is about to become UNDEFINED.
+ *
+ * Saves the value as the phase of the variable and makes it available for
+ * decisions again.
+ *
+ * @param h    the heuristic
+ * @param vi   a variable
+ * @param val  the value the variable had before
+ */
+void releaseVariable(Vsids* h, VarIndex vi, TruthValue val);
+
+/**
+ * Picks the undefined variable with the highest activity.
+ *
+ * @param h  the heuristic
+ * @return   a literal of that variable with its saved phase, 0 if all
+ *           variables are assigned
+ */
+Literal pickDecision(Vsids* h);
@@ -0,0 +1,255 @@
+#include "watch.h"
+
+#include <assert.h>
+#include <stdlib.h>
+#include <string.h>
+
+#include "arena.h"
+
+#define INIT_WATCH_CAPACITY 4
+
+/**
+ * Growable array of the clauses that watch a literal. The arrays are taken
+ * from the arena of the watches, an outgrown array is simply left behind.
+ */
+typedef struct WatchList {
+    Clause** clauses;
+    unsigned size;
+    unsigned capacity;
+} WatchList;
+
+struct Watches {
+    VarTable* vt;
+    WatchList* lists;  // one list per literal, indexed by litIndex
+    Literal* queue;    // TRUE literals that still have to be propagated
+    unsigned qhead;    // next literal to propagate
+    unsigned qtail;    // position for the next enqueued literal
+    unsigned qcapacity;
+    Clause** units;  // clauses with only one distinct literal
+    unsigned num_units;
+    Arena storage;  // memory of the watch lists
+};
+
+/**
+ * Maps a literal to the position of its watch list.
+ */
+static unsigned litIndex(Literal l) {
+    return l > 0 ? 2 * (unsigned)l : 2 * (unsigned)(-l) + 1;
+}
+
+static void addWatch(Watches* w, Literal l, Clause* c) {
+    WatchList* wl = w->lists + litIndex(l);
+    if (wl->size == wl->capacity) {
+        wl->capacity = wl->capacity == 0 ? INIT_WATCH_CAPACITY
+                                         : 2 * wl->capacity;
+        Clause** grown = (Clause**)arenaAlloc(
+            &w->storage, wl->capacity * sizeof(Clause*));
+        if (wl->size > 0) {
+            memcpy(grown, wl->clauses, wl->size * sizeof(Clause*));
+        }
+        wl->clauses = grown;
+    }
+    wl->clauses[wl->size++] = c;
+}
+
+static void swapLiterals(Clause* c, unsigned i, unsigned j) {
+    Literal t = c->literals[i];
+    c->literals[i] = c->literals[j];
+    c->literals[j] = t;
+}
+
+/**
+ * Moves a literal that differs from the first one to the second position.
+ *
+ * @return  1 if there is such a literal, 0 if the clause only has one
+ *          distinct literal
+ */
+static char normalizeClause(Clause* c) {
+    for (unsigned i = 1; i < c->size; i++) {
+        if (c->literals[i] != c->literals[0]) {
+            swapLiterals(c, 1, i);
+            return 1;
+        }
+    }
+    return 0;
+}
+
+Watches* mkWatches(VarTable* vt, CNF* f) {
+    Watches* w = (Watches*)malloc(sizeof(Watches));
+    unsigned num_vars = getVariableCount(vt);
+
+    w->vt = vt;
+    w->lists = (WatchList*)calloc(2 * (num_vars + 1), sizeof(WatchList));
+    // every variable is enqueued at most once between two calls of clearQueue
+    w->qcapacity = num_vars + 1;
+    w->queue = (Literal*)malloc(w->qcapacity * sizeof(Literal));
+    w->qhead = 0;
+    w->qtail = 0;
+    w->units = NULL;
+    w->num_units = 0;
+    w->storage = mkArena();
+
+    unsigned units_capacity = 0;
+
+    for (unsigned i = 0; i < f->size; i++) {
+        Clause* c = f->clauses[i];
+
+        if (normalizeClause(c)) {
+            watchClause(w, c);
+        } else {
+            // a unit clause only becomes FALSE together with its literal,
+            // the empty clause is reported by assignUnitClauses
+            if (c->size > 0) {
+                addWatch(w, c->literals[0], c);
+            }
+            if (w->num_units == units_capacity) {
+                units_capacity =
+                    units_capacity == 0 ? INIT_WATCH_CAPACITY
+                                        : 2 * units_capacity;
+                w->units = (Clause**)realloc(
+                    w->units, units_capacity * sizeof(Clause*));
+            }
+            w->units[w->num_units++] = c;
+        }
+    }
+
+    return w;
+}
+
+void freeWatches(Watches* w) {
+    freeArena(&w->storage);
+    free(w->lists);
+    free(w->queue);
+    free(w->units);
+    free(w);
+}
+
+void watchClause(Watches* w, Clause* c) {
+    assert(c->size >= 2);
+    addWatch(w, c->literals[0], c);
+    addWatch(w, c->literals[1], c);
+}
+
+void removeWatches(Watches* w, ClauseFilter is_removed, void* ctx) {
+    unsigned num_lists = 2 * (getVariableCount(w->vt) + 1);
+
+    for (unsigned i = 0; i < num_lists; i++) {
+        WatchList* wl = w->lists + i;
+        unsigned keep = 0;
+        for (unsigned k = 0; k < wl->size; k++) {
+            if (!is_removed(ctx, wl->clauses[k])) {
+                wl->clauses[keep++] = wl->clauses[k];
+            }
+        }
+        wl->size = keep;
+    }
+}
+
+void enqueueLiteral(Watches* w, Literal l) {
+    assert(evalLiteral(w->vt, l) == TRUE);
+    assert(w->qtail < w->qcapacity);
+    w->queue[w->qtail++] = l;
+}
+
+void clearQueue(Watches* w) {
+    w->qhead = 0;
+    w->qtail = 0;
+}
+
+/**
+ * Assigns a literal TRUE, reports it and adds it to the queue.
+ */
+static void implyLiteral(Watches* w, Literal l, Clause* reason,
+                         ImplicationHandler on_implied, void* ctx) {
+    setVariableValue(w->vt, abs(l), l > 0 ? TRUE : FALSE);
+    on_implied(ctx, l, reason);
+    enqueueLiteral(w, l);
+}
+
+Clause* assignUnitClauses(Watches* w, ImplicationHandler on_implied,
+                          void* ctx) {
+    for (unsigned i = 0; i < w->num_units; i++) {
+        Clause* c = w->units[i];
+        if (c->size == 0) {
+            return c;
+        }
+
+        Literal l = c->literals[0];
+
+        switch (evalLiteral(w->vt, l)) {
+            case FALSE:
+                return c;
+            case UNDEFINED:
+                implyLiteral(w, l, c, on_implied, ctx);
+                break;
+            default:
+                break;
+        }
+    }
+
+    return NULL;
+}
+
+Clause* propagate(Watches* w, ImplicationHandler on_implied, void* ctx) {
+    while (w->qhead < w->qtail) {
+        Literal false_lit = -w->queue[w->qhead++];
+        WatchList* wl = w->lists + litIndex(false_lit);
+
+        unsigned keep = 0;  // watches that stay in this list are moved here
+        for (unsigned i = 0; i < wl->size; i++) {
+            Clause* c = wl->clauses[i];
+            Literal* lits = c->literals;
+
+            if (c->size == 1) {
+                wl->clauses[keep++] = c;
+                for (i++; i < wl->size; i++) {
+                    wl->clauses[keep++] = wl->clauses[i];
+                }
+                wl->size = keep;
+                return c;
+            }
+
+            // make sure the falsified watch is at position 1
+            if (lits[0] == false_lit) {
+                lits[0] = lits[1];
+                lits[1] = false_lit;
+            }
+
+            if (evalLiteral(w->vt, lits[0]) == TRUE) {
+                wl->clauses[keep++] = c;
+                continue;
+            }
+
+            // look for a literal that is not FALSE to watch instead
+            char moved = 0;
+            for (unsigned k = 2; k < c->size; k++) {
+                if (lits[k] != lits[0] &&
+                    evalLiteral(w->vt, lits[k]) != FALSE) {
+                    lits[1] = lits[k];
+                    lits[k] = false_lit;
+                    addWatch(w, lits[1], c);
+                    moved = 1;
+                    break;
+                }
+            }
+            if (moved) {
+                continue;
+            }
+
+            wl->clauses[keep++] = c;
+
+            if (evalLiteral(w->vt, lits[0]) == FALSE) {
+                for (i++; i < wl->size; i++) {
+                    wl->clauses[keep++] = wl->clauses[i];
+                }
+                wl->size = keep;
+                return c;
+            }
+
+            implyLiteral(w, lits[0], c, on_implied, ctx);
+        }
+        wl->size = keep;
+    }
+
+    return NULL;
+}
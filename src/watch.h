@@ -0,0 +1,129 @@
+#pragma once
+
+/**
+ * In this file, we provide unit propagation based on two watched literals.
+ *
+ * Every clause with at least two different literals is watched by the literals
+ * at its first two positions. As long as neither of them is FALSE, the clause
+ * can neither be unit nor FALSE, so it only has to be visited when one of its
+ * watched literals becomes FALSE. Assigning a variable therefore only touches
+ * the clauses watching the falsified literal instead of all parent clauses.
+ *
+ * Assigned literals are collected in a propagation queue and processed by
+ * propagate().
+ *
+ * Note that the watched propagation reorders the literals of clauses and does
+ * not maintain the TruthValue field of clauses.
+ */
+
+#include "cnf.h"
+#include "variables.h"
+
+/**
+ * Struct to manage the watch lists of all literals and the propagation queue.
+ *
+ * Should only be created by calling mkWatches.
+ */
+typedef struct Watches Watches;
+
+/**
+ * Function that is called for every literal that is implied during
+ * propagation.
+ *
+ * @param ctx     the context pointer given to the propagation function
+ * @param l       the implied literal, which is already TRUE
+ * @param reason  the clause that became unit and implied the literal
+ */
+typedef void (*ImplicationHandler)(void* ctx, Literal l, Clause* reason);
+
+/**
+ * Creates watch lists for all clauses of a CNF.
+ *
+ * All variables of the table must be UNDEFINED.
+ *
+ * @param vt  the underlying variable table
+ * @param f   a CNF
+ * @return    the new watches
+ */
+Watches* mkWatches(VarTable* vt, CNF* f);
+
+/**
+ * Frees the watch lists and the propagation queue. The clauses are not freed.
+ *
+ * @param w  the watches to be freed
+ */
+void freeWatches(Watches* w);
+
+/**
+ * Adds a clause that was created after mkWatches, e.g. a learned clause.
+ *
+ * The clause is watched by its first two literals, which have to be chosen
+ * such that the watch invariant holds: if one of them is FALSE, all other
+ * literals are FALSE and were assigned no later than it.
+ *
+ * @param w  the watches
+ * @param c  a clause with at least two literals
+ */
+void watchClause(Watches* w, Clause* c);
+
+/**
+ * Function that decides whether a clause is removed by removeWatches.
+ *
+ * @param ctx  the context pointer given to removeWatches
+ * @param c    a watched clause
+ * @return     1 if the clause should no longer be watched
+ */
+typedef char (*ClauseFilter)(void* ctx, Clause* c);
+
+/**
+ * Stops watching all clauses selected by a filter, e.g. before deleting
+ * learned clauses. The clauses must not be reasons of current assignments.
+ *
+ * @param w           the watches
+ * @param is_removed  selects the clauses to remove
+ * @param ctx         the context pointer passed to the filter
+ */
+void removeWatches(Watches* w, ClauseFilter is_removed, void* ctx);
+
+/**
+ * Adds a literal to the propagation queue.
+ *
+ * The literal must already be assigned TRUE in the variable table.
+ *
+ * @param w  the watches
+ * @param l  a TRUE literal
+ */
+void enqueueLiteral(Watches* w, Literal l);
+
+/**
+ * Removes all literals from the propagation queue, e.g. after a conflict.
+ *
+ * @param w  the watches
+ */
+void clearQueue(Watches* w);
+
+/**
+ * Assigns the literals of all clauses with only one (distinct) literal and
+ * adds them to the propagation queue.
+ *
+ * @param w           the watches
+ * @param on_implied  called for every assigned literal
+ * @param ctx         passed to on_implied
+ * @return            an empty clause or a unit clause whose literal is
+ *                    already FALSE, NULL if there is none
+ */
+Clause* assignUnitClauses(Watches* w, ImplicationHandler on_implied,
+                          void* ctx);
+
+/**
+ * Propagates all literals in the queue until the queue is empty or a clause
+ * becomes FALSE.
+ *
+ * Implied literals are assigned in the variable table and added to the queue.
+ *
+ * @param w           the watches
+ * @param on_implied  called for every implied literal
+ * @param ctx         passed to on_implied
+ * @return            a FALSE clause if a conflict was found, NULL otherwise
+ */
+Clause* propagate(Watches* w, ImplicationHandler on_implied, void* ctx);
@@ -18,12 +18,68 @@ tests = {
 
     'public.cnf.variable',
     'public.cnf.tseitin01',
+    'public.cnf.compact01',
+    'public.cnf.variablelookup',
+    'public.cnf.parsewide',
+    'public.cnf.counters',
+    'public.cnf.watchpropagate',
+    'public.cnf.watchsolve',
+    'public.cnf.cdclpigeonhole',
+    'public.cnf.cdclreduce',
+    'public.cnf.vsidsorder',
+    'public.cnf.preprocess',
+
+    'public.unit.arena',
+    'public.unit.trail',
 
     'public.solver.simple01_sat',
     'public.solver.complex00_sat',
     'public.solver.complex00_unsat',
     'public.solver.valid_output_sat',
     'public.solver.minisudoku01_sat',
+
+    'public.cdcl.simple01_sat',
+    'public.cdcl.complex00_sat',
+    'public.cdcl.complex00_unsat',
+    'public.cdcl.valid_output_sat',
+    'public.cdcl.minisudoku01_sat',
+
+    'public.preprocess.simple01_sat',
+    'public.preprocess.complex00_sat',
+    'public.preprocess.complex00_unsat',
+    'public.preprocess.valid_output_sat',
+    'public.preprocess.minisudoku01_sat',
+
+    'public.compact.simple01_sat',
+    'public.compact.complex00_sat',
+    'public.compact.complex00_unsat',
+    'public.compact.valid_output_sat',
+    'public.compact.minisudoku01_sat',
+
+    'public.restart.simple01_sat',
+    'public.restart.complex00_sat',
+    'public.restart.complex00_unsat',
+    'public.restart.valid_output_sat',
+    'public.restart.minisudoku01_sat',
+
+    'public.dimacs.wide01_sat',
+    'public.dimacs.sudoku4_sat',
+    'public.dimacs.pigeonhole54_unsat',
+    'public.dimacs.empty01_unsat',
+    'public.dimacs.negative01_invalid',
+    'public.dimacs.count01_invalid',
+    'public.dimacs.count02_invalid',
+
+    'public.server.session',
+}
+
+# extra solver arguments for test categories that reuse the solver instances
+solver_args = {
+    'solver': [],
+    'cdcl': ['--cdcl'],
+    'preprocess': ['--preprocess'],
+    'compact': ['--encoding=compact'],
+    'restart': ['--cdcl', '--restart=glucose', '--learned-limit=1'],
 }
 
 def validate_mapping(map_str, formula_path):
@@ -84,6 +140,35 @@ def validate_mapping(map_str, formula_path):
         return stack[0]
 
 
+def validate_dimacs_mapping(map_str, cnf_path):
+    exp = re.compile('  ([0-9]+) -> (TRUE|FALSE)')
+
+    mapping = {}
+    for line in map_str.splitlines():
+        m = exp.match(line)
+        if m:
+            mapping[int(m.group(1))] = m.group(2) == 'TRUE'
+
+    words = []
+    with open(cnf_path, "r") as cnf_file:
+        for line in cnf_file:
+            if line.startswith('%'):
+                break
+            if not line.startswith('c') and not line.startswith('p'):
+                words += line.split()
+
+    clause = []
+    for word in words:
+        lit = int(word)
+        if lit == 0:
+            if not any(mapping.get(abs(l)) == (l > 0) for l in clause):
+                return False
+            clause = []
+        else:
+            clause.append(lit)
+    return not clause or any(mapping.get(abs(l)) == (l > 0) for l in clause)
+
+
 def test_unit(tu, test_name):
     global test_bin
     test_bin = tu.join_base(test_bin)
@@ -97,7 +182,7 @@ def test_solver(tu, test_name):
     solver_bin = tu.join_base(solver_bin)
     cat, ex, case = test_name.split('.', 2)
     base_name = tu.join_base('test/data/solver/' + cat + '_' + case)
-    args = [base_name + '.in']
+    args = solver_args[ex] + [base_name + '.in']
     rc, out, err = tu.run(solver_bin, args)
 
     if 'AddressSanitizer' in err:
@@ -131,6 +216,37 @@ def test_solver(tu, test_name):
         else:
             return tu.FAILURE('application returned with error\n' + err)
 
+def test_dimacs(tu, test_name):
+    global solver_bin
+    solver_bin = tu.join_base(solver_bin)
+    cat, ex, case = test_name.split('.', 2)
+    cnf_name = tu.join_base('test/data/dimacs/' + cat + '_' + case + '.cnf')
+    rc, out, err = tu.run(solver_bin, ['--dimacs', cnf_name])
+
+    if 'AddressSanitizer' in err:
+        return tu.FAILURE('AddressSanitizer error\n' + err)
+
+    if case.endswith('_invalid'):
+        if rc == 30:
+            return tu.SUCCESS()
+        return tu.FAILURE('invalid input accepted\n')
+    elif case.endswith('_sat'):
+        if rc == 10:
+            if validate_dimacs_mapping(out, cnf_name):
+                return tu.SUCCESS()
+            return tu.FAILURE('incorrect model\n' + out)
+        elif rc == 20:
+            return tu.FAILURE('false unsat result\n')
+        else:
+            return tu.FAILURE('application returned with error\n' + err)
+    else:
+        if rc == 20:
+            return tu.SUCCESS()
+        elif rc == 10:
+            return tu.FAILURE('false sat result\n')
+        else:
+            return tu.FAILURE('application returned with error\n' + err)
+
 def test_parser(tu, test_name):
     global solver_bin
     solver_bin = tu.join_base(solver_bin)
@@ -160,6 +276,65 @@ def test_parser(tu, test_name):
         else:
             return tu.FAILURE('application returned with wrong error code\n' + err)
 
+def parse_server_responses(out):
+    responses = []
+    while out:
+        header, out = out.split('\n', 1)
+        rc, size = header.split()
+        responses.append((int(rc), out[:int(size)]))
+        out = out[int(size):]
+    return responses
+
+def test_server(tu, test_name):
+    global solver_bin
+    solver_bin = tu.join_base(solver_bin)
+    solver_dir = tu.join_base('test/data/solver')
+    parser_dir = tu.join_base('test/data/parser')
+
+    # all requests are sent twice to the same process, so that state left
+    # behind by a request shows up in the following ones
+    requests = []
+    for name in sorted(os.listdir(solver_dir)):
+        if name.endswith('.in'):
+            for opts in ['', ' --cdcl', ' --encoding=compact --preprocess']:
+                requests.append((os.path.join(solver_dir, name), opts))
+    for name in sorted(os.listdir(parser_dir)):
+        if name.endswith('_invalid.in'):
+            requests.append((os.path.join(parser_dir, name), ''))
+    requests += requests
+
+    session = ''
+    for path, opts in requests:
+        with open(path, 'r') as f:
+            formula = f.read()
+        session += '%d%s\n%s' % (len(formula), opts, formula)
+
+    rc, out, err = tu.run(solver_bin, ['--server'], input=session)
+
+    if 'AddressSanitizer' in err:
+        return tu.FAILURE('AddressSanitizer error\n' + err)
+    if rc != 0:
+        return tu.FAILURE('server returned with error\n' + err)
+
+    responses = parse_server_responses(out)
+    if len(responses) != len(requests):
+        return tu.FAILURE('expected %d responses but got %d\n' %
+                          (len(requests), len(responses)))
+
+    for (path, opts), (res, output) in zip(requests, responses):
+        name = os.path.basename(path) + opts
+        if path.endswith('_invalid.in'):
+            if res != 30:
+                return tu.FAILURE('invalid input accepted: ' + name + '\n')
+        elif path.endswith('_sat.in'):
+            if res != 10:
+                return tu.FAILURE('false unsat result: ' + name + '\n')
+            if not validate_mapping(output, path):
+                return tu.FAILURE('incorrect model: ' + name + '\n' + output)
+        elif res != 20:
+            return tu.FAILURE('false sat result: ' + name + '\n')
+    return tu.SUCCESS()
+
 def test(test):
     cat, ex, case = test.split('.', 2)
 
@@ -172,8 +347,12 @@ def test(test):
         return test_unit(ex, case)
     elif ex == 'parser':
         return test_parser(cat, case)
+    elif ex == 'dimacs':
+        return test_dimacs(cat, case)
+    elif ex == 'server':
+        return test_server(cat, case)
     else:
-        assert ex == 'solver'
+        assert ex in solver_args
         return test_solver(cat, case)
 
 
@@ -184,8 +363,12 @@ for test in tests:
         all_tests[test] = test_unit
     elif ex == 'parser':
         all_tests[test] = test_parser
+    elif ex == 'dimacs':
+        all_tests[test] = test_dimacs
+    elif ex == 'server':
+        all_tests[test] = test_server
     else:
-        assert ex == 'solver'
+        assert ex in solver_args
         all_tests[test] = test_solver
 
 timeout_secs = 5
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Claims per second of the list queue backend against a local redis-server.
+
+Compares the claim of three round trips (BRPOPLPUSH, GET of the payload and a
+pipeline for the metadata) with the Lua claim of QueueService and claim_many.
+The database of the server is flushed before every measurement.
+"""
+
+import os
+import sys
+import time
+
+import redis
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from backend.app.services.queue_service import QueueService
+
+
+def claim_three_round_trips(queue):
+    """The claim before the Lua script, one lane."""
+    run_id = queue.redis.brpoplpush(queue.PENDING_QUEUE, queue.PROCESSING_QUEUE, timeout=1)
+    if run_id is None:
+        return []
+    payload = queue.redis.get(queue.JOB_PAYLOAD_KEY.format(run_id=run_id))
+    pipe = queue.redis.pipeline(transaction=True)
+    pipe.hset(queue.JOB_META_KEY.format(run_id=run_id), mapping={"last_claimed_at": int(time.time())})
+    pipe.hincrby(queue.JOB_META_KEY.format(run_id=run_id), "attempts", 1)
+    pipe.execute()
+    return [(int(run_id), payload)]
+
+
+def fill(queue, jobs):
+    queue.redis.flushdb()
+    pipe = queue.redis.pipeline(transaction=False)
+    payload = '{"formula": "a b && c ||", "mode": "RPN", "timeout_s": 10}'
+    for run_id in range(jobs):
+        pipe.set(queue.JOB_PAYLOAD_KEY.format(run_id=run_id), payload)
+        pipe.hset(queue.JOB_META_KEY.format(run_id=run_id), mapping={"attempts": 0, "last_claimed_at": 0})
+        pipe.rpush(queue.PENDING_QUEUE, run_id)
+    pipe.execute()
+
+
+def measure(queue, jobs, claim):
+    fill(queue, jobs)
+    claimed = 0
+    start = time.perf_counter()
+    while claimed < jobs:
+        batch = claim(queue)
+        if not batch:
+            raise RuntimeError("queue ran empty after {} of {} claims".format(claimed, jobs))
+        claimed += len(batch)
+    return jobs / (time.perf_counter() - start)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='localhost', help='redis-server host')
+    parser.add_argument('-p', '--port', type=int, default=6379, help='redis-server port')
+    parser.add_argument('-n', '--jobs', metavar='<n>', type=int, default=20000, help='jobs claimed per measurement')
+    parser.add_argument('-b', '--batch', metavar='<n>', type=int, default=8, help='jobs per claim_many call')
+    args = parser.parse_args()
+
+    client = redis.Redis(host=args.host, port=args.port, decode_responses=True)
+    queue = QueueService(client)
+
+    configs = [
+        ("BRPOPLPUSH + GET + pipeline", claim_three_round_trips),
+        ("claim (Lua)", lambda q: q.claim_many(1, timeout_s=0)),
+        ("claim_many({}) (Lua)".format(args.batch), lambda q: q.claim_many(args.batch, timeout_s=0)),
+    ]
+    print("{:<32} {:>12}".format("claim", "claims/s"))
+    for name, claim in configs:
+        print("{:<32} {:>12.0f}".format(name, measure(queue, args.jobs, claim)))
+    client.flushdb()
+
+
+if (__name__ == '__main__'):
+    main()
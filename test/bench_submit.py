@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Submissions per second of JobService against a local Postgres and redis-server.
+
+Compares submit_job, one formula per call as POST /jobs/submit does, with
+submit_batch as POST /jobs/submit_batch does. HTTP is left out, both sides
+pay it once per request. Every measurement submits new formulas, so no run
+is reused. The formulas and runs stay in the database, the redis database
+is flushed before and after.
+"""
+
+import os
+import sys
+import time
+
+import redis
+from psycopg2.pool import ThreadedConnectionPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from backend.app.schemas.job import JobSubmitRequest
+from backend.app.services.database_service import DatabaseService
+from backend.app.services.job_service import JobService
+from backend.app.services.queue_service import QueueService
+
+
+def formulas(prefix, n):
+    """n distinct small formulas, prefix keeps them apart between measurements and runs."""
+    return ["{0}a{1} {0}b{1} && {0}c{1} ||".format(prefix, i) for i in range(n)]
+
+
+def measure_single(service, prefix, n):
+    start = time.perf_counter()
+    for formula in formulas(prefix, n):
+        service.submit_job(formula)
+    return n / (time.perf_counter() - start)
+
+
+def measure_batch(service, prefix, n, batch):
+    jobs = [JobSubmitRequest(formula=formula) for formula in formulas(prefix, n)]
+    start = time.perf_counter()
+    for i in range(0, n, batch):
+        service.submit_batch(jobs[i:i + batch])
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dsn', default='host=localhost dbname=postgres user=postgres', help='Postgres connection string')
+    parser.add_argument('--redis-host', default='localhost', help='redis-server host')
+    parser.add_argument('--redis-port', type=int, default=6379, help='redis-server port')
+    parser.add_argument('-n', '--jobs', metavar='<n>', type=int, default=2000, help='formulas submitted per measurement')
+    parser.add_argument('-b', '--batch', metavar='<n>', type=int, nargs='+', default=[10, 100, 1000], help='formulas per submit_batch call')
+    args = parser.parse_args()
+
+    pool = ThreadedConnectionPool(1, 2, args.dsn)
+    client = redis.Redis(host=args.redis_host, port=args.redis_port, decode_responses=True)
+    client.flushdb()
+    service = JobService(DatabaseService(pool.getconn, pool.putconn), QueueService(client))
+    run = "r{}".format(int(time.time() * 1000))
+
+    print("{:<32} {:>14}".format("submit", "submissions/s"))
+    print("{:<32} {:>14.0f}".format("submit_job", measure_single(service, run + "s", args.jobs)))
+    for batch in args.batch:
+        rate = measure_batch(service, "{}b{}".format(run, batch), args.jobs, batch)
+        print("{:<32} {:>14.0f}".format("submit_batch({})".format(batch), rate))
+    client.flushdb()
+    pool.closeall()
+
+
+if (__name__ == '__main__'):
+    main()
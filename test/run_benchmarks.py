@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+
+
+import glob
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+solver_bin = "bin/satsolver_opt"
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+class BenchUtils:
+    def __init__(self, base_path, repeat, timeout_secs, verbose=False):
+        self.base_path = base_path
+        self.repeat = repeat
+        self.timeout_secs = timeout_secs
+        self.verbose = verbose
+
+    def join_base(self, path):
+        return os.path.join(self.base_path, path)
+
+    def run_once(self, args, input=None):
+        """Runs the solver once and returns (rc, stdout, seconds)."""
+        cmd = [self.join_base(solver_bin)] + args
+
+        if self.verbose:
+            print("  running command: {}".format(" ".join(cmd)))
+
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, encoding="utf-8")
+        try:
+            outs, _ = proc.communicate(input=input, timeout=self.timeout_secs)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise BenchmarkError("timeout after {}s: {}".format(self.timeout_secs, " ".join(cmd)))
+        elapsed = time.perf_counter() - start
+
+        return proc.returncode, outs, elapsed
+
+    def write_instance(self, name, text):
+        """Writes a generated instance to a temporary file and returns its path."""
+        if not hasattr(self, "tmp_dir"):
+            self.tmp_dir = tempfile.TemporaryDirectory(prefix="satbench")
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def measure(self, args, input=None):
+        """Runs the solver `repeat` times and returns (rc, median_seconds)."""
+        times = []
+        rc = None
+        for _ in range(self.repeat):
+            run_rc, _, elapsed = self.run_once(args, input=input)
+            if rc is not None and run_rc != rc:
+                raise BenchmarkError("inconsistent return codes for " + " ".join(args))
+            rc = run_rc
+            times.append(elapsed)
+        return rc, statistics.median(times)
+
+
+def instances(bu, pattern):
+    paths = sorted(glob.glob(bu.join_base(pattern)))
+    if not paths:
+        raise BenchmarkError("no instances match " + pattern)
+    return paths
+
+
+def sudoku_rpn(k, holes, seed):
+    """Generates a (k*k)x(k*k) sudoku in RPN, encoded like
+    public_minisudoku01_sat.in: every cell has a value, and a value in a
+    cell rules out the same value in all peers and all other values in the
+    cell. All but `holes` cells of a random solution are given."""
+    n = k * k
+
+    def var(i, j, d):
+        return "x%dr%dc%d" % (i + 1, j + 1, d)
+
+    def disjunction(xs):
+        return xs[0] + "".join(" %s ||" % x for x in xs[1:])
+
+    parts = []
+
+    def conjoin(expr):
+        parts.append(expr if not parts else expr + " &&")
+
+    for i in range(n):
+        for j in range(n):
+            conjoin(disjunction([var(i, j, d) for d in range(1, n + 1)]))
+            for d in range(1, n + 1):
+                peers = [var(i, j, e) for e in range(1, n + 1) if e != d]
+                peers += [var(i, t, d) for t in range(n) if t != j]
+                peers += [var(t, j, d) for t in range(n) if t != i]
+                bi, bj = i - i % k, j - j % k
+                peers += [var(a, b, d) for a in range(bi, bi + k) for b in range(bj, bj + k)
+                          if a != i and b != j]
+                conjoin(var(i, j, d) + " " + disjunction(peers) + " ! =>")
+
+    for (i, j, d) in sudoku_givens(k, holes, seed):
+        conjoin(var(i, j, d))
+    return "\n".join(parts) + "\n"
+
+
+def sudoku_givens(k, holes, seed):
+    """Returns the given cells (row, column, value) of the sudoku generated by
+    sudoku_rpn and sudoku_dimacs for the same arguments."""
+    n = k * k
+    rnd = random.Random(seed)
+    perm = list(range(1, n + 1))
+    rnd.shuffle(perm)
+    solution = [[perm[(k * (i % k) + i // k + j) % n] for j in range(n)] for i in range(n)]
+    cells = [(i, j) for i in range(n) for j in range(n)]
+    rnd.shuffle(cells)
+    return [(i, j, solution[i][j]) for (i, j) in cells[holes:]]
+
+
+def sudoku_dimacs(k, holes, seed):
+    """Generates the sudoku of sudoku_rpn directly as DIMACS CNF: every cell
+    has a value, and no two peers or values of a cell conflict."""
+    n = k * k
+
+    def var(i, j, d):
+        return (i * n + j) * n + d
+
+    clauses = []
+    for i in range(n):
+        for j in range(n):
+            clauses.append([var(i, j, d) for d in range(1, n + 1)])
+            for d in range(1, n + 1):
+                clauses += [[-var(i, j, d), -var(i, j, e)] for e in range(d + 1, n + 1)]
+                peers = [(i, t) for t in range(j + 1, n)] + [(t, j) for t in range(i + 1, n)]
+                bi, bj = i - i % k, j - j % k
+                peers += [(a, b) for a in range(i + 1, bi + k) for b in range(bj, bj + k) if b != j]
+                clauses += [[-var(i, j, d), -var(a, b, d)] for (a, b) in peers]
+    clauses += [[var(i, j, d)] for (i, j, d) in sudoku_givens(k, holes, seed)]
+
+    lines = ["p cnf %d %d" % (n * n * n, len(clauses))]
+    lines += [" ".join(map(str, c)) + " 0" for c in clauses]
+    return "\n".join(lines) + "\n"
+
+
+def random_3sat_rpn(num_vars, num_clauses, seed):
+    """Generates a uniform random 3-SAT formula in RPN."""
+    rnd = random.Random(seed)
+    parts = []
+    for i in range(num_clauses):
+        lits = ["x%d" % v + ("" if rnd.random() < 0.5 else " !")
+                for v in rnd.sample(range(1, num_vars + 1), 3)]
+        parts.append("%s %s || %s ||" % tuple(lits) + (" &&" if i > 0 else ""))
+    return "\n".join(parts) + "\n"
+
+
+def print_table(header, rows):
+    widths = [max(len(str(r[i])) for r in [header] + rows) for i in range(len(header))]
+    line = "  ".join("{:<" + str(w) + "}" for w in widths)
+    print(line.format(*header))
+    for row in rows:
+        print(line.format(*row))
+
+
+def compare_configs(bu, args, configs):
+    """Solves every instance with each configuration (name -> solver args)
+    and prints the median times, relative to the first configuration."""
+    names = list(configs.keys())
+    rows = []
+    for path in instances(bu, args.instances):
+        row = [os.path.basename(path)]
+        results = {}
+        times = []
+        for name in names:
+            rc, secs = bu.measure(configs[name] + [path])
+            results[name] = rc
+            times.append(secs)
+            row.append("{:.4f}".format(secs))
+        if len(set(results.values())) != 1:
+            raise BenchmarkError("configurations disagree on " + path + ": " + str(results))
+        for secs in times[1:]:
+            row.append("{:.2f}x".format(times[0] / secs if secs > 0 else float("inf")))
+        row.append({10: "SAT", 20: "UNSAT"}.get(results[names[0]], "rc=%s" % results[names[0]]))
+        rows.append(row)
+    header = ["instance"] + ["%s [s]" % n for n in names]
+    header += ["speedup %s" % n for n in names[1:]] + ["result"]
+    print_table(header, rows)
+
+
+def bench_propagation(bu, args):
+    """Compares scan propagation with watched propagation."""
+    compare_configs(bu, args, {
+        "scan": ["--propagation=scan"],
+        "watched": ["--propagation=watched"],
+    })
+
+
+def bench_algorithm(bu, args):
+    """Compares chronological DPLL with CDCL."""
+    compare_configs(bu, args, {
+        "dpll": [],
+        "cdcl": ["--cdcl"],
+    })
+
+
+def bench_decision(bu, args):
+    """Compares the number of decisions of the decision heuristics on
+    generated sudokus and random 3-SAT formulas."""
+    paths = [bu.write_instance("sudoku9_holes%d.in" % h, sudoku_rpn(3, h, h)) for h in (55, 60, 64)]
+    paths += [bu.write_instance("random3sat_%d.in" % n, random_3sat_rpn(n, int(n * 4.26), n))
+              for n in (50, 100, 150)]
+    configs = {
+        "dpll first": ["--decision=first"],
+        "dpll vsids": ["--decision=vsids"],
+        "cdcl first": ["--cdcl", "--decision=first"],
+        "cdcl vsids": ["--cdcl", "--decision=vsids"],
+    }
+    rows = []
+    for path in paths:
+        row = [os.path.basename(path)]
+        for name, config in configs.items():
+            rc, outs, secs = bu.run_once(["-v"] + config + [path])
+            m = re.search(r"decisions: (\d+)", outs)
+            if rc not in (10, 20) or m is None:
+                raise BenchmarkError("solver failed on %s with rc=%s" % (path, rc))
+            row.append("%s (%.3fs)" % (m.group(1), secs))
+        rows.append(row)
+    print_table(["instance"] + ["%s decisions" % n for n in configs], rows)
+
+
+def bench_encode(bu, args):
+    """Measures parsing and Tseitin encoding on random formulas of growing
+    size. Every size doubles the number of clauses and variables, so linear
+    scaling shows up as a growth factor of about 2."""
+    stat = re.compile(r"(parse|encode) time: ([0-9.]+) s")
+    rows = []
+    previous = None
+    for m in (2000, 4000, 8000, 16000, 32000):
+        path = bu.write_instance("random3sat_%d.in" % m, random_3sat_rpn(m, m, m))
+        totals = []
+        for _ in range(bu.repeat):
+            rc, outs, _ = bu.run_once(["-s", "--cdcl", path])
+            times = dict(stat.findall(outs))
+            if rc not in (10, 20) or len(times) != 2:
+                raise BenchmarkError("solver failed on %s with rc=%s" % (path, rc))
+            totals.append((float(times["parse"]), float(times["encode"])))
+        parse = statistics.median(t[0] for t in totals)
+        encode = statistics.median(t[1] for t in totals)
+        growth = "-" if not previous else "{:.2f}x".format((parse + encode) / previous)
+        previous = parse + encode
+        rows.append([os.path.basename(path), m, "{:.4f}".format(parse), "{:.4f}".format(encode), growth])
+    print_table(["instance", "clauses", "parse [s]", "encode [s]", "growth"], rows)
+
+
+def bench_input(bu, args):
+    """Compares solving sudokus given as RPN formulas (Tseitin encoded) with
+    the same sudokus given as DIMACS CNF."""
+    rows = []
+    for holes in (40, 50, 55):
+        rpn = bu.write_instance("sudoku9_holes%d.in" % holes, sudoku_rpn(3, holes, holes))
+        dimacs = bu.write_instance("sudoku9_holes%d.cnf" % holes, sudoku_dimacs(3, holes, holes))
+        rc_rpn, secs_rpn = bu.measure(["--cdcl", rpn])
+        rc_dimacs, secs_dimacs = bu.measure(["--cdcl", "--dimacs", dimacs])
+        if rc_rpn != 10 or rc_dimacs != 10:
+            raise BenchmarkError("unexpected result for sudoku with %d holes" % holes)
+        rows.append(["sudoku9_holes%d" % holes, os.path.getsize(rpn), os.path.getsize(dimacs),
+                     "{:.4f}".format(secs_rpn), "{:.4f}".format(secs_dimacs),
+                     "{:.2f}x".format(secs_rpn / secs_dimacs if secs_dimacs > 0 else float("inf"))])
+    print_table(["instance", "rpn [bytes]", "dimacs [bytes]", "rpn [s]", "dimacs [s]", "speedup dimacs"], rows)
+
+
+def bench_encoding(bu, args):
+    """Compares the size of the Tseitin and the compact encoding and the time
+    to solve the results on sudokus and random formulas."""
+    cases = [("sudoku9_holes%d.in" % h, sudoku_rpn(3, h, h)) for h in (40, 55)]
+    cases += [("random3sat_8000.in", random_3sat_rpn(8000, 8000, 8000))]
+    rows = []
+    for name, text in cases:
+        path = bu.write_instance(name, text)
+        row = [name]
+        for encoding in ("tseitin", "compact"):
+            opts = ["--cdcl", "--encoding=" + encoding]
+            rc, outs, _ = bu.run_once(["-s"] + opts + [path])
+            m = re.search(r"variables: (\d+)", outs)
+            if rc not in (10, 20) or m is None:
+                raise BenchmarkError("solver failed on %s with rc=%s" % (path, rc))
+            _, cnf, _ = bu.run_once(["-c"] + opts + [path])
+            _, secs = bu.measure(opts + [path])
+            row += [m.group(1), cnf.count("&&") + 1, "{:.4f}".format(secs)]
+        rows.append(row)
+    print_table(["instance", "tseitin vars", "tseitin clauses", "tseitin [s]",
+                 "compact vars", "compact clauses", "compact [s]"], rows)
+
+
+def bench_memory(bu, args):
+    """Reports the peak memory of the solver on generated formulas."""
+    cases = [("random3sat_%d.in" % m, random_3sat_rpn(m, m, m), []) for m in (8000, 32000)]
+    cases += [("sudoku9_holes55.in", sudoku_rpn(3, 55, 55), []),
+              ("sudoku9_holes55.cnf", sudoku_dimacs(3, 55, 55), ["--dimacs"])]
+    rows = []
+    for name, text, extra in cases:
+        path = bu.write_instance(name, text)
+        rc, outs, secs = bu.run_once(["-s", "--cdcl"] + extra + [path])
+        m = re.search(r"peak memory: (\d+) KiB", outs)
+        if rc not in (10, 20) or m is None:
+            raise BenchmarkError("solver failed on %s with rc=%s" % (path, rc))
+        rows.append([name, os.path.getsize(path), m.group(1), "{:.4f}".format(secs)])
+    print_table(["instance", "size [bytes]", "peak memory [KiB]", "time [s]"], rows)
+
+
+benchmarks = {
+    'propagation': bench_propagation,
+    'algorithm': bench_algorithm,
+    'decision': bench_decision,
+    'encode': bench_encode,
+    'input': bench_input,
+    'encoding': bench_encoding,
+    'memory': bench_memory,
+}
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--benchmark', metavar='<name>', default=None, help='only run the benchmark with this name')
+    parser.add_argument('-i', '--instances', metavar='<glob>', default='test/data/solver/*.in', help='instances to solve, relative to the repository root')
+    parser.add_argument('-r', '--repeat', metavar='<n>', type=int, default=5, help='runs per measurement, the median is reported')
+    parser.add_argument('-t', '--timeout', metavar='<secs>', type=int, default=60, help='timeout for a single solver run')
+    parser.add_argument('-l', '--list', action='store_true', help='only list benchmarks, don\'t execute')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print executed commands')
+
+    args = parser.parse_args()
+
+    if args.list:
+        for name in benchmarks.keys():
+            print(name)
+        sys.exit(0)
+
+    base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    bu = BenchUtils(base_path=base_path, repeat=args.repeat, timeout_secs=args.timeout, verbose=args.verbose)
+
+    if not os.access(bu.join_base(solver_bin), os.X_OK):
+        print("'%s' is not a file or not executable, run make first" % solver_bin)
+        sys.exit(1)
+
+    names = benchmarks.keys() if args.benchmark is None else [args.benchmark]
+    for name in names:
+        if name not in benchmarks:
+            print("Benchmark {} not found!".format(name))
+            sys.exit(1)
+        print("Running benchmark {}:".format(name))
+        try:
+            benchmarks[name](bu, args)
+        except BenchmarkError as e:
+            print("  error: {}".format(e))
+            sys.exit(1)
+        print()
+
+
+if (__name__ == '__main__'):
+    main()